@@ -0,0 +1,179 @@
+"""
+Analysis Result Cache for ETTA-X
+Avoids re-running git diff + AST analysis for commit ranges that were
+already analyzed.
+
+The same range is frequently analyzed more than once (a feature branch push
+followed by a merge with identical trees, manual re-processing of an event,
+ad-hoc /api/analyze/commits calls). Results are persisted in the
+`analysis_cache` table and keyed by:
+- repository full name
+- commit pair (before..after), checked before cloning
+- tree pair (before^{tree}..after^{tree}), checked after cloning but before diffing
+- analyzer version, so stale results are never served after analyzer changes
+
+Author: ETTA-X
+"""
+
+import json
+import subprocess
+from threading import Lock
+from typing import Optional, Dict, Any, Tuple, Callable
+
+from backend.api.diff_analyzer import ANALYZER_VERSION, analyze_commits
+from backend.api.metrics import REGISTRY, track_git
+from backend.app.database import (
+    get_analysis_cache_entry, store_analysis_cache_entry, get_analysis_cache_summary
+)
+
+
+class AnalysisCache:
+    """Persistent analysis result cache with in-process hit/miss counters"""
+
+    def __init__(self, analyzer_version: str = ANALYZER_VERSION):
+        self.analyzer_version = analyzer_version
+        self.hits = 0        # Served by commit pair (no clone needed)
+        self.tree_hits = 0   # Served by tree pair (clone/fetch done, diff skipped)
+        self.misses = 0      # Full analysis performed
+        self._lock = Lock()
+
+    @staticmethod
+    def commit_key(old_commit: str, new_commit: str) -> str:
+        """Build the cache key for a commit pair"""
+        return f"{old_commit}..{new_commit}"
+
+    @staticmethod
+    def tree_key(old_tree: str, new_tree: str) -> str:
+        """Build the cache key for a tree pair"""
+        return f"tree:{old_tree}..{new_tree}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def _decode(entry: Optional[dict], old_commit: str, new_commit: str) -> Optional[Dict[str, Any]]:
+        """Decode a stored entry, re-labelling it with the requested commits"""
+        if not entry:
+            return None
+        try:
+            result = json.loads(entry['result'])
+        except (json.JSONDecodeError, TypeError):
+            return None
+        if isinstance(result, dict):
+            result['old_commit'] = old_commit
+            result['new_commit'] = new_commit
+        return result
+
+    def lookup(self, repository: str, old_commit: str, new_commit: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a result by commit pair. Safe to call before the repository
+        is cloned. Only hits are counted here; a miss is counted once the
+        full analysis actually runs.
+        """
+        entry = get_analysis_cache_entry(
+            repository, self.analyzer_version,
+            commit_key=self.commit_key(old_commit, new_commit)
+        )
+        result = self._decode(entry, old_commit, new_commit)
+        if result is not None:
+            self._count('hits')
+        return result
+
+    def analyze(
+        self,
+        repository: str,
+        repo_path: str,
+        old_commit: str,
+        new_commit: str,
+        analyze_fn: Callable[[str, str, str], Dict[str, Any]] = analyze_commits
+    ) -> Dict[str, Any]:
+        """
+        Return the analysis for a commit range from a local clone, using the
+        tree-pair cache before falling back to a full analysis.
+
+        Args:
+            repository: Repository full name (owner/repo)
+            repo_path: Path to the local git clone
+            old_commit: SHA of the older commit
+            new_commit: SHA of the newer commit
+            analyze_fn: Analysis function (defaults to analyze_commits)
+
+        Returns:
+            Dictionary with analysis results
+        """
+        tree_pair = resolve_tree_pair(repo_path, old_commit, new_commit)
+        tree_key = self.tree_key(*tree_pair) if tree_pair else None
+
+        if tree_key:
+            entry = get_analysis_cache_entry(repository, self.analyzer_version, tree_key=tree_key)
+            result = self._decode(entry, old_commit, new_commit)
+            if result is not None:
+                self._count('tree_hits')
+                # Remember the new commit pair so the next lookup skips the clone
+                self.store(repository, old_commit, new_commit, result, tree_key)
+                return result
+
+        self._count('misses')
+        result = analyze_fn(repo_path, old_commit, new_commit)
+        self.store(repository, old_commit, new_commit, result, tree_key)
+        return result
+
+    def store(self, repository: str, old_commit: str, new_commit: str,
+              result: Dict[str, Any], tree_key: str = None) -> bool:
+        """Persist an analysis result (error results are never cached)"""
+        if not isinstance(result, dict) or 'error' in result:
+            return False
+        return store_analysis_cache_entry(
+            repository, self.analyzer_version,
+            self.commit_key(old_commit, new_commit),
+            json.dumps(result),
+            tree_key=tree_key
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and persistent cache size"""
+        with self._lock:
+            hits, tree_hits, misses = self.hits, self.tree_hits, self.misses
+        lookups = hits + tree_hits + misses
+        return {
+            "analyzer_version": self.analyzer_version,
+            "hits": hits,
+            "tree_hits": tree_hits,
+            "misses": misses,
+            "hit_rate": round((hits + tree_hits) / lookups, 4) if lookups else 0.0,
+            **get_analysis_cache_summary()
+        }
+
+
+def resolve_tree_pair(repo_path: str, old_commit: str, new_commit: str) -> Optional[Tuple[str, str]]:
+    """Resolve the tree SHAs of two commits in a local clone"""
+    try:
+        with track_git("rev-parse") as tracked:
+            result = tracked(subprocess.run(
+                ['git', 'rev-parse', f'{old_commit}^{{tree}}', f'{new_commit}^{{tree}}'],
+                cwd=repo_path,
+                capture_output=True,
+                text=True,
+                timeout=10
+            ))
+        if result.returncode != 0:
+            return None
+        trees = result.stdout.split()
+        return (trees[0], trees[1]) if len(trees) == 2 else None
+    except Exception:
+        return None
+
+
+# Shared cache instance used by the API handlers and pipeline
+analysis_cache = AnalysisCache()
+
+REGISTRY.register_callback(
+    "etta_analysis_cache_lookups_total", "Analysis cache lookups by result", "counter",
+    lambda: {
+        ("hit",): analysis_cache.hits,
+        ("tree_hit",): analysis_cache.tree_hits,
+        ("miss",): analysis_cache.misses,
+    },
+    ("result",)
+)
@@ -0,0 +1,287 @@
+"""
+Commit Sync Engine for ETTA-X
+Pulls commits from the GitHub API for repositories without webhooks.
+
+For each repository (several at a time, bounded by a semaphore):
+1. Page through /repos/{owner}/{repo}/commits (following Link: rel="next")
+   until the checkpoint commit from the previous sync is reached, or up to
+   SYNC_INITIAL_COMMITS commits on the first sync. A catch-up left
+   unfinished by the previous run continues below its resume point instead
+   of starting at the branch head
+2. Check all fetched SHAs against webhook_events in one IN (...) query
+3. Insert the new commits as synthetic push events in one transaction
+4. Fetch each new commit's diff and score it (bounded concurrency, scoring
+   in worker threads), then mark the events processed in one transaction
+   (event_created / event_completed are published to the event stream).
+   Commits whose diff could not be fetched or scored stay unprocessed and
+   are retried by the next sync
+5. Move the repository's checkpoint to the newest commit, once the new
+   commits are stored and the previous checkpoint was reached. If the page
+   limit ran out first, the checkpoint stays and the oldest commit fetched
+   is stored as the resume point, so the next run fills the rest of the
+   gap; the newest commit becomes the checkpoint when the gap is closed
+
+Configuration (environment variables):
+- SYNC_CONCURRENCY: repositories / diff fetches in flight (default 4)
+- SYNC_MAX_PAGES: page limit per repository and run (default 10)
+- SYNC_INITIAL_COMMITS: commits taken on a repository's first sync (default 100)
+
+Author: ETTA-X
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+import httpx
+
+from backend.api.github_cache import cached_get
+from backend.api.pipeline_events import pipeline_events, EVENT_CREATED, EVENT_COMPLETED
+from backend.app.database import (
+    get_repository_by_full_name, get_existing_commit_shas, create_webhook_events_batch,
+    mark_webhook_events_processed, get_sync_checkpoint, update_sync_checkpoint, update_sync_resume_point,
+    get_unprocessed_sync_events
+)
+
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Scores a commit diff: (diff_text, repository, branch, commit_sha, parent_sha) -> processing result
+ScoreFn = Callable[[str, str, str, str, Optional[str]], Dict[str, Any]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+class CommitSyncEngine:
+    """Concurrent, checkpointed commit sync for one access token"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        token: str,
+        score_fn: ScoreFn,
+        concurrency: int = None,
+        max_pages: int = None,
+        initial_commits: int = None,
+        per_page: int = 100,
+        base_url: str = GITHUB_API_URL
+    ):
+        self.client = client
+        self.token = token
+        self.score_fn = score_fn
+        self.concurrency = concurrency or _env_int("SYNC_CONCURRENCY", 4)
+        self.max_pages = max_pages or _env_int("SYNC_MAX_PAGES", 10)
+        self.initial_commits = initial_commits or _env_int("SYNC_INITIAL_COMMITS", 100)
+        self.per_page = per_page
+        self.base_url = base_url
+        self._repo_semaphore = asyncio.Semaphore(self.concurrency)
+        self._diff_semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _headers(self, accept: str = "application/vnd.github.v3+json") -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}", "Accept": accept}
+
+    async def sync(self, repositories: List[str]) -> Dict[str, Any]:
+        """
+        Sync several repositories concurrently.
+
+        Returns:
+            Dict with the number of new commits, per-repository counts and errors
+        """
+        async def run(repo_full_name: str):
+            async with self._repo_semaphore:
+                return await self.sync_repository(repo_full_name)
+
+        results = await asyncio.gather(*(run(repo) for repo in repositories), return_exceptions=True)
+
+        per_repository = {}
+        errors = []
+        for repo_full_name, result in zip(repositories, results):
+            if isinstance(result, Exception):
+                errors.append(f"{repo_full_name}: {result}")
+            else:
+                per_repository[repo_full_name] = result
+
+        return {
+            "synced": sum(per_repository.values()),
+            "per_repository": per_repository,
+            "errors": errors,
+        }
+
+    async def sync_repository(self, repo_full_name: str) -> int:
+        """Sync one repository; returns the number of new commits stored"""
+        owner, repo = repo_full_name.split('/')
+
+        checkpoint = await asyncio.to_thread(get_sync_checkpoint, repo_full_name) or {}
+        checkpoint_sha = checkpoint.get('last_synced_sha')
+        # Set while an earlier run's catch-up has not reached the checkpoint yet
+        resume_sha = checkpoint.get('resume_sha')
+        head_sha = checkpoint.get('resume_head_sha')
+
+        commits, complete = await self._fetch_commits(owner, repo, checkpoint_sha, resume_sha)
+        # Events an earlier run stored but could not fetch or score
+        retries = await asyncio.to_thread(get_unprocessed_sync_events, repo_full_name, self.initial_commits)
+
+        created = []
+        if commits:
+            existing = await asyncio.to_thread(get_existing_commit_shas, [c['sha'] for c in commits])
+            new_commits = [c for c in commits if c['sha'] not in existing]
+
+            repo_row = await asyncio.to_thread(get_repository_by_full_name, repo_full_name)
+            branch = (repo_row or {}).get('default_branch') or 'main'
+
+            if new_commits:
+                event_ids = await asyncio.to_thread(
+                    create_webhook_events_batch,
+                    [self._build_event(repo_full_name, branch, commit) for commit in new_commits]
+                )
+                if not event_ids:
+                    # Nothing stored: keep the checkpoint so the next run fetches these again
+                    raise Exception(f"Failed to store {len(new_commits)} new commits")
+                created = [
+                    (event_id, branch, commit)
+                    for event_id, commit in zip(event_ids, new_commits)
+                    if event_id
+                ]
+            for event_id, branch, commit in created:
+                pipeline_events.publish(
+                    EVENT_CREATED, repo_full_name, event_id=event_id, event_type="push",
+                    branch=branch, commit_sha=commit['sha']
+                )
+
+        pending = created + [
+            (row['id'], row['branch'], {
+                'sha': row['commit_sha'],
+                'parents': [{'sha': row['before_sha']}] if row['before_sha'] else [],
+            })
+            for row in retries
+        ]
+        if pending:
+            results = await asyncio.gather(
+                *(self._process_commit(owner, repo, branch, event_id, commit)
+                  for event_id, branch, commit in pending)
+            )
+            processed = [r for r in results if r]
+            await asyncio.to_thread(mark_webhook_events_processed, processed)
+            for event_id, _ in processed:
+                pipeline_events.publish(EVENT_COMPLETED, repo_full_name, event_id=event_id, status="completed")
+            if len(processed) < len(pending):
+                print(f"[Sync] {len(pending) - len(processed)} commits of {repo_full_name} "
+                      f"left unprocessed for the next sync")
+
+        if complete and (commits or resume_sha):
+            # The newest commit (of this run, or of the catch-up) is the next run's stopping point
+            newest_sha = head_sha if resume_sha else commits[0]['sha']
+            await asyncio.to_thread(update_sync_checkpoint, repo_full_name, newest_sha, len(created))
+        elif commits:
+            # Commits newest first: the next run continues below the oldest one
+            await asyncio.to_thread(
+                update_sync_resume_point, repo_full_name, commits[-1]['sha'],
+                head_sha or commits[0]['sha'], len(created)
+            )
+            print(f"[Sync] {repo_full_name}: checkpoint {checkpoint_sha[:7]} not reached within "
+                  f"{self.max_pages} pages, resuming below {commits[-1]['sha'][:7]} next sync")
+        return len(created)
+
+    async def _fetch_commits(self, owner: str, repo: str, checkpoint_sha: Optional[str],
+                             start_sha: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Page through commits (newest first) until the checkpoint is reached.
+
+        start_sha lists the history below that commit (a resume point)
+        instead of from the branch head; start_sha itself is skipped.
+
+        Returns:
+            (commits, complete); complete is False when the page limit ran out
+            before the checkpoint, so older new commits were not fetched
+        """
+        limit = None if checkpoint_sha else self.initial_commits
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+        params = {"per_page": self.per_page}
+        if start_sha:
+            params["sha"] = start_sha
+        commits = []
+
+        for _ in range(self.max_pages):
+            response = await cached_get(self.client, url, headers=self._headers(), params=params)
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch commits: {response.status_code}")
+
+            for commit in response.json():
+                if commit['sha'] == start_sha:
+                    continue
+                if commit['sha'] == checkpoint_sha:
+                    return commits, True
+                commits.append(commit)
+                if limit and len(commits) >= limit:
+                    return commits, True
+
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                # The whole history was read (the checkpoint may be gone after a force push)
+                return commits, True
+            # The next link already carries per_page and page
+            url, params = next_url, None
+
+        # A first sync takes what it got; otherwise commits before the checkpoint were skipped
+        return commits, checkpoint_sha is None
+
+    @staticmethod
+    def _build_event(repo_full_name: str, branch: str, commit: Dict[str, Any]) -> Dict[str, Any]:
+        commit_sha = commit['sha']
+        parent_sha = commit['parents'][0]['sha'] if commit.get('parents') else None
+        return {
+            "webhook_id": None,
+            "delivery_id": f"sync-{commit_sha}",
+            "event_type": "push",
+            "repository_full_name": repo_full_name,
+            "branch": branch,
+            "commit_sha": commit_sha,
+            "before_sha": parent_sha,
+            "payload": {
+                "ref": f"refs/heads/{branch}",
+                "after": commit_sha,
+                "before": parent_sha,
+                "repository": {"full_name": repo_full_name},
+                "commits": [{
+                    "id": commit_sha,
+                    "message": commit['commit']['message'],
+                    "author": commit['commit']['author'],
+                    "added": [],
+                    "modified": [],
+                    "removed": []
+                }],
+                "head_commit": {
+                    "id": commit_sha,
+                    "message": commit['commit']['message']
+                }
+            }
+        }
+
+    async def _process_commit(self, owner: str, repo: str, branch: str,
+                              event_id: int, commit: Dict[str, Any]) -> Optional[tuple]:
+        """Fetch and score one commit's diff; returns (event_id, result JSON)"""
+        commit_sha = commit['sha']
+        parent_sha = commit['parents'][0]['sha'] if commit.get('parents') else None
+        try:
+            async with self._diff_semaphore:
+                response = await self.client.get(
+                    f"{self.base_url}/repos/{owner}/{repo}/commits/{commit_sha}",
+                    headers=self._headers("application/vnd.github.v3.diff"),
+                )
+            if response.status_code != 200:
+                print(f"[Sync] Failed to fetch diff for {commit_sha}: {response.status_code}")
+                return None
+
+            result = await asyncio.to_thread(
+                self.score_fn, response.text, f"{owner}/{repo}", branch, commit_sha, parent_sha
+            )
+            return event_id, json.dumps(result)
+        except Exception as e:
+            print(f"[Sync] Error processing commit {commit_sha}: {e}")
+            return None
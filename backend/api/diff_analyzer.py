@@ -20,6 +20,13 @@ from enum import Enum
 from typing import Optional, List, Dict, Any, Set, Tuple
 from pathlib import Path
 
+from backend.api.metrics import track_git
+
+
+# Bump whenever analysis output changes shape or semantics so cached
+# results produced by an older analyzer are no longer served.
+ANALYZER_VERSION = "1.0.0"
+
 
 class ChangeType(Enum):
     """Classification of code changes"""
@@ -255,13 +262,14 @@ class GitDiffParser:
     def get_diff(self, old_commit: str, new_commit: str) -> str:
         """Get git diff between two commits"""
         try:
-            result = subprocess.run(
-                ['git', 'diff', '--unified=0', old_commit, new_commit],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            with track_git("diff") as tracked:
+                result = tracked(subprocess.run(
+                    ['git', 'diff', '--unified=0', old_commit, new_commit],
+                    cwd=self.repo_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                ))
             if result.returncode != 0:
                 raise Exception(f"Git diff failed: {result.stderr}")
             return result.stdout
@@ -271,13 +279,14 @@ class GitDiffParser:
     def get_changed_files_list(self, old_commit: str, new_commit: str) -> List[Tuple[str, str, Optional[str]]]:
         """Get list of changed files with their status"""
         try:
-            result = subprocess.run(
-                ['git', 'diff', '--name-status', old_commit, new_commit],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            with track_git("diff") as tracked:
+                result = tracked(subprocess.run(
+                    ['git', 'diff', '--name-status', old_commit, new_commit],
+                    cwd=self.repo_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=30
+                ))
             if result.returncode != 0:
                 raise Exception(f"Git diff failed: {result.stderr}")
             
@@ -315,13 +324,14 @@ class GitDiffParser:
         
         # Get detailed diff (with context for display)
         try:
-            result = subprocess.run(
-                ['git', 'diff', '--unified=3', old_commit, new_commit],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            with track_git("diff") as tracked:
+                result = tracked(subprocess.run(
+                    ['git', 'diff', '--unified=3', old_commit, new_commit],
+                    cwd=self.repo_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                ))
             diff_output_with_context = result.stdout if result.returncode == 0 else ""
         except:
             diff_output_with_context = ""
@@ -402,13 +412,14 @@ class GitDiffParser:
     def get_file_content(self, commit: str, file_path: str) -> Optional[str]:
         """Get file content at a specific commit"""
         try:
-            result = subprocess.run(
-                ['git', 'show', f'{commit}:{file_path}'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            with track_git("show") as tracked:
+                result = tracked(subprocess.run(
+                    ['git', 'show', f'{commit}:{file_path}'],
+                    cwd=self.repo_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                ))
             if result.returncode == 0:
                 return result.stdout
             return None
@@ -840,3 +851,99 @@ def analyze_from_webhook(repo_path: str, webhook_payload: Dict[str, Any]) -> Opt
     analyzer = DiffAnalyzer(repo_path)
     result = analyzer.analyze_webhook_event(webhook_payload)
     return result.to_dict() if result else None
+
+
+def analyze_unified_diff(diff_text: str, old_commit: str = "", new_commit: str = "") -> Dict[str, Any]:
+    """
+    Analyze a unified diff fetched from the GitHub API (no local clone).
+    
+    Without file contents there is no AST analysis; files are classified
+    by path only. The result has the same shape as analyze_commits().
+    
+    Args:
+        diff_text: Unified diff text (e.g. Accept: application/vnd.github.v3.diff)
+        old_commit: SHA of the older commit
+        new_commit: SHA of the newer commit
+    
+    Returns:
+        Dictionary with analysis results
+    """
+    changed_files: List[ChangedFile] = []
+    current: Optional[ChangedFile] = None
+    current_diff: List[str] = []
+    lines_added = 0
+    lines_deleted = 0
+    
+    def finish_file():
+        if current is not None:
+            current.diff = '\n'.join(current_diff)
+            if FileFilter.should_analyze(current.path):
+                changed_files.append(current)
+    
+    for line in diff_text.split('\n'):
+        file_match = re.match(r'^diff --git a/(.+) b/(.+)$', line)
+        if file_match:
+            finish_file()
+            old_path, new_path = file_match.group(1), file_match.group(2)
+            current = ChangedFile(
+                path=new_path,
+                status='renamed' if old_path != new_path else 'modified',
+                old_path=old_path if old_path != new_path else None
+            )
+            current_diff = [line]
+            continue
+        
+        if current is None:
+            continue
+        current_diff.append(line)
+        
+        if line.startswith('new file mode'):
+            current.status = 'added'
+        elif line.startswith('deleted file mode'):
+            current.status = 'deleted'
+        elif line.startswith('+') and not line.startswith('+++'):
+            lines_added += 1
+        elif line.startswith('-') and not line.startswith('---'):
+            lines_deleted += 1
+        else:
+            hunk_match = re.match(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@', line)
+            if hunk_match:
+                old_count = int(hunk_match.group(2) or 1)
+                new_start = int(hunk_match.group(3))
+                new_count = int(hunk_match.group(4) or 1)
+                change_type = 'added' if old_count == 0 else 'removed' if new_count == 0 else 'modified'
+                if new_count > 0:
+                    current.line_ranges.append(LineRange(new_start, new_start + new_count - 1, change_type))
+    finish_file()
+    
+    all_change_types = set()
+    for file in changed_files:
+        file.change_types = (
+            {ChangeType.UNKNOWN} if file.status == 'deleted' else ChangeClassifier.classify_file(file)
+        )
+        all_change_types.update(file.change_types)
+    
+    summary = {
+        "total_files": len(changed_files),
+        "added_files": sum(1 for f in changed_files if f.status == 'added'),
+        "modified_files": sum(1 for f in changed_files if f.status == 'modified'),
+        "deleted_files": sum(1 for f in changed_files if f.status == 'deleted'),
+        "total_functions_changed": 0,
+        "total_lines_added": lines_added,
+        "total_lines_deleted": lines_deleted,
+        "change_type_counts": {
+            ct.value: sum(1 for f in changed_files if ct in f.change_types)
+            for ct in ChangeType
+            if any(ct in f.change_types for f in changed_files)
+        }
+    }
+    
+    return DiffAnalysisResult(
+        old_commit=old_commit,
+        new_commit=new_commit,
+        changed_files=changed_files,
+        changed_functions=[],
+        change_types=sorted([ct.value for ct in all_change_types]),
+        affected_components=ChangeClassifier.get_affected_components(changed_files),
+        summary=summary
+    ).to_dict()
@@ -0,0 +1,174 @@
+"""
+Fast JSON for ETTA-X
+JSON encoding/decoding for large payloads (analysis results, generated
+tests), using orjson when it is installed and the standard library
+otherwise.
+
+orjson serializes several times faster than json.dumps and returns bytes
+directly, which is what responses need. It is an optional dependency:
+    pip install orjson
+
+Encoding or decoding a multi-megabyte processing_result takes tens of
+milliseconds, which blocks the event loop (and every other request) when
+done inline in an `async def`. The *_async helpers run such work on a
+small dedicated thread pool once the data is larger than
+JSON_OFFLOAD_BYTES (for objects to encode, a size hint or a bounded
+estimate), and inline below that, where a thread hop would cost more than
+it saves.
+
+Usage:
+    @app.get("/api/heavy", response_class=FastJSONResponse)
+    async def heavy():
+        return payload
+
+    result = await loads_async(event['processing_result'])
+    result_json = await dumps_str_async(combined_result)
+
+Configuration (environment variables):
+- JSON_OFFLOAD_BYTES: size from which work moves off the loop (default 64 KB)
+- JSON_WORKERS: threads of the JSON pool (default 2)
+
+Author: ETTA-X
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Union, Callable, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+from backend.api.metrics import REGISTRY
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+JSON_OFFLOAD_BYTES = int(os.getenv("JSON_OFFLOAD_BYTES", 64 * 1024))
+
+JSON_OFFLOADS = REGISTRY.counter(
+    "etta_json_offloaded_total", "JSON/compression work moved off the event loop", ("operation",)
+)
+
+# Separate from the default executor, which pipeline stages keep busy
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("JSON_WORKERS", 2)), thread_name_prefix="json"
+)
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits: let the standard encoder decide
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps_str(payload: Any) -> str:
+    """Serialize to a JSON string (for TEXT columns)"""
+    return dumps(payload).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def estimated_size(payload: Any, limit: int = JSON_OFFLOAD_BYTES) -> int:
+    """
+    Rough encoded size of a payload. Counting stops once it reaches
+    `limit`, so checking a large payload costs about as much as a small one.
+    """
+    size = 0
+    stack = [payload]
+    while stack and size < limit:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item) + 2
+        elif isinstance(item, dict):
+            size += 2
+            for key, value in item.items():
+                size += len(str(key)) + 4
+                stack.append(value)
+                if size >= limit:
+                    break
+        elif isinstance(item, (list, tuple)):
+            size += 2
+            for value in item:
+                size += 1
+                stack.append(value)
+                if size >= limit:
+                    break
+        elif isinstance(item, (bytes, bytearray)):
+            size += len(item)
+        else:
+            size += 8  # Numbers, booleans, null
+    return size
+
+
+async def offload(operation: str, fn: Callable, *args) -> Any:
+    """Run CPU-bound serialization work on the JSON thread pool"""
+    JSON_OFFLOADS.inc(operation=operation)
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+async def loads_async(data: Union[str, bytes]) -> Any:
+    """loads(), off the event loop for large inputs"""
+    if len(data) < JSON_OFFLOAD_BYTES:
+        return loads(data)
+    return await offload("loads", loads, data)
+
+
+async def dumps_async(payload: Any, size_hint: Optional[int] = None) -> bytes:
+    """
+    dumps(), off the event loop for large payloads.
+
+    Args:
+        payload: Object to serialize
+        size_hint: Approximate encoded size if the caller knows it (e.g.
+                   the size of the strings the payload was built from);
+                   without a hint it is estimated with estimated_size()
+    """
+    if size_hint is None:
+        size_hint = estimated_size(payload)
+    if size_hint < JSON_OFFLOAD_BYTES:
+        return dumps(payload)
+    return await offload("dumps", dumps, payload)
+
+
+async def dumps_str_async(payload: Any, size_hint: Optional[int] = None) -> str:
+    """dumps_str(), off the event loop for large payloads"""
+    if size_hint is None:
+        size_hint = estimated_size(payload)
+    if size_hint < JSON_OFFLOAD_BYTES:
+        return dumps_str(payload)
+    return await offload("dumps", dumps_str, payload)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (orjson when available)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def json_response(payload: Any, size_hint: Optional[int] = None, **kwargs) -> Response:
+    """
+    Encode a payload (off the loop if large) into a ready JSON response.
+
+    Returning a Response also skips FastAPI's jsonable_encoder pass over
+    the payload, so handlers should only use it for plain JSON data.
+    """
+    body = await dumps_async(payload, size_hint)
+    return Response(content=body, media_type="application/json", **kwargs)
@@ -8,9 +8,11 @@ import hmac
 import hashlib
 import secrets
 from typing import Optional, List, Dict, Any, Tuple
-import httpx
 from git import Repo
 
+from backend.api.http_client import http_client
+from backend.api.github_cache import cached_get
+
 
 class GitHubOAuthError(Exception):
     """Exception raised for OAuth scope/permission errors"""
@@ -55,10 +57,10 @@ class GitHubAPI:
         if self._token_scopes is not None:
             return self._token_scopes
         
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             # Make a lightweight API call to get the scopes header
-            response = await client.get(
-                f"{self.BASE_URL}/user",
+            response = await cached_get(
+                client, f"{self.BASE_URL}/user",
                 headers=self.headers
             )
             
@@ -139,10 +141,10 @@ class GitHubAPI:
         Fetch all repositories the authenticated user has access to.
         This includes owned repos and repos they have permission to access.
         """
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             # Get repos the user owns or has explicit access to
-            response = await client.get(
-                f"{self.BASE_URL}/user/repos",
+            response = await cached_get(
+                client, f"{self.BASE_URL}/user/repos",
                 headers=self.headers,
                 params={
                     "per_page": per_page,
@@ -186,9 +188,9 @@ class GitHubAPI:
             repo: Repository name
             per_page: Number of branches per page
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/branches",
+        async with http_client() as client:
+            response = await cached_get(
+                client, f"{self.BASE_URL}/repos/{owner}/{repo}/branches",
                 headers=self.headers,
                 params={"per_page": per_page}
             )
@@ -218,9 +220,9 @@ class GitHubAPI:
             owner: Repository owner (username or organization)
             repo: Repository name
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}",
+        async with http_client() as client:
+            response = await cached_get(
+                client, f"{self.BASE_URL}/repos/{owner}/{repo}",
                 headers=self.headers
             )
             
@@ -264,9 +266,9 @@ class GitHubAPI:
         Returns:
             List of webhook configurations
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/hooks",
+        async with http_client() as client:
+            response = await cached_get(
+                client, f"{self.BASE_URL}/repos/{owner}/{repo}/hooks",
                 headers=self.headers
             )
             
@@ -296,9 +298,9 @@ class GitHubAPI:
         Returns:
             Webhook configuration
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/hooks/{hook_id}",
+        async with http_client() as client:
+            response = await cached_get(
+                client, f"{self.BASE_URL}/repos/{owner}/{repo}/hooks/{hook_id}",
                 headers=self.headers
             )
             
@@ -396,7 +398,7 @@ class GitHubAPI:
             }
         }
         
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.post(
                 f"{self.BASE_URL}/repos/{owner}/{repo}/hooks",
                 headers=self.headers,
@@ -469,7 +471,7 @@ class GitHubAPI:
         if active is not None:
             payload["active"] = active
         
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.patch(
                 f"{self.BASE_URL}/repos/{owner}/{repo}/hooks/{hook_id}",
                 headers=self.headers,
@@ -502,7 +504,7 @@ class GitHubAPI:
         Returns:
             True if deletion was successful
         """
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.delete(
                 f"{self.BASE_URL}/repos/{owner}/{repo}/hooks/{hook_id}",
                 headers=self.headers
@@ -535,7 +537,7 @@ class GitHubAPI:
         Returns:
             True if ping was sent successfully
         """
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.post(
                 f"{self.BASE_URL}/repos/{owner}/{repo}/hooks/{hook_id}/pings",
                 headers=self.headers
@@ -0,0 +1,181 @@
+"""
+GitHub Conditional Request Cache for ETTA-X
+ETag / Last-Modified revalidation for GitHub REST reads.
+
+GitHub answers a conditional GET (If-None-Match / If-Modified-Since) with
+304 Not Modified when nothing changed, and 304 responses do not count
+against the rate limit. Every GET made through cached_get() stores the
+validators and body of 200 responses per (token, URL, Accept), sends them
+back on the next request for the same key, and serves the stored body when
+GitHub answers 304.
+
+Responses are always revalidated, so the cache never serves stale data;
+it only saves bandwidth, parsing and rate-limit budget. Memory is bounded
+by an LRU over entry count and total body bytes.
+
+Configuration (environment variables):
+- GITHUB_CACHE_MAX_ENTRIES: maximum cached responses (default 1000)
+- GITHUB_CACHE_MAX_BYTES: maximum total cached body size (default 32 MB)
+
+Author: ETTA-X
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+from backend.api.github_rate_limit import token_fingerprint
+from backend.api.metrics import REGISTRY
+
+
+# Headers that describe the transfer, not the cached (already decoded) body
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+@dataclass
+class CachedResponse:
+    """A stored 200 response and its validators"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    content: bytes
+
+
+class ConditionalRequestCache:
+    """LRU cache of validator-bearing GitHub responses"""
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries or int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", 1000))
+        self.max_bytes = max_bytes or int(os.getenv("GITHUB_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.not_modified = 0   # 304s served from cache
+        self.modified = 0       # 200s for a key that had a cached entry
+        self.misses = 0         # requests with nothing cached
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(url: str, headers: Dict[str, str]) -> Tuple[str, str, str]:
+        """Key responses by token (hashed), full URL and Accept header"""
+        return token_fingerprint(headers.get("Authorization")), url, headers.get("Accept", "")
+
+    def get(self, key) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, response: httpx.Response):
+        """Store a 200 response if it carries an ETag or Last-Modified"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+
+        entry = CachedResponse(
+            etag=etag,
+            last_modified=last_modified,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _TRANSFER_HEADERS},
+            content=content,
+        )
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.content)
+            self._entries[key] = entry
+            self._bytes += len(content)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.content)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "not_modified": self.not_modified,
+                "modified": self.modified,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+async def cached_get(client: httpx.AsyncClient, url: str, headers: Dict[str, str] = None,
+                     params: Dict[str, Any] = None, cache: ConditionalRequestCache = None,
+                     **kwargs) -> httpx.Response:
+    """
+    GET with conditional revalidation. On 304 the stored body is returned as
+    a normal 200 response, so callers need no changes.
+
+    Args:
+        client: HTTP client to send the request with
+        url: Request URL
+        headers: Request headers (Authorization and Accept are part of the key)
+        params: Query parameters
+        cache: Cache to use (defaults to the shared github_cache)
+        **kwargs: Passed through to client.get()
+    """
+    cache = cache or github_cache
+    headers = dict(headers or {})
+    full_url = str(httpx.URL(url, params=params)) if params else url
+    key = cache.make_key(full_url, headers)
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = await client.get(full_url, headers=headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        cache.not_modified += 1
+        # Keep fresh rate-limit headers from the 304 on top of the stored ones
+        merged = {**entry.headers, **{
+            k: v for k, v in response.headers.items() if k.lower() not in _TRANSFER_HEADERS
+        }}
+        return httpx.Response(200, headers=merged, content=entry.content, request=response.request)
+
+    if entry is not None:
+        cache.modified += 1
+    else:
+        cache.misses += 1
+
+    if response.status_code == 200:
+        cache.put(key, response)
+
+    return response
+
+
+# Shared cache used by GitHubAPI and the app.py GitHub lookups
+github_cache = ConditionalRequestCache()
+
+REGISTRY.register_callback(
+    "etta_github_cache_requests_total", "GitHub GETs by conditional cache outcome", "counter",
+    lambda: {
+        ("not_modified",): github_cache.not_modified,
+        ("modified",): github_cache.modified,
+        ("miss",): github_cache.misses,
+    },
+    ("result",)
+)
+REGISTRY.register_callback(
+    "etta_github_cache_bytes", "Body bytes held by the GitHub conditional cache", "gauge",
+    lambda: github_cache.stats()["bytes"]
+)
@@ -0,0 +1,333 @@
+"""
+GitHub Rate Limit Scheduler for ETTA-X
+Budget-aware pacing of every GitHub API request made with the shared client.
+
+The scheduler sits in the transport of the shared HTTP client, so it sees
+all requests (GitHubAPI methods and app.py handlers alike). Per token
+(identified by a hash of the Authorization header) it tracks the budget
+reported in X-RateLimit-Limit / -Remaining / -Reset and:
+
+- lets interactive requests through as long as any budget is left
+- keeps a reserve of the budget for interactive requests and spreads
+  background requests (e.g. /api/sync/commits) evenly over the remaining
+  window, so a bulk sync cannot starve the UI
+- backs off on primary exhaustion (until the reset time) and on secondary
+  rate limits (Retry-After, or exponential starting at one minute), and
+  retries idempotent requests after the backoff
+
+Background code marks its requests with:
+    with background_requests():
+        await api.get_user_repos()
+
+Configuration (environment variables):
+- GITHUB_INTERACTIVE_RESERVE: fraction of the budget held back from
+  background requests (default 0.2)
+- GITHUB_MAX_WAIT_INTERACTIVE / GITHUB_MAX_WAIT_BACKGROUND: longest wait in
+  seconds before a request fails with GitHubRateLimitError (default 10 / 300),
+  which the app answers with 429 and Retry-After
+- GITHUB_RATE_LIMIT_RETRIES: retries of GET/HEAD after a backoff (default 2)
+
+Author: ETTA-X
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict
+
+import httpx
+
+from backend.api.metrics import REGISTRY
+
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+SECONDARY_BACKOFF_BASE = 60.0
+SECONDARY_BACKOFF_MAX = 900.0
+# Longest single sleep, so waiters notice budget updates from other requests
+MAX_SLEEP_STEP = 5.0
+# Budgets of tokens idle this long, past their reset and backoff, are forgotten
+BUDGET_IDLE_TTL = 3600.0
+MAX_TRACKED_TOKENS = 1024
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("github_request_priority", default=INTERACTIVE)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class GitHubRateLimitError(Exception):
+    """Raised when a request would have to wait longer than allowed for budget"""
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@contextmanager
+def background_requests():
+    """Mark GitHub requests made inside this block as background traffic"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def token_fingerprint(authorization: Optional[str]) -> str:
+    """Stable, non-reversible identifier for a token's Authorization header"""
+    if not authorization:
+        return ""
+    return hashlib.sha256(authorization.encode()).hexdigest()[:16]
+
+
+def _header_int(headers: httpx.Headers, name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass
+class TokenBudget:
+    """Rate limit state of one token"""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+    backoff_until: float = 0.0
+    next_background_at: float = 0.0
+    secondary_hits: int = 0
+    in_flight: int = 0
+    last_used: float = 0.0
+
+
+class GitHubRateLimiter:
+    """Per-token budget tracking and request pacing"""
+
+    def __init__(self, interactive_reserve: float = None, max_wait: Dict[str, float] = None,
+                 max_retries: int = None):
+        self.interactive_reserve = (
+            interactive_reserve if interactive_reserve is not None
+            else _env_float("GITHUB_INTERACTIVE_RESERVE", 0.2)
+        )
+        self.max_wait = max_wait or {
+            INTERACTIVE: _env_float("GITHUB_MAX_WAIT_INTERACTIVE", 10.0),
+            BACKGROUND: _env_float("GITHUB_MAX_WAIT_BACKGROUND", 300.0),
+        }
+        self.max_retries = max_retries if max_retries is not None else int(_env_float("GITHUB_RATE_LIMIT_RETRIES", 2))
+        self.budgets: Dict[str, TokenBudget] = {}
+        self.waits = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.waited_seconds = {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+        self.backoffs = {"primary": 0, "secondary": 0}
+
+    def _budget(self, token_id: str) -> TokenBudget:
+        now = time.time()
+        budget = self.budgets.get(token_id)
+        if budget is None:
+            self._prune(now)
+            budget = self.budgets[token_id] = TokenBudget()
+        budget.last_used = now
+        return budget
+
+    def _prune(self, now: float):
+        """Forget expired budgets, then the least recently used idle ones beyond MAX_TRACKED_TOKENS"""
+        idle = sorted(
+            (budget.last_used, token_id) for token_id, budget in self.budgets.items() if budget.in_flight == 0
+        )
+        for last_used, token_id in idle:
+            budget = self.budgets[token_id]
+            expired = (now - last_used >= BUDGET_IDLE_TTL
+                       and now >= budget.reset_at and now >= budget.backoff_until)
+            if expired or len(self.budgets) >= MAX_TRACKED_TOKENS:
+                del self.budgets[token_id]
+
+    def _delay(self, budget: TokenBudget, priority: str, now: float) -> float:
+        """Seconds this request has to wait before it may be sent"""
+        if now < budget.backoff_until:
+            return budget.backoff_until - now
+        if budget.remaining is None or now >= budget.reset_at:
+            return 0.0  # Budget unknown yet, or the window has been reset
+
+        window = budget.reset_at - now
+        available = budget.remaining - budget.in_flight
+        if priority == INTERACTIVE:
+            return 0.0 if available > 0 else window
+
+        reserve = (budget.limit or budget.remaining) * self.interactive_reserve
+        if available - reserve <= 0:
+            return window
+        return max(0.0, budget.next_background_at - now)
+
+    async def acquire(self, token_id: str, priority: str = INTERACTIVE):
+        """Wait until the token's budget allows another request"""
+        budget = self._budget(token_id)
+        started = time.time()
+        counted = False
+        while True:
+            now = time.time()
+            delay = self._delay(budget, priority, now)
+            if delay <= 0:
+                break
+            if now - started + delay > self.max_wait[priority]:
+                raise GitHubRateLimitError(
+                    f"GitHub rate limit: {priority} request would wait {delay:.0f}s", retry_after=delay
+                )
+            if not counted:
+                self.waits[priority] += 1
+                counted = True
+            await asyncio.sleep(min(delay, MAX_SLEEP_STEP))
+
+        if counted:
+            self.waited_seconds[priority] += time.time() - started
+
+        if priority == BACKGROUND and budget.remaining is not None and budget.reset_at > now:
+            # Spread what is left above the reserve evenly over the window
+            reserve = (budget.limit or budget.remaining) * self.interactive_reserve
+            spendable = max(1.0, budget.remaining - budget.in_flight - reserve)
+            budget.next_background_at = now + (budget.reset_at - now) / spendable
+        budget.in_flight += 1
+
+    async def release(self, token_id: str, response: Optional[httpx.Response]) -> Optional[float]:
+        """
+        Record a finished request and update the token budget from its headers.
+
+        Returns:
+            Backoff in seconds if the response was rate limited, else None
+        """
+        budget = self._budget(token_id)
+        budget.in_flight = max(0, budget.in_flight - 1)
+        if response is None:
+            return None
+
+        headers = response.headers
+        now = time.time()
+        limit = _header_int(headers, "X-RateLimit-Limit")
+        remaining = _header_int(headers, "X-RateLimit-Remaining")
+        reset = _header_int(headers, "X-RateLimit-Reset")
+        if limit is not None:
+            budget.limit = limit
+        if remaining is not None:
+            budget.remaining = remaining
+        if reset is not None:
+            budget.reset_at = float(reset)
+
+        if response.status_code not in (403, 429):
+            if response.status_code < 400:
+                budget.secondary_hits = 0
+            return None
+
+        retry_after = _header_int(headers, "Retry-After")
+        if remaining == 0 and retry_after is None:
+            # Primary limit exhausted: wait for the window to reset
+            backoff = max(1.0, budget.reset_at - now)
+            self.backoffs["primary"] += 1
+        else:
+            if retry_after is None:
+                await response.aread()
+                if b"rate limit" not in response.content.lower():
+                    return None  # Plain permission error
+            budget.secondary_hits += 1
+            backoff = float(retry_after) if retry_after is not None else min(
+                SECONDARY_BACKOFF_MAX, SECONDARY_BACKOFF_BASE * 2 ** (budget.secondary_hits - 1)
+            )
+            self.backoffs["secondary"] += 1
+
+        budget.backoff_until = max(budget.backoff_until, now + backoff)
+        print(f"[GitHub] Rate limited (status {response.status_code}), backing off {backoff:.0f}s")
+        return backoff
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        return {
+            token_id: {
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "reset_in_seconds": max(0.0, budget.reset_at - now) if budget.reset_at else None,
+                "backoff_seconds": max(0.0, budget.backoff_until - now),
+                "in_flight": budget.in_flight,
+            }
+            for token_id, budget in self.budgets.items()
+        }
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that routes authenticated requests through the limiter"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: GitHubRateLimiter):
+        self._transport = transport
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        token_id = token_fingerprint(request.headers.get("Authorization"))
+        if not token_id:
+            return await self._transport.handle_async_request(request)
+
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            await self._limiter.acquire(token_id, priority)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except BaseException:
+                await self._limiter.release(token_id, None)
+                raise
+
+            backoff = await self._limiter.release(token_id, response)
+            if (backoff is None or attempt >= self._limiter.max_retries
+                    or request.method not in ("GET", "HEAD")
+                    or backoff > self._limiter.max_wait[priority]):
+                return response
+
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# Shared limiter used by the shared HTTP client
+github_rate_limiter = GitHubRateLimiter()
+
+
+def _per_token(field: str):
+    def collect():
+        return {
+            (token_id[:8],): state[field]
+            for token_id, state in github_rate_limiter.snapshot().items()
+            if state[field] is not None
+        }
+    return collect
+
+
+REGISTRY.register_callback(
+    "etta_github_rate_limit_remaining", "Remaining GitHub API budget per token", "gauge",
+    _per_token("remaining"), ("token",)
+)
+REGISTRY.register_callback(
+    "etta_github_rate_limit_limit", "GitHub API budget per window per token", "gauge",
+    _per_token("limit"), ("token",)
+)
+REGISTRY.register_callback(
+    "etta_github_rate_limit_reset_seconds", "Seconds until the token's budget resets", "gauge",
+    _per_token("reset_in_seconds"), ("token",)
+)
+REGISTRY.register_callback(
+    "etta_github_rate_limit_waits_total", "GitHub requests delayed for budget by priority", "counter",
+    lambda: {(p,): n for p, n in github_rate_limiter.waits.items()}, ("priority",)
+)
+REGISTRY.register_callback(
+    "etta_github_rate_limit_wait_seconds_total", "Time GitHub requests spent waiting for budget", "counter",
+    lambda: {(p,): s for p, s in github_rate_limiter.waited_seconds.items()}, ("priority",)
+)
+REGISTRY.register_callback(
+    "etta_github_rate_limit_backoffs_total", "Rate limit backoffs by kind", "counter",
+    lambda: {(k,): n for k, n in github_rate_limiter.backoffs.items()}, ("kind",)
+)
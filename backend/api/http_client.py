@@ -0,0 +1,88 @@
+"""
+Shared HTTP client for ETTA-X
+One application-scoped httpx.AsyncClient for all GitHub API and OAuth calls.
+
+Opening a fresh AsyncClient per call pays a new TCP + TLS handshake to
+api.github.com every time. The shared client keeps connections alive in a
+pool, negotiates HTTP/2 when the optional `h2` package is installed, and
+is closed from the application shutdown hook. Authenticated requests
+pass through the rate limit scheduler (see github_rate_limit).
+
+Usage:
+    async with http_client() as client:
+        response = await client.get(url, headers=headers)
+
+Configuration (environment variables):
+- HTTP_MAX_CONNECTIONS: total pooled connections (default 50)
+- HTTP_MAX_KEEPALIVE: idle keep-alive connections kept open (default 20)
+- HTTP_KEEPALIVE_EXPIRY: seconds an idle connection is kept (default 60)
+- HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT: timeouts in seconds (default 5 / 30)
+- HTTP2_ENABLED: set to "false" to force HTTP/1.1
+
+Author: ETTA-X
+"""
+
+import importlib.util
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+
+from backend.api.github_rate_limit import RateLimitedTransport, github_rate_limiter
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() != "false" and HTTP2_AVAILABLE
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(_env_number("HTTP_MAX_CONNECTIONS", 50)),
+    max_keepalive_connections=int(_env_number("HTTP_MAX_KEEPALIVE", 20)),
+    keepalive_expiry=_env_number("HTTP_KEEPALIVE_EXPIRY", 60.0),
+)
+
+HTTP_TIMEOUT = httpx.Timeout(
+    connect=_env_number("HTTP_CONNECT_TIMEOUT", 5.0),
+    read=_env_number("HTTP_READ_TIMEOUT", 30.0),
+    write=30.0,
+    pool=10.0,
+)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        transport = httpx.AsyncHTTPTransport(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
+        _client = httpx.AsyncClient(
+            transport=RateLimitedTransport(transport, github_rate_limiter),
+            timeout=HTTP_TIMEOUT,
+            headers={"User-Agent": "ETTA-X"},
+        )
+    return _client
+
+
+@asynccontextmanager
+async def http_client():
+    """
+    Drop-in replacement for `async with httpx.AsyncClient() as client`
+    that yields the shared pooled client and leaves it open afterwards.
+    """
+    yield get_http_client()
+
+
+async def close_http_client():
+    """Close the shared client (called on application shutdown)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,169 @@
+"""
+Token Identity Cache for ETTA-X
+Maps a GitHub access token to the user it belongs to without a round trip.
+
+Most handlers only need to know *who* the cookie token belongs to (GitHub
+id, login and the local user id), yet each of them used to call
+GET https://api.github.com/user for that, adding a network round trip to
+every page load. Identities are now cached per token:
+
+- filled at login (OAuth callback and /auth/set-token), where /user is
+  fetched anyway, and on the first miss for a token
+- keyed by a hash of the token, never the token itself
+- expired after IDENTITY_CACHE_TTL seconds, so a token revoked on GitHub
+  is noticed within that window
+- invalidated explicitly on logout and whenever GitHub rejects the token
+
+Configuration (environment variables):
+- IDENTITY_CACHE_TTL: seconds an identity is trusted (default 300)
+- IDENTITY_CACHE_MAX_ENTRIES: maximum cached tokens (default 1000)
+
+Author: ETTA-X
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Dict, Any
+
+from backend.api.github_cache import cached_get
+from backend.api.github_rate_limit import token_fingerprint
+from backend.api.http_client import http_client
+from backend.api.metrics import REGISTRY
+from backend.app.database import get_user_by_github_id
+
+
+GITHUB_USER_URL = "https://api.github.com/user"
+
+
+@dataclass
+class TokenIdentity:
+    """The GitHub account behind a token and its local user id"""
+    github_id: int
+    login: str
+    user_id: Optional[int]
+    expires_at: float
+
+
+def _key(token: str) -> str:
+    return token_fingerprint(f"Bearer {token}")
+
+
+class IdentityCache:
+    """Bounded TTL cache of token -> identity"""
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("IDENTITY_CACHE_TTL", 300))
+        self.max_entries = max_entries or int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 1000))
+        self._entries: "OrderedDict[str, TokenIdentity]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[TokenIdentity]:
+        key = _key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, github_id: int, login: str, user_id: Optional[int] = None) -> TokenIdentity:
+        entry = TokenIdentity(
+            github_id=github_id,
+            login=login,
+            user_id=user_id,
+            expires_at=time.time() + self.ttl,
+        )
+        key = _key(token)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, token: str):
+        with self._lock:
+            if self._entries.pop(_key(token), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+def remember_identity(token: str, github_data: Dict[str, Any], user_id: Optional[int] = None) -> TokenIdentity:
+    """Cache the identity from a /user payload fetched elsewhere (e.g. at login)"""
+    if user_id is None:
+        user = get_user_by_github_id(github_data.get('id'))
+        user_id = user['id'] if user else None
+    return identity_cache.put(token, github_data.get('id'), github_data.get('login'), user_id)
+
+
+def forget_identity(token: Optional[str]):
+    """Drop a token's identity (logout, or GitHub rejected the token)"""
+    if token:
+        identity_cache.invalidate(token)
+
+
+async def resolve_identity(token: str) -> Optional[TokenIdentity]:
+    """
+    Get the identity behind a token, asking GitHub only on a cache miss.
+
+    Returns:
+        TokenIdentity, or None if GitHub does not accept the token
+    """
+    identity = identity_cache.get(token)
+    if identity is not None:
+        if identity.user_id is None:
+            # Cached before setup created the local user: pick it up once it exists
+            user = get_user_by_github_id(identity.github_id)
+            if user:
+                identity.user_id = user['id']
+        return identity
+
+    async with http_client() as client:
+        response = await cached_get(
+            client, GITHUB_USER_URL,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github.v3+json",
+            },
+        )
+
+    if response.status_code != 200:
+        return None
+
+    return remember_identity(token, response.json())
+
+
+# Shared cache used by the app.py handlers
+identity_cache = IdentityCache()
+
+REGISTRY.register_callback(
+    "etta_identity_cache_requests_total", "Token identity lookups by result", "counter",
+    lambda: {("hit",): identity_cache.hits, ("miss",): identity_cache.misses},
+    ("result",)
+)
+REGISTRY.register_callback(
+    "etta_identity_cache_entries", "Tokens with a cached identity", "gauge",
+    lambda: identity_cache.stats()["entries"]
+)
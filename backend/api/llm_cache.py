@@ -0,0 +1,139 @@
+"""
+LLM Result Cache for ETTA-X
+Avoids calling the LLM again for a prompt it has already answered.
+
+Test generation sees the same code description over and over: an event is
+re-processed, /api/tests/generate is called again with the same text, or
+the same set of files is pushed to two branches. A generation costs tens
+of seconds, while parsing a stored response takes milliseconds.
+
+Raw model responses are persisted in the `llm_cache` table, keyed by a
+SHA-256 of:
+- model name
+- prompt template version (PROMPT_TEMPLATE_VERSION in the LLM config)
+- prompt with whitespace normalized
+- generation options (max tokens, temperature, test limit, ...)
+
+The table is an LRU bounded by LLM_CACHE_MAX_ENTRIES. Entries older than
+LLM_CACHE_TTL seconds are not served and are purged on the next store.
+Callers can bypass the lookup (use_cache=False); the fresh response
+still replaces the stored one.
+
+Configuration (environment variables):
+- LLM_CACHE_ENABLED: set to "false" to disable the cache (default true)
+- LLM_CACHE_MAX_ENTRIES: stored responses kept (default 1000)
+- LLM_CACHE_TTL: maximum age of a served response in seconds (default 30 days)
+
+Author: ETTA-X
+"""
+
+import hashlib
+import json
+import os
+from threading import Lock
+from typing import Optional, Dict, Any
+
+from backend.api.metrics import REGISTRY
+from backend.app.database import (
+    get_llm_cache_entry, store_llm_cache_entry, clear_llm_cache, get_llm_cache_summary
+)
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry"""
+    return " ".join(prompt.split())
+
+
+class LLMResultCache:
+    """Persistent prompt -> response cache with in-process hit/miss counters"""
+
+    def __init__(self, enabled: bool = LLM_CACHE_ENABLED, max_entries: int = None, ttl: int = None):
+        self.enabled = enabled
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+        self.ttl = ttl or int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def key(model: str, template_version: str, prompt: str, options: Dict[str, Any]) -> str:
+        """Build the cache key for a generation request"""
+        material = json.dumps({
+            "model": model,
+            "template_version": template_version,
+            "prompt": normalize_prompt(prompt),
+            "options": options,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, key: str, use_cache: bool = True) -> Optional[str]:
+        """Get the stored response for a key; None on a miss or bypass"""
+        if not self.enabled:
+            return None
+        if not use_cache:
+            self._count('bypassed')
+            return None
+        try:
+            entry = get_llm_cache_entry(key, self.ttl)
+        except Exception as e:  # e.g. LLM package used without an initialized database
+            print(f"[LLMCache] Lookup failed: {e}")
+            entry = None
+        if entry is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return entry['response']
+
+    def store(self, key: str, model: str, template_version: str, response: str) -> bool:
+        """Persist a response (empty responses are never cached)"""
+        if not self.enabled or not response:
+            return False
+        try:
+            return store_llm_cache_entry(
+                key, model, template_version, response,
+                max_entries=self.max_entries, max_age_seconds=self.ttl
+            )
+        except Exception as e:
+            print(f"[LLMCache] Store failed: {e}")
+            return False
+
+    def clear(self) -> int:
+        return clear_llm_cache()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and persistent cache size"""
+        with self._lock:
+            hits, misses, bypassed = self.hits, self.misses, self.bypassed
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "bypassed": bypassed,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            **get_llm_cache_summary()
+        }
+
+
+# Shared cache instance used by the test generator
+llm_cache = LLMResultCache()
+
+REGISTRY.register_callback(
+    "etta_llm_cache_lookups_total", "LLM result cache lookups by result", "counter",
+    lambda: {
+        ("hit",): llm_cache.hits,
+        ("miss",): llm_cache.misses,
+        ("bypass",): llm_cache.bypassed,
+    },
+    ("result",)
+)
@@ -0,0 +1,354 @@
+"""
+Metrics for ETTA-X
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format (no external service or client library required).
+
+Metric families:
+- etta_http_*: request counts and latency histograms by route
+- etta_webhook_*: webhook ingest counts by event type
+- etta_pipeline_*: queue depth, stage concurrency and stage durations
+- etta_db_*: SQLite query counts and times (from get_db_connection)
+- etta_git_*: git subprocess counts and times
+- etta_llm_*: LLM generations, tokens and throughput
+- etta_*_cache_*: cache hit/miss counters
+
+Modules either record into the metric objects defined here or register a
+callback that is evaluated at scrape time (for values they already track).
+
+Author: ETTA-X
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Optional, Dict, Any, List, Tuple, Callable, Union
+
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations with sum and count"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket, then sum and count
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += series[i]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Metric whose values are read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.metric_type = metric_type
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"[Metrics] Callback for {self.name} failed: {e}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering a name (e.g. module reload) replaces the old metric
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(self, name: str, documentation: str, metric_type: str,
+                          callback: Callable, labelnames: Tuple[str, ...] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, metric_type, callback, labelnames))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
+
+
+# ==================== HTTP ====================
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "etta_http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "etta_http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route")
+)
+
+# ==================== WEBHOOKS / PIPELINE ====================
+
+WEBHOOK_EVENTS = REGISTRY.counter(
+    "etta_webhook_events_received_total", "Webhook deliveries received by event type",
+    ("event_type",)
+)
+PIPELINE_STAGE_DURATION = REGISTRY.histogram(
+    "etta_pipeline_stage_duration_seconds", "Webhook pipeline stage durations",
+    ("stage", "status")
+)
+
+# ==================== DATABASE ====================
+
+DB_QUERIES = REGISTRY.counter(
+    "etta_db_queries_total", "SQLite statements executed by operation",
+    ("operation",)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "etta_db_query_duration_seconds", "SQLite statement execution time by operation",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+# ==================== GIT ====================
+
+GIT_COMMANDS = REGISTRY.counter(
+    "etta_git_commands_total", "git subprocesses run by subcommand and outcome",
+    ("command", "status")
+)
+GIT_COMMAND_DURATION = REGISTRY.histogram(
+    "etta_git_command_duration_seconds", "git subprocess duration by subcommand",
+    ("command",)
+)
+
+# ==================== LLM ====================
+
+LLM_GENERATIONS = REGISTRY.counter(
+    "etta_llm_generations_total", "LLM generation requests by outcome",
+    ("model", "status")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "etta_llm_tokens_total", "LLM tokens processed by kind (prompt/generated)",
+    ("model", "kind")
+)
+LLM_GENERATION_DURATION = REGISTRY.histogram(
+    "etta_llm_generation_duration_seconds", "LLM generation wall time",
+    ("model",)
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "etta_llm_tokens_per_second", "LLM generation throughput (generated tokens per second)",
+    ("model",),
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+)
+LLM_FIRST_REQUEST_AFTER_IDLE = REGISTRY.histogram(
+    "etta_llm_first_request_after_idle_seconds",
+    "Time to the first token of LLM requests after the backend sat idle (cold starts show here)",
+    ("model",)
+)
+LLM_MODEL_LOAD_DURATION = REGISTRY.histogram(
+    "etta_llm_model_load_seconds", "Model load time reported by Ollama per generation",
+    ("model",)
+)
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "etta_llm_queue_wait_seconds", "Time pipeline LLM requests waited for admission",
+    ("risk_level", "outcome")
+)
+
+
+def sql_operation(sql: str) -> str:
+    """Classify a SQL statement by its leading keyword (SELECT, INSERT, ...)"""
+    head = sql.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+@contextmanager
+def track_git(command: str):
+    """
+    Count and time a git subprocess. Exceptions (e.g. timeouts) and nonzero
+    exit codes count as errors; pass the result through the yielded
+    function so its return code is seen:
+
+        with track_git("diff") as tracked:
+            result = tracked(subprocess.run(['git', 'diff', ...]))
+    """
+    start = time.perf_counter()
+    returncodes = []
+
+    def tracked(result):
+        returncodes.append(result.returncode)
+        return result
+
+    status = "error"
+    try:
+        yield tracked
+        status = "ok" if not any(returncodes) else "error"
+    finally:
+        GIT_COMMANDS.inc(command=command, status=status)
+        GIT_COMMAND_DURATION.observe(time.perf_counter() - start, command=command)
+
+
+def observe_llm_generation(model: str, status: str, duration_seconds: float,
+                           result: Optional[Dict[str, Any]] = None):
+    """Record one LLM generation from an Ollama-style response body"""
+    LLM_GENERATIONS.inc(model=model, status=status)
+    LLM_GENERATION_DURATION.observe(duration_seconds, model=model)
+    if not result:
+        return
+    load_seconds = (result.get("load_duration", 0) or 0) / 1e9
+    if load_seconds:
+        LLM_MODEL_LOAD_DURATION.observe(load_seconds, model=model)
+    prompt_tokens = result.get("prompt_eval_count", 0) or 0
+    eval_tokens = result.get("eval_count", 0) or 0
+    eval_seconds = (result.get("eval_duration", 0) or 0) / 1e9
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if eval_tokens:
+        LLM_TOKENS.inc(eval_tokens, model=model, kind="generated")
+        if eval_seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe(eval_tokens / eval_seconds, model=model)
@@ -0,0 +1,179 @@
+"""
+Pipeline Event Stream for ETTA-X
+In-process pub/sub that pushes pipeline progress to the browser over
+Server-Sent Events, replacing the frontend's polling loops.
+
+Published event types:
+- event_created: a webhook (or commit sync) stored a new push event
+- stage_progress: a pipeline stage started or finished (from PipelineTrace)
+- test_generated: the LLM produced one more test (streamed while generating)
+- event_completed: an event was processed (status "completed" or "failed")
+
+Subscribers are the open /api/pipeline/events/stream responses. Each has
+a bounded queue (the oldest message is dropped when a slow client falls
+behind) and an optional repository filter. The last EVENT_STREAM_REPLAY
+messages are kept so a reconnecting EventSource (Last-Event-ID header)
+receives what it missed. An idle stream only sends a keep-alive comment
+every EVENT_STREAM_HEARTBEAT seconds and never touches the database.
+
+Publishing is safe from worker threads (e.g. scoring in asyncio.to_thread).
+
+Configuration (environment variables):
+- EVENT_STREAM_HEARTBEAT: seconds between keep-alive comments (default 15)
+- EVENT_STREAM_QUEUE_SIZE: messages buffered per subscriber (default 256)
+- EVENT_STREAM_REPLAY: messages kept for reconnecting clients (default 100)
+
+Author: ETTA-X
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, AsyncIterator, Callable
+
+from backend.api.metrics import REGISTRY
+
+
+EVENT_CREATED = "event_created"
+STAGE_PROGRESS = "stage_progress"
+TEST_GENERATED = "test_generated"
+EVENT_COMPLETED = "event_completed"
+
+# Put on a subscriber queue to end its stream (application shutdown)
+_CLOSE = object()
+
+
+@dataclass
+class StreamMessage:
+    """One published notification"""
+    id: int
+    type: str
+    repository: Optional[str]
+    data: Dict[str, Any]
+
+    def encode(self) -> str:
+        """Format as a Server-Sent Events frame"""
+        payload = json.dumps({"type": self.type, "repository": self.repository, **self.data})
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A connected stream client"""
+    repository: Optional[str]
+    queue: asyncio.Queue
+    dropped: int = 0
+    connected_at: float = field(default_factory=time.time)
+
+    def wants(self, message: StreamMessage) -> bool:
+        return self.repository is None or self.repository == message.repository
+
+
+class PipelineEventBroker:
+    """Fan-out of pipeline notifications to stream subscribers"""
+
+    def __init__(self, heartbeat: float = None, queue_size: int = None, replay: int = None):
+        self.heartbeat = heartbeat or float(os.getenv("EVENT_STREAM_HEARTBEAT", 15))
+        self.queue_size = queue_size or int(os.getenv("EVENT_STREAM_QUEUE_SIZE", 256))
+        self._history: deque = deque(maxlen=replay or int(os.getenv("EVENT_STREAM_REPLAY", 100)))
+        self._subscribers: set = set()
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published: Dict[str, int] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, repository: Optional[str] = None, /, **data):
+        """Publish a notification; callable from the event loop or any thread"""
+        if self._loop is None:
+            return  # Nobody has ever subscribed: nothing to deliver or replay
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(event_type, repository, data)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, event_type, repository, data)
+
+    def _deliver(self, event_type: str, repository: Optional[str], data: Dict[str, Any]):
+        message = StreamMessage(next(self._ids), event_type, repository, data)
+        self._history.append(message)
+        self.published[event_type] = self.published.get(event_type, 0) + 1
+        for subscription in list(self._subscribers):
+            if subscription.wants(message):
+                self._enqueue(subscription, message)
+
+    @staticmethod
+    def _enqueue(subscription: Subscription, message):
+        if subscription.queue.full():
+            # Slow client: drop its oldest message rather than block the pipeline
+            subscription.queue.get_nowait()
+            subscription.dropped += 1
+        subscription.queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, repository: Optional[str] = None, last_event_id: Optional[int] = None):
+        """Register a subscriber, replaying messages after last_event_id"""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(repository=repository, queue=asyncio.Queue(self.queue_size))
+        if last_event_id is not None:
+            for message in self._history:
+                if message.id > last_event_id and subscription.wants(message):
+                    self._enqueue(subscription, message)
+        self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers.discard(subscription)
+
+    async def stream(self, repository: Optional[str] = None,
+                     last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Server-Sent Events body for one client"""
+        async with self.subscribe(repository, last_event_id) as subscription:
+            # Tell EventSource to wait 3s before reconnecting after a drop
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is _CLOSE:
+                    return
+                yield message.encode()
+
+    def close(self):
+        """End all open streams (application shutdown)"""
+        for subscription in list(self._subscribers):
+            self._enqueue(subscription, _CLOSE)
+
+    def trace_listener(self, event_id: int, repository: str) -> Callable:
+        """PipelineTrace listener that publishes stage_progress for each span"""
+        def on_span(phase: str, span):
+            data = {"event_id": event_id, "stage": span.stage, "phase": phase}
+            if phase == "finished":
+                data["status"] = span.status
+                data["duration_ms"] = round(span.duration_ms, 2)
+            self.publish(STAGE_PROGRESS, repository, **data)
+        return on_span
+
+
+# Shared broker used by the pipeline, webhook receiver and commit sync
+pipeline_events = PipelineEventBroker()
+
+REGISTRY.register_callback(
+    "etta_event_stream_subscribers", "Open pipeline event streams", "gauge",
+    lambda: pipeline_events.subscriber_count
+)
+REGISTRY.register_callback(
+    "etta_event_stream_published_total", "Pipeline notifications published by type", "counter",
+    lambda: {(t,): n for t, n in pipeline_events.published.items()}, ("type",)
+)
@@ -0,0 +1,582 @@
+"""
+Pipeline Scheduler for ETTA-X
+Priority-ordered execution of webhook pipeline events.
+
+Every queued event gets a static priority key expressed in "virtual
+arrival seconds": the time it was enqueued, shifted by
+- a bonus for pushes to the repository's default branch (from `repositories`)
+- a penalty growing with the estimated cost (files in commits[].added/modified)
+- a fairness penalty per event of the same repository already queued or running
+
+Because every waiting event ages at the same rate, ordering by this key is
+equivalent to re-scoring by age on every dequeue, so a plain heap suffices.
+
+Each pipeline stage (git, ast, model, llm) additionally has its own
+concurrency cap, so e.g. only a couple of LLM generations run at a time
+while several cheaper diffs proceed in parallel. The llm cap defaults to
+the LLM client's LLM_MAX_CONCURRENCY.
+
+LLM generations wait in a bounded admission queue instead of piling up
+behind the cap. Admission is per generation: an event whose changes were
+split into several prompts queues one request per prompt (see
+llm_admission()), so the queue depth and waits cover every generation
+that would otherwise wait inside the LLM client. Waiters are admitted by
+risk level (high before medium before low), then in arrival order. When
+the queue is full, a new request displaces the lowest-ranked waiter if it
+outranks it, otherwise it is turned away. A request that has waited past
+its risk level's deadline gives up. Either way GenerationShed is raised;
+that prompt is skipped, and an event whose prompts were all shed falls
+back to the rule-based tests, so completion latency stays bounded when
+the model is saturated. Queue waits and shed requests are counted per
+risk level (snapshot() and /metrics).
+
+Configuration (environment variables):
+- PIPELINE_WORKERS: number of events processed concurrently (default 4)
+- PIPELINE_CONCURRENCY_GIT / _AST / _MODEL / _LLM: per-stage caps
+- PIPELINE_DEFAULT_BRANCH_BONUS: seconds of priority for default-branch pushes
+- PIPELINE_COST_WEIGHT: seconds of penalty per doubling of files changed
+- PIPELINE_FAIRNESS_PENALTY: seconds of penalty per pending event of the same repo
+- PIPELINE_LLM_QUEUE_DEPTH: LLM generations allowed to wait for a slot (default 32)
+- PIPELINE_LLM_DEADLINE_HIGH / _MEDIUM / _LOW: seconds a request of that risk
+  level may wait for a slot (default 120 / 30 / 0)
+
+Author: ETTA-X
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from backend.api.metrics import REGISTRY, LLM_QUEUE_WAIT
+from backend.app.database import get_repository_by_full_name
+
+
+STAGES = ("git", "ast", "model", "llm")
+
+DEFAULT_STAGE_LIMITS = {
+    "git": 2,
+    "ast": 2,
+    "model": 2,
+    "llm": int(os.getenv("LLM_MAX_CONCURRENCY", 2)),
+}
+
+
+# Admission order of LLM requests (lower first) and their default queue deadlines
+RISK_RANKS = {"high": 0, "medium": 1, "low": 2}
+
+DEFAULT_LLM_DEADLINES = {
+    "high": 120.0,
+    "medium": 30.0,
+    "low": 0.0,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+@dataclass(order=True)
+class ScheduledEvent:
+    """A pipeline event waiting in the priority queue"""
+    priority: float
+    sequence: int
+    event_id: int = field(compare=False)
+    repository: str = field(compare=False)
+    branch: Optional[str] = field(compare=False, default=None)
+    is_default_branch: bool = field(compare=False, default=False)
+    estimated_cost: int = field(compare=False, default=0)
+    enqueued_at: float = field(compare=False, default=0.0)
+    event_data: Dict[str, Any] = field(compare=False, default_factory=dict)
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "repository": self.repository,
+            "branch": self.branch,
+            "is_default_branch": self.is_default_branch,
+            "estimated_cost": self.estimated_cost,
+            "priority": round(self.priority - self.enqueued_at, 2),
+            "waiting_seconds": round(now - self.enqueued_at, 2),
+        }
+
+
+class GenerationShed(Exception):
+    """Raised when an LLM request is not admitted (queue full, displaced or past its deadline)"""
+    def __init__(self, reason: str, risk_level: str, waited: float = 0.0):
+        super().__init__(f"LLM request shed ({reason}, risk {risk_level}, waited {waited:.1f}s)")
+        self.reason = reason
+        self.risk_level = risk_level
+        self.waited = waited
+
+
+@dataclass(order=True)
+class _LLMWaiter:
+    """An LLM request waiting for admission"""
+    rank: int
+    sequence: int
+    risk_level: str = field(compare=False)
+    event_id: Optional[int] = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+
+
+class LLMAdmissionQueue:
+    """
+    Concurrency cap for LLM generations with a bounded, risk-ordered wait queue.
+
+    Slots are handed to the best-ranked waiter when a generation finishes,
+    so a slot is never free while requests wait.
+    """
+
+    def __init__(self, limit: int, max_depth: int, deadlines: Dict[str, float]):
+        self.limit = max(1, limit)
+        self.max_depth = max(0, max_depth)
+        self.deadlines = deadlines
+        self.in_flight = 0
+        self._waiters: List[_LLMWaiter] = []
+        self._sequence = itertools.count()
+        self.admitted: Dict[str, int] = {}
+        self.shed: Dict[tuple, int] = {}
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def deadline(self, risk_level: str) -> float:
+        return self.deadlines.get(risk_level, self.deadlines.get("medium", 0.0))
+
+    def _count_shed(self, reason: str, risk_level: str, waited: float):
+        self.shed[(risk_level, reason)] = self.shed.get((risk_level, reason), 0) + 1
+        LLM_QUEUE_WAIT.observe(waited, risk_level=risk_level, outcome="shed")
+
+    def _admit(self, risk_level: str, waited: float):
+        self.admitted[risk_level] = self.admitted.get(risk_level, 0) + 1
+        LLM_QUEUE_WAIT.observe(waited, risk_level=risk_level, outcome="admitted")
+
+    def _remove(self, waiter: _LLMWaiter):
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+
+    async def acquire(self, risk_level: str = "medium", event_id: Optional[int] = None) -> float:
+        """
+        Wait for a generation slot.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            GenerationShed: The queue is full, a higher-risk request took the
+                place, or the deadline for the risk level passed
+        """
+        risk_level = (risk_level or "medium").lower()
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._admit(risk_level, 0.0)
+            return 0.0
+
+        deadline = self.deadline(risk_level)
+        waiter = _LLMWaiter(
+            rank=RISK_RANKS.get(risk_level, RISK_RANKS["medium"]),
+            sequence=next(self._sequence),
+            risk_level=risk_level,
+            event_id=event_id,
+            enqueued_at=time.perf_counter(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        if deadline <= 0:
+            self._count_shed("deadline", risk_level, 0.0)
+            raise GenerationShed("deadline", risk_level)
+        if len(self._waiters) >= self.max_depth:
+            worst = max(self._waiters, default=None)
+            if worst is None or not waiter < worst:
+                self._count_shed("queue_full", risk_level, 0.0)
+                raise GenerationShed("queue_full", risk_level)
+            self._remove(worst)
+            worst.future.set_exception(GenerationShed(
+                "displaced", worst.risk_level, time.perf_counter() - worst.enqueued_at
+            ))
+        heapq.heappush(self._waiters, waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), deadline)
+        except asyncio.TimeoutError:
+            waited = time.perf_counter() - waiter.enqueued_at
+            if waiter.future.done() and not waiter.future.exception():
+                # Granted just as the deadline passed: keep the slot
+                self._admit(risk_level, waited)
+                return waited
+            if not waiter.future.done():
+                self._remove(waiter)
+                waiter.future.cancel()
+            self._count_shed("deadline", risk_level, waited)
+            raise GenerationShed("deadline", risk_level, waited)
+        except GenerationShed as e:
+            self._count_shed(e.reason, risk_level, e.waited)
+            raise
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and not waiter.future.exception():
+                self.release()  # Granted, but the caller is gone
+            elif not waiter.future.done():
+                self._remove(waiter)
+                waiter.future.cancel()
+            raise
+
+        waited = time.perf_counter() - waiter.enqueued_at
+        self._admit(risk_level, waited)
+        return waited
+
+    def release(self):
+        """Free a slot and hand it to the best-ranked waiter"""
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "deadlines": self.deadlines,
+            "waiting": [
+                {"event_id": w.event_id, "risk_level": w.risk_level,
+                 "waiting_seconds": round(now - w.enqueued_at, 2)}
+                for w in sorted(self._waiters)
+            ],
+            "admitted": dict(self.admitted),
+            "shed": [
+                {"risk_level": risk_level, "reason": reason, "count": count}
+                for (risk_level, reason), count in sorted(self.shed.items())
+            ],
+        }
+
+
+class LLMAdmission:
+    """
+    Per-generation LLM admission for one event.
+
+    slot() is passed to the test generator, which holds one slot per LLM
+    call, so a batch of prompts queues one request per prompt. Records the
+    longest wait and the shed prompts for the event's trace.
+    """
+
+    def __init__(self, scheduler: "PipelineScheduler", risk_level: str, event_id: Optional[int] = None):
+        self.scheduler = scheduler
+        self.risk_level = risk_level
+        self.event_id = event_id
+        self.admitted = 0
+        self.waited = 0.0
+        self.shed: List[GenerationShed] = []
+
+    @asynccontextmanager
+    async def slot(self):
+        async with AsyncExitStack() as stack:
+            try:
+                waited = await stack.enter_async_context(self.scheduler.llm_slot(self.risk_level, self.event_id))
+            except GenerationShed as e:
+                self.shed.append(e)
+                self.waited = max(self.waited, e.waited)
+                raise
+            self.admitted += 1
+            self.waited = max(self.waited, waited)
+            yield waited
+
+
+class PipelineScheduler:
+    """Priority queue + worker pool + per-stage concurrency caps"""
+
+    def __init__(
+        self,
+        workers: int = None,
+        stage_limits: Dict[str, int] = None,
+        default_branch_bonus: float = None,
+        cost_weight: float = None,
+        fairness_penalty: float = None,
+        llm_queue_depth: int = None,
+        llm_deadlines: Dict[str, float] = None
+    ):
+        self.workers = workers or _env_int("PIPELINE_WORKERS", 4)
+        self.stage_limits = {
+            stage: _env_int(f"PIPELINE_CONCURRENCY_{stage.upper()}", limit)
+            for stage, limit in DEFAULT_STAGE_LIMITS.items()
+        }
+        if stage_limits:
+            self.stage_limits.update(stage_limits)
+
+        self.default_branch_bonus = (
+            default_branch_bonus if default_branch_bonus is not None
+            else _env_float("PIPELINE_DEFAULT_BRANCH_BONUS", 120.0)
+        )
+        self.cost_weight = (
+            cost_weight if cost_weight is not None
+            else _env_float("PIPELINE_COST_WEIGHT", 15.0)
+        )
+        self.fairness_penalty = (
+            fairness_penalty if fairness_penalty is not None
+            else _env_float("PIPELINE_FAIRNESS_PENALTY", 30.0)
+        )
+        self.llm_queue = LLMAdmissionQueue(
+            self.stage_limits["llm"],
+            llm_queue_depth if llm_queue_depth is not None else _env_int("PIPELINE_LLM_QUEUE_DEPTH", 32),
+            llm_deadlines or {
+                risk_level: _env_float(f"PIPELINE_LLM_DEADLINE_{risk_level.upper()}", deadline)
+                for risk_level, deadline in DEFAULT_LLM_DEADLINES.items()
+            },
+        )
+
+        self._heap: List[ScheduledEvent] = []
+        self._sequence = itertools.count()
+        self._pending_per_repo: Dict[str, int] = {}
+        self._stage_in_flight: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self._running: Dict[int, ScheduledEvent] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._process_fn: Optional[Callable[[int, dict], Awaitable[None]]] = None
+        self.completed = 0
+        self.failed = 0
+
+    # ==================== PRIORITY ====================
+
+    @staticmethod
+    def estimate_cost(payload: Optional[Dict[str, Any]]) -> int:
+        """Estimate event cost as the number of distinct added/modified files"""
+        if not payload:
+            return 0
+        files = set()
+        for commit in payload.get("commits", []) or []:
+            files.update(commit.get("added", []) or [])
+            files.update(commit.get("modified", []) or [])
+        return len(files)
+
+    def compute_priority(self, enqueued_at: float, is_default_branch: bool,
+                         estimated_cost: int, pending_for_repo: int) -> float:
+        """Lower values are scheduled first"""
+        priority = enqueued_at
+        if is_default_branch:
+            priority -= self.default_branch_bonus
+        priority += self.cost_weight * math.log2(1 + estimated_cost)
+        priority += self.fairness_penalty * pending_for_repo
+        return priority
+
+    # ==================== QUEUE ====================
+
+    async def submit(self, event_id: int, event_data: Dict[str, Any],
+                     payload: Optional[Dict[str, Any]] = None,
+                     default_branch: Optional[str] = None) -> ScheduledEvent:
+        """
+        Queue a pipeline event.
+
+        Args:
+            event_id: Webhook event ID
+            event_data: Processing data passed to the pipeline function
+            payload: Raw push payload used for cost estimation
+            default_branch: Repository default branch (looked up if omitted)
+
+        Returns:
+            The scheduled queue entry
+        """
+        if self._condition is None:
+            raise RuntimeError("Pipeline scheduler is not started")
+
+        repository = event_data.get("repository_full_name") or ""
+        branch = event_data.get("branch")
+
+        if default_branch is None:
+            repo = get_repository_by_full_name(repository) if repository else None
+            default_branch = repo.get("default_branch") if repo else "main"
+
+        now = time.time()
+        cost = self.estimate_cost(payload)
+        is_default = bool(branch) and branch == default_branch
+
+        async with self._condition:
+            pending = self._pending_per_repo.get(repository, 0)
+            item = ScheduledEvent(
+                priority=self.compute_priority(now, is_default, cost, pending),
+                sequence=next(self._sequence),
+                event_id=event_id,
+                repository=repository,
+                branch=branch,
+                is_default_branch=is_default,
+                estimated_cost=cost,
+                enqueued_at=now,
+                event_data=event_data,
+            )
+            heapq.heappush(self._heap, item)
+            self._pending_per_repo[repository] = pending + 1
+            self._condition.notify()
+
+        return item
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._heap)
+
+    async def _next_event(self) -> ScheduledEvent:
+        async with self._condition:
+            while not self._heap:
+                await self._condition.wait()
+            return heapq.heappop(self._heap)
+
+    async def _worker(self):
+        while True:
+            item = await self._next_event()
+            self._running[item.event_id] = item
+            try:
+                await self._process_fn(item.event_id, item.event_data)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"[Scheduler] Event {item.event_id} failed: {e}")
+            finally:
+                self._running.pop(item.event_id, None)
+                remaining = self._pending_per_repo.get(item.repository, 1) - 1
+                if remaining > 0:
+                    self._pending_per_repo[item.repository] = remaining
+                else:
+                    self._pending_per_repo.pop(item.repository, None)
+
+    def start(self, process_fn: Callable[[int, dict], Awaitable[None]]):
+        """Start the worker pool (must be called from the running event loop)"""
+        if self._worker_tasks:
+            return
+        self._process_fn = process_fn
+        self._condition = asyncio.Condition()
+        # The llm stage is gated by self.llm_queue instead
+        self._semaphores = {
+            stage: asyncio.Semaphore(limit) for stage, limit in self.stage_limits.items() if stage != "llm"
+        }
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        print(f"[Scheduler] Started {self.workers} workers, stage limits: {self.stage_limits}")
+
+    async def stop(self):
+        """Cancel the worker pool; queued events stay unprocessed in the DB"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    # ==================== STAGES ====================
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Hold a concurrency slot for a pipeline stage"""
+        if name == "llm":
+            async with self.llm_slot():
+                yield
+            return
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            self._stage_in_flight[name] += 1
+            try:
+                yield
+            finally:
+                self._stage_in_flight[name] -= 1
+
+    @asynccontextmanager
+    async def llm_slot(self, risk_level: str = "medium", event_id: Optional[int] = None):
+        """
+        Hold an LLM generation slot, admitted by risk level.
+
+        Yields the seconds spent waiting; raises GenerationShed when the
+        request is not admitted.
+        """
+        waited = await self.llm_queue.acquire(risk_level, event_id)
+        self._stage_in_flight["llm"] += 1
+        try:
+            yield waited
+        finally:
+            self._stage_in_flight["llm"] -= 1
+            self.llm_queue.release()
+
+    def llm_admission(self, risk_level: str = "medium", event_id: Optional[int] = None) -> LLMAdmission:
+        """Admit each of an event's LLM generations separately (pass .slot as slot=)"""
+        return LLMAdmission(self, risk_level, event_id)
+
+    async def run_in_stage(self, name: str, fn: Callable, *args, **kwargs):
+        """Run a blocking function in a worker thread under a stage slot"""
+        async with self.stage(name):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    # ==================== STATUS ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time view of the queue and stage usage"""
+        now = time.time()
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": [item.to_dict(now) for item in self._running.values()],
+            "queued": [item.to_dict(now) for item in sorted(self._heap)],
+            "stages": {
+                stage: {
+                    "limit": self.stage_limits.get(stage),
+                    "in_flight": self._stage_in_flight.get(stage, 0),
+                }
+                for stage in STAGES
+            },
+            "llm_queue": self.llm_queue.snapshot(),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# Shared scheduler instance (started on application startup)
+pipeline_scheduler = PipelineScheduler()
+
+REGISTRY.register_callback(
+    "etta_pipeline_queue_depth", "Pipeline events waiting in the queue", "gauge",
+    lambda: pipeline_scheduler.queue_depth
+)
+REGISTRY.register_callback(
+    "etta_pipeline_running_events", "Pipeline events currently being processed", "gauge",
+    lambda: len(pipeline_scheduler._running)
+)
+REGISTRY.register_callback(
+    "etta_pipeline_stage_in_flight", "Pipeline stage slots in use", "gauge",
+    lambda: {(stage,): count for stage, count in pipeline_scheduler._stage_in_flight.items()},
+    ("stage",)
+)
+REGISTRY.register_callback(
+    "etta_pipeline_events_total", "Pipeline events finished by outcome", "counter",
+    lambda: {("completed",): pipeline_scheduler.completed, ("failed",): pipeline_scheduler.failed},
+    ("status",)
+)
+REGISTRY.register_callback(
+    "etta_llm_queue_depth", "Pipeline LLM requests waiting for admission", "gauge",
+    lambda: pipeline_scheduler.llm_queue.depth
+)
+REGISTRY.register_callback(
+    "etta_llm_requests_shed_total", "Pipeline LLM requests shed by risk level and reason", "counter",
+    lambda: dict(pipeline_scheduler.llm_queue.shed),
+    ("risk_level", "reason")
+)
@@ -0,0 +1,178 @@
+"""
+Pipeline Tracing for ETTA-X
+Structured per-stage timing spans for webhook pipeline runs.
+
+Each pipeline run records one span per stage (clone, diff analysis,
+feature extraction, impact scoring, test generation, ...) with its
+duration and size attributes (diff bytes, files, AST nodes, tokens).
+Spans are stored in the `pipeline_spans` table so latency percentiles
+and histograms can be computed per repository and stage.
+
+An optional listener is called as listener("started" | "finished", span)
+around every stage (used to stream stage progress to the frontend).
+
+Usage:
+    trace = PipelineTrace(event_id, "owner/repo")
+    with trace.span("clone") as span:
+        ...
+        span.set(files=12)
+    trace.save()
+
+Author: ETTA-X
+"""
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Callable
+
+from backend.api.metrics import PIPELINE_STAGE_DURATION
+from backend.app.database import create_pipeline_spans
+
+
+# Histogram bucket upper bounds in milliseconds
+HISTOGRAM_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000]
+
+
+@dataclass
+class PipelineSpan:
+    """Timing record for one pipeline stage"""
+    stage: str
+    start_offset_ms: float
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes):
+        """Attach size/context attributes to the span"""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "start_offset_ms": round(self.start_offset_ms, 2),
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class PipelineTrace:
+    """Collects the stage spans of a single pipeline run"""
+
+    def __init__(self, event_id: int, repository: str,
+                 listener: Optional[Callable[[str, PipelineSpan], None]] = None):
+        self.event_id = event_id
+        self.repository = repository
+        self.listener = listener
+        self.spans: List[PipelineSpan] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """Time a stage; the span is recorded even if the stage raises"""
+        start = time.perf_counter()
+        span = PipelineSpan(
+            stage=stage,
+            start_offset_ms=(start - self._started) * 1000,
+            attributes=dict(attributes)
+        )
+        self._notify("started", span)
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            self.spans.append(span)
+            PIPELINE_STAGE_DURATION.observe(span.duration_ms / 1000, stage=stage, status=span.status)
+            self._notify("finished", span)
+
+    def _notify(self, phase: str, span: PipelineSpan):
+        if self.listener is None:
+            return
+        try:
+            self.listener(phase, span)
+        except Exception as e:
+            print(f"[Tracing] Span listener error: {e}")
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self.total_ms, 2),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+    def summary(self) -> str:
+        """One-line human-readable breakdown for logs"""
+        parts = [f"{s.stage}={s.duration_ms:.0f}ms" for s in self.spans]
+        return f"total={self.total_ms:.0f}ms " + " ".join(parts)
+
+    def save(self) -> bool:
+        """Persist the spans for this event"""
+        return create_pipeline_spans(self.event_id, self.repository, [
+            {
+                "stage": s.stage,
+                "start_offset_ms": s.start_offset_ms,
+                "duration_ms": s.duration_ms,
+                "status": s.status,
+                "attributes": json.dumps(s.attributes),
+            }
+            for s in self.spans
+        ])
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_durations(durations: List[float]) -> Dict[str, Any]:
+    """
+    Build latency statistics and a cumulative histogram for stage durations.
+
+    Args:
+        durations: Stage durations in milliseconds
+
+    Returns:
+        Dict with count, mean, p50/p95/p99, max and histogram buckets
+    """
+    values = sorted(durations)
+    buckets = []
+    index = 0
+    for bound in HISTOGRAM_BUCKETS_MS:
+        while index < len(values) and values[index] <= bound:
+            index += 1
+        buckets.append({"le": bound, "count": index})
+    buckets.append({"le": "+Inf", "count": len(values)})
+
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else None,
+        "histogram": buckets,
+    }
+
+
+def diff_size_attributes(analysis_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Extract size attributes (files, diff bytes, changed AST nodes) from an analysis result"""
+    if not isinstance(analysis_result, dict):
+        return {}
+    changed_files = analysis_result.get("changed_files", []) or []
+    return {
+        "files": len(changed_files),
+        "diff_bytes": sum(len((f.get("diff") or "").encode("utf-8")) for f in changed_files),
+        "ast_nodes": sum(len(f.get("changed_nodes", []) or []) for f in changed_files),
+    }
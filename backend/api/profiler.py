@@ -0,0 +1,187 @@
+"""
+Pipeline Profiler for ETTA-X
+Opt-in sampling profiler for slow webhook pipeline runs.
+
+An admin arms the profiler for the next N pipeline runs, either globally or
+for one repository. Each armed run gets a ProfileSession: a background
+thread samples the stacks of the worker threads running that event's
+blocking stages (diff/AST analysis, feature extraction, scoring) via
+sys._current_frames() every few milliseconds. The result is stored per
+event in collapsed-stack format ("frame;frame;frame count"), which loads
+directly into flamegraph.pl, speedscope and similar tools.
+
+LLM test generation is not sampled: it runs as coroutines on the event
+loop and mostly waits for the model server, so its time shows up in the
+test_generation span (see pipeline_tracing) rather than in stacks.
+
+When nothing is armed, start_session() is a single dict check and the
+pipeline runs its stage functions unwrapped.
+
+Author: ETTA-X
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional, Dict, Any, Callable
+
+from backend.app.database import create_pipeline_profile
+
+
+DEFAULT_INTERVAL_MS = 5
+MAX_STACK_DEPTH = 128
+MAX_RUNS = 100
+
+# Shared secret required by the profiler admin endpoints (disabled if unset)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+class StackSampler:
+    """Samples the Python stacks of a set of threads at a fixed interval"""
+
+    def __init__(self, interval_ms: float = DEFAULT_INTERVAL_MS):
+        self.interval = max(1.0, float(interval_ms)) / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Dict[int, int] = {}  # thread id -> attach depth
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def attach(self):
+        """Sample the current thread while inside this block"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                depth = self._threads.get(ident, 1) - 1
+                if depth > 0:
+                    self._threads[ident] = depth
+                else:
+                    self._threads.pop(ident, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="etta-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[self._collapse(frame)] += 1
+                    self.samples += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def collapsed(self) -> str:
+        """Render samples in collapsed-stack format, hottest stacks first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """Profiling of a single pipeline run"""
+
+    def __init__(self, event_id: int, repository: str, interval_ms: float):
+        self.event_id = event_id
+        self.repository = repository
+        self.interval_ms = interval_ms
+        self.sampler = StackSampler(interval_ms)
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Wrap a blocking stage function so its worker thread is sampled"""
+        @wraps(fn)
+        def profiled_fn(*args, **kwargs):
+            with self.sampler.attach():
+                return fn(*args, **kwargs)
+        return profiled_fn
+
+    def finish(self) -> Optional[int]:
+        """Stop sampling and store the collapsed stacks for the event"""
+        self.sampler.stop()
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        return create_pipeline_profile(
+            self.event_id, self.repository, "collapsed",
+            self.sampler.samples, self.interval_ms, duration_ms,
+            self.sampler.collapsed()
+        )
+
+
+class PipelineProfiler:
+    """Admin switch deciding which upcoming pipeline runs get profiled"""
+
+    def __init__(self):
+        # Repository full name (or None for any repository) -> arming settings
+        self._armed: Dict[Optional[str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def arm(self, runs: int, repository: Optional[str] = None,
+            interval_ms: float = DEFAULT_INTERVAL_MS) -> Dict[str, Any]:
+        """Profile the next `runs` pipeline runs (for one repository or any)"""
+        runs = max(1, min(int(runs), MAX_RUNS))
+        with self._lock:
+            self._armed[repository] = {"remaining": runs, "interval_ms": interval_ms}
+        return self.status()
+
+    def disarm(self, repository: Optional[str] = None):
+        with self._lock:
+            self._armed.pop(repository, None)
+
+    def start_session(self, event_id: int, repository: str) -> Optional[ProfileSession]:
+        """Start profiling this run if the profiler is armed for it"""
+        if not self._armed:
+            return None
+        with self._lock:
+            key = repository if repository in self._armed else None
+            settings = self._armed.get(key)
+            if settings is None:
+                return None
+            settings["remaining"] -= 1
+            if settings["remaining"] <= 0:
+                del self._armed[key]
+        return ProfileSession(event_id, repository, settings["interval_ms"])
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "armed": [
+                    {"repository": repo, **settings}
+                    for repo, settings in self._armed.items()
+                ]
+            }
+
+
+def profiled(session: Optional[ProfileSession], fn: Callable) -> Callable:
+    """Return fn wrapped for sampling if a profile session is active"""
+    return session.wrap(fn) if session else fn
+
+
+# Shared profiler switch used by the pipeline and admin endpoints
+pipeline_profiler = PipelineProfiler()
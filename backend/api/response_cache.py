@@ -0,0 +1,233 @@
+"""
+Response Cache for ETTA-X
+Read-through cache with strong ETags for the dashboard read endpoints.
+
+/api/pipeline/recent, /api/pipeline/stats and the repository analysis and
+event history endpoints rebuild and re-serialize the same JSON on every
+poll although their data only changes when a webhook event is written.
+Responses are cached per endpoint and arguments, tagged with the data
+version they were built from, and served again until the next event or
+repository write bumps the version (app.py registers invalidate() as a
+database write hook).
+
+Every cached response carries a strong ETag (hash of the body) and
+Cache-Control: no-cache, so browsers revalidate with If-None-Match and
+get an empty 304 Not Modified while nothing changed. Bodies are rendered
+with fast_json (off the event loop), and the gzip variant of a large
+body is compressed once and cached next to it.
+
+Usage:
+    return await response_cache.respond(
+        request, ("pipeline_recent", repository, limit),
+        lambda: build_payload(repository, limit)
+    )
+
+Configuration (environment variables):
+- RESPONSE_CACHE_MAX_ENTRIES: maximum cached responses (default 256)
+- RESPONSE_CACHE_MAX_BYTES: maximum total cached body size (default 64 MB)
+- GZIP_MIN_SIZE / GZIP_LEVEL: shared with the GZip middleware (default 1024 / 6)
+
+Author: ETTA-X
+"""
+
+import gzip
+import hashlib
+import inspect
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from fastapi import Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+
+from backend.api.fast_json import dumps_async, offload, JSON_OFFLOAD_BYTES
+from backend.api.metrics import REGISTRY
+
+
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+
+
+@dataclass
+class CachedBody:
+    """A rendered response body and the data version it was built from"""
+    version: int
+    body: bytes
+    etag: str
+    gzip_body: Optional[bytes] = None
+
+    @property
+    def gzip_etag(self) -> str:
+        """Strong validators differ per content coding"""
+        return self.etag[:-1] + '-gzip"'
+
+    def gzipped(self) -> bytes:
+        """Compressed body, computed on first use"""
+        if self.gzip_body is None:
+            self.gzip_body = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self.gzip_body
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed with q > 0, or not
+    listed while "*" has q > 0 ("gzip;q=0" refuses it)
+    """
+    qualities = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    if "gzip" in qualities:
+        return qualities["gzip"] > 0
+    return qualities.get("*", 0.0) > 0
+
+
+class NegotiatedGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that honours q-values (it only looks for "gzip" in the header)"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope.get("headers") or [])
+            if not accepts_gzip(headers.get(b"accept-encoding", b"").decode("latin-1")):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+
+class ResponseCache:
+    """LRU of rendered JSON responses, invalidated by a data version counter"""
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+        self.max_bytes = max_bytes or int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self._entries: "OrderedDict[Tuple, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self):
+        """Mark every cached response stale (called after event/repository writes)"""
+        with self._lock:
+            self.version += 1
+
+    def get(self, key: Tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self.version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, entry: CachedBody):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    async def respond(self, request: Request, key: Tuple, build: Callable[[], Any]) -> Response:
+        """
+        Serve `key` from the cache or build, render and cache it.
+
+        Args:
+            request: Incoming request (for If-None-Match)
+            key: Endpoint name and arguments identifying the response
+            build: Returns the JSON payload (plain or async function);
+                   exceptions (e.g. HTTPException) propagate uncached
+        """
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            # Snapshot before building: a write during the build leaves the entry stale
+            version = self.version
+            payload = build()
+            if inspect.isawaitable(payload):
+                payload = await payload
+            body = await dumps_async(payload)
+            entry = CachedBody(version=version, body=body, etag=strong_etag(body))
+            self.put(key, entry)
+        else:
+            self.hits += 1
+
+        use_gzip = len(entry.body) >= GZIP_MIN_SIZE and accepts_gzip(request.headers.get("Accept-Encoding"))
+        etag = entry.gzip_etag if use_gzip else entry.etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("If-None-Match")
+        if _etag_matches(if_none_match, entry.etag) or _etag_matches(if_none_match, entry.gzip_etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            if entry.gzip_body is None and len(entry.body) >= JSON_OFFLOAD_BYTES:
+                await offload("gzip", entry.gzipped)
+            # Already encoded, so the GZip middleware passes it through untouched
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=entry.gzipped(), media_type="application/json", headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+# Shared cache for the dashboard read endpoints
+response_cache = ResponseCache()
+
+REGISTRY.register_callback(
+    "etta_response_cache_requests_total", "Dashboard read requests by response cache outcome", "counter",
+    lambda: {
+        ("hit",): response_cache.hits,
+        ("miss",): response_cache.misses,
+        ("not_modified",): response_cache.not_modified,
+    },
+    ("result",)
+)
+REGISTRY.register_callback(
+    "etta_response_cache_bytes", "Body bytes held by the response cache", "gauge",
+    lambda: response_cache.stats()["bytes"]
+)
@@ -25,6 +25,8 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
 from pydantic import BaseModel, Field
 
+from backend.api.pipeline_scheduler import pipeline_scheduler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,6 +46,7 @@ class TestGenerationRequest(BaseModel):
     change_risk_score: float = Field(default=0.5, ge=0.0, le=1.0, description="Risk score from impact analysis")
     files_changed: int = Field(default=1, ge=0, description="Number of files changed")
     critical_module: bool = Field(default=False, description="Whether changes affect critical module")
+    bypass_cache: bool = Field(default=False, description="Generate anew even if an identical generation is cached")
 
 
 class TestExecutionRequest(BaseModel):
@@ -96,12 +99,14 @@ def get_llm_module():
         from backend.model.LLM import (
             get_llm_instance,
             generate_tests,
+            agenerate_tests,
             prioritize_tests,
             generate_pytest_file
         )
         return {
             "get_llm_instance": get_llm_instance,
             "generate_tests": generate_tests,
+            "agenerate_tests": agenerate_tests,
             "prioritize_tests": prioritize_tests,
             "generate_pytest_file": generate_pytest_file
         }
@@ -125,7 +130,7 @@ async def get_test_pipeline_status():
     if llm_module:
         try:
             llm = llm_module["get_llm_instance"]()
-            _llm_status = llm.get_status()
+            _llm_status = {**llm.get_info(), "residency": await llm.aresidency()}
         except Exception as e:
             _llm_status["error"] = str(e)
     
@@ -143,6 +148,10 @@ async def generate_tests_endpoint(request: TestGenerationRequest):
     """
     Generate tests from code description using local LLM.
     
+    The generation waits in the pipeline's LLM admission queue like a
+    webhook event of the same risk level (critical_module or
+    change_risk_score); if it is shed, 503 with Retry-After is returned.
+    
     Returns prioritized tests ready for execution.
     """
     llm_module = get_llm_module()
@@ -157,11 +166,27 @@ async def generate_tests_endpoint(request: TestGenerationRequest):
         # Step 1: Generate tests using LLM
         logger.info(f"Generating tests for: {request.code_description[:100]}...")
         
-        generation_result = llm_module["generate_tests"](
+        if request.critical_module or request.change_risk_score >= 0.7:
+            risk_level = "high"
+        elif request.change_risk_score >= 0.4:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        admission = pipeline_scheduler.llm_admission(risk_level)
+        generation_result = await llm_module["agenerate_tests"](
             code_description=request.code_description,
-            language=request.language
+            language=request.language,
+            use_cache=not request.bypass_cache,
+            slot=admission.slot
         )
         
+        if admission.shed:
+            raise HTTPException(
+                status_code=503,
+                detail=f"LLM saturated: {admission.shed[-1]}",
+                headers={"Retry-After": str(max(1, int(pipeline_scheduler.llm_queue.deadline(risk_level))))}
+            )
+        
         if not generation_result.get("success"):
             raise HTTPException(
                 status_code=500,
@@ -204,7 +229,8 @@ async def generate_tests_endpoint(request: TestGenerationRequest):
             "generation": {
                 "test_count": len(tests),
                 "generation_time_ms": generation_result.get("generation_time_ms", 0),
-                "model_used": generation_result.get("model_used", "CodeLlama-7B")
+                "model_used": generation_result.get("model_used", "CodeLlama-7B"),
+                "cached": generation_result.get("cached", False)
             },
             "prioritization": {
                 "total_count": prioritization_result.get("total_count", 0),
@@ -469,6 +495,24 @@ async def get_cached_test(cache_key: str):
     return generated_tests_cache[cache_key]
 
 
+@router.get("/llm-cache")
+async def get_llm_cache_stats():
+    """
+    Get LLM result cache statistics (hits, misses, stored responses).
+    """
+    from backend.api.llm_cache import llm_cache
+    return llm_cache.stats()
+
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """
+    Delete all cached LLM responses.
+    """
+    from backend.api.llm_cache import llm_cache
+    return {"message": "LLM cache cleared", "deleted": llm_cache.clear()}
+
+
 @router.delete("/cache/{cache_key}")
 async def delete_cached_test(cache_key: str):
     """
@@ -485,7 +529,7 @@ async def delete_cached_test(cache_key: str):
 async def load_llm_model(force_cpu: bool = False):
     """
     Pre-load the LLM model into memory.
-    Model will be auto-downloaded from HuggingFace if not present.
+    Checks the server has the model, then loads it (renewing its keep-alive).
     """
     llm_module = get_llm_module()
     
@@ -494,12 +538,12 @@ async def load_llm_model(force_cpu: bool = False):
     
     try:
         llm = llm_module["get_llm_instance"]()
-        success = llm.load(force_cpu=force_cpu)
+        success = await llm.aload() and await llm.awarm_up()
         
         if success:
             return {
                 "success": True,
-                "status": llm.get_status()
+                "status": {**llm.get_info(), "residency": await llm.aresidency()}
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to load model")
@@ -8,18 +8,18 @@ if _project_root not in sys.path:
 
 from fastapi import FastAPI, Request, HTTPException, Depends, status, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from pydantic import BaseModel
 from typing import Optional, List, Dict
-import httpx
 import secrets
 import hashlib
 import time
 import json
+import asyncio
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -34,12 +34,14 @@ from backend.app.database import (
     create_user, get_user_by_github_id, update_user, user_exists,
     get_user_settings, update_user_settings,
     create_repository, get_repository_by_github_id, get_repository_by_full_name,
-    get_user_repositories,
+    get_user_repositories_overview,
     create_webhook, get_webhook_by_repository, get_webhook_secret_hash,
     update_webhook_delivery, deactivate_webhook,
     create_webhook_event, get_webhook_event_by_delivery_id,
     get_unprocessed_webhook_events, mark_webhook_event_processed,
-    get_recent_webhook_events, get_db_connection
+    get_recent_webhook_events, get_db_connection,
+    get_pipeline_spans, get_pipeline_stage_durations,
+    get_pipeline_profiles, get_pipeline_profile, on_write
 )
 
 # Import GitHub API module
@@ -50,7 +52,23 @@ from backend.api.git_repo import (
 
 # Import diff analyzer module
 from backend.api.diff_analyzer import (
-    DiffAnalyzer, analyze_commits, analyze_from_webhook
+    DiffAnalyzer, analyze_from_webhook, analyze_unified_diff
+)
+from backend.api.analysis_cache import analysis_cache
+from backend.api.pipeline_scheduler import pipeline_scheduler
+from backend.api.pipeline_tracing import PipelineTrace, diff_size_attributes, summarize_durations
+from backend.api.profiler import pipeline_profiler, profiled, ADMIN_TOKEN
+from backend.api.http_client import http_client, close_http_client
+from backend.api.github_cache import cached_get
+from backend.api.github_rate_limit import background_requests, GitHubRateLimitError
+from backend.api.identity_cache import resolve_identity, remember_identity, forget_identity
+from backend.api.pipeline_events import pipeline_events, EVENT_CREATED, EVENT_COMPLETED, TEST_GENERATED
+from backend.api.response_cache import response_cache, NegotiatedGZipMiddleware, GZIP_MIN_SIZE, GZIP_LEVEL
+from backend.api.fast_json import FastJSONResponse, loads_async, dumps_str_async, json_response
+from backend.api.commit_sync import CommitSyncEngine
+from backend.api.metrics import (
+    REGISTRY as METRICS_REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_REQUESTS, HTTP_REQUEST_DURATION, WEBHOOK_EVENTS, track_git
 )
 
 # Import test pipeline API router
@@ -65,6 +83,9 @@ GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID", "")
 GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET", "")
 GITHUB_REDIRECT_URI = os.getenv("GITHUB_REDIRECT_URI", "http://localhost:8000/auth/github/callback")
 
+# Seconds of LLM idleness after which the model is pinged to stay loaded (0 disables)
+LLM_WARMUP_INTERVAL = float(os.getenv("LLM_WARMUP_INTERVAL", 0))
+
 # Cookie configuration based on environment
 COOKIE_CONFIG = {
     "secure": IS_PRODUCTION,  # HTTPS only in production
@@ -79,9 +100,19 @@ CSRF_STATE_EXPIRY = 600  # 10 minutes
 
 app = FastAPI()
 
+# Cached dashboard responses are rebuilt after every event or repository write
+on_write(response_cache.invalidate)
+
 # Include test pipeline router
 app.include_router(test_pipeline_router)
 
+# Compress large responses (analysis payloads, generated tests) for clients
+# whose Accept-Encoding allows gzip; the event stream and bodies that are
+# already encoded are passed through. Added first so it is the innermost
+# layer: behind the BaseHTTPMiddleware classes below every body arrives as
+# a stream, and minimum_size would never apply
+app.add_middleware(NegotiatedGZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 # Security Headers Middleware
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -114,11 +145,62 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 app.add_middleware(SecurityHeadersMiddleware)
 
 
+# Request metrics middleware (latency histograms by route for /metrics)
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status_code)
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, method=request.method, route=route_path
+            )
+
+
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(GitHubRateLimitError)
+async def github_rate_limit_handler(request: Request, exc: GitHubRateLimitError):
+    """Answer requests whose GitHub budget is exhausted with 429 and when to retry"""
+    retry_after = max(1, int(exc.retry_after or 60) + 1)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
 # Startup event to initialize database
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on application startup"""
+    """Initialize database, start the pipeline scheduler and the LLM warm-up on application startup"""
     init_database()
+    pipeline_scheduler.start(process_webhook_event_background)
+    # Load the model now and keep it resident between sparse pushes
+    if LLM_WARMUP_INTERVAL > 0:
+        from backend.model.LLM.backends import get_llm_instance
+        get_llm_instance().start_warmup(LLM_WARMUP_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop pipeline workers, end event streams and close pooled connections on application shutdown"""
+    pipeline_events.close()
+    await pipeline_scheduler.stop()
+    await close_http_client()
+    # The LLM package is imported lazily; only close its backend if one was created
+    if "backend.model.LLM.backends" in sys.modules:
+        llm = sys.modules["backend.model.LLM.backends"].current_llm_instance()
+        if llm is not None:
+            await llm.aclose()
 
 
 # CSRF Helper Functions
@@ -169,20 +251,10 @@ async def setup_page(request: Request):
     token = request.cookies.get("github_token")
     if token:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.github.com/user",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Accept": "application/vnd.github.v3+json",
-                    },
-                )
-                if response.status_code == 200:
-                    github_data = response.json()
-                    user = get_user_by_github_id(github_data.get('id'))
-                    if user:
-                        # User already set up, redirect to dashboard
-                        return RedirectResponse(url="/dashboard")
+            identity = await resolve_identity(token)
+            if identity and identity.user_id:
+                # User already set up, redirect to dashboard
+                return RedirectResponse(url="/dashboard")
         except Exception:
             pass  # Continue to setup page on error
     
@@ -201,6 +273,12 @@ async def health_check():
     return {"status": "healthy", "message": "ETTA-X API is running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Expose application metrics in the Prometheus text format"""
+    return Response(content=METRICS_REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Setup API Routes
 @app.get("/api/setup/status")
 async def get_setup_status():
@@ -220,26 +298,16 @@ async def check_user_exists(request: Request):
         return {"exists": False, "authenticated": False}
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
-            )
-            
-            if response.status_code != 200:
-                return {"exists": False, "authenticated": False}
-            
-            github_data = response.json()
-            user = get_user_by_github_id(github_data.get('id'))
-            
-            return {
-                "exists": user is not None,
-                "authenticated": True,
-                "username": github_data.get('login')
-            }
+        identity = await resolve_identity(token)
+        
+        if not identity:
+            return {"exists": False, "authenticated": False}
+        
+        return {
+            "exists": identity.user_id is not None,
+            "authenticated": True,
+            "username": identity.login
+        }
     except Exception:
         return {"exists": False, "authenticated": False}
 
@@ -259,9 +327,9 @@ async def create_user_from_github(request: Request):
         raise HTTPException(status_code=401, detail="Not authenticated - no token cookie found")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
+        async with http_client() as client:
+            response = await cached_get(
+                client, "https://api.github.com/user",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Accept": "application/vnd.github.v3+json",
@@ -283,6 +351,7 @@ async def create_user_from_github(request: Request):
                 raise HTTPException(status_code=500, detail="Failed to create user in database")
             
             print(f"User created/updated: {user.get('username')}")
+            remember_identity(token, github_data, user['id'])
             
             # Mark setup as complete
             mark_setup_complete()
@@ -297,7 +366,7 @@ async def create_user_from_github(request: Request):
                     "avatar_url": user['avatar_url']
                 }
             }
-    except HTTPException:
+    except (HTTPException, GitHubRateLimitError):
         raise
     except Exception as e:
         print(f"ERROR creating user: {str(e)}")
@@ -315,31 +384,23 @@ async def get_current_user(request: Request):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid token")
-            
-            github_data = response.json()
-            user = get_user_by_github_id(github_data.get('id'))
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found. Please complete setup.")
-            
-            # Get user settings
-            settings = get_user_settings(user['id'])
-            
-            return {
-                **user,
-                "settings": settings
-            }
+        identity = await resolve_identity(token)
+        
+        if not identity:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        user = get_user_by_github_id(identity.github_id)
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found. Please complete setup.")
+        
+        # Get user settings
+        settings = get_user_settings(user['id'])
+        
+        return {
+            **user,
+            "settings": settings
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -357,27 +418,17 @@ async def update_settings(request: Request):
     try:
         body = await request.json()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid token")
-            
-            github_data = response.json()
-            user = get_user_by_github_id(github_data.get('id'))
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            success = update_user_settings(user['id'], body)
-            
-            return {"success": success}
+        identity = await resolve_identity(token)
+        
+        if not identity:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        if not identity.user_id:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        success = update_user_settings(identity.user_id, body)
+        
+        return {"success": success}
     except HTTPException:
         raise
     except Exception as e:
@@ -494,7 +545,7 @@ async def github_callback(code: str = None, state: str = None, error: str = None
         print("Exchanging code for access token...")
         
         # Exchange code for access token
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             token_response = await client.post(
                 "https://github.com/login/oauth/access_token",
                 data={
@@ -527,8 +578,8 @@ async def github_callback(code: str = None, state: str = None, error: str = None
             
             # Fetch user info from GitHub
             print("Fetching user info...")
-            user_response = await client.get(
-                "https://api.github.com/user",
+            user_response = await cached_get(
+                client, "https://api.github.com/user",
                 headers={
                     "Authorization": f"Bearer {access_token}",
                     "Accept": "application/vnd.github.v3+json",
@@ -544,6 +595,9 @@ async def github_callback(code: str = None, state: str = None, error: str = None
         # Check if user exists in database
         existing_user = get_user_by_github_id(user_data.get('id'))
         
+        # Later requests with this token resolve the user without calling /user
+        remember_identity(access_token, user_data, existing_user['id'] if existing_user else None)
+        
         # Create session with token metadata
         token_issued_at = int(time.time())
         
@@ -585,7 +639,7 @@ async def github_callback(code: str = None, state: str = None, error: str = None
         print("OAuth callback completed successfully")
         return response
         
-    except HTTPException:
+    except (HTTPException, GitHubRateLimitError):
         raise
     except Exception as e:
         print(f"OAuth callback error: {e}")
@@ -610,9 +664,9 @@ async def set_auth_token(request: Request, body: TokenRequest):
     access_token = body.token
     
     # Verify the token is valid by fetching user info
-    async with httpx.AsyncClient() as client:
-        user_response = await client.get(
-            "https://api.github.com/user",
+    async with http_client() as client:
+        user_response = await cached_get(
+            client, "https://api.github.com/user",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "Accept": "application/vnd.github.v3+json",
@@ -660,6 +714,8 @@ async def set_auth_token(request: Request, body: TokenRequest):
     if not user_id:
         raise HTTPException(status_code=500, detail="Failed to create user")
     
+    remember_identity(access_token, user_data, user_id)
+    
     # Store session with token in database (for background tasks)
     session_token = secrets.token_urlsafe(32)
     expires_at = datetime.now() + timedelta(seconds=COOKIE_CONFIG["max_age"])
@@ -744,9 +800,9 @@ async def get_github_user(request: Request):
         except ValueError:
             pass  # Invalid timestamp, skip age check
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user",
+    async with http_client() as client:
+        response = await cached_get(
+            client, "https://api.github.com/user",
             headers={
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/vnd.github.v3+json",
@@ -754,6 +810,7 @@ async def get_github_user(request: Request):
         )
         
         if response.status_code == 401:
+            forget_identity(token)
             raise HTTPException(
                 status_code=401,
                 detail="Token revoked or expired on GitHub",
@@ -764,6 +821,7 @@ async def get_github_user(request: Request):
             raise HTTPException(status_code=502, detail="Failed to fetch user from GitHub")
         
         user_data = response.json()
+        remember_identity(token, user_data)
         
         # Include token metadata in response
         return {
@@ -776,8 +834,10 @@ async def get_github_user(request: Request):
 
 
 @app.get("/auth/github/logout")
-async def github_logout():
+async def github_logout(request: Request):
     """Logout user by securely clearing all auth cookies"""
+    forget_identity(request.cookies.get("github_token"))
+    
     response = RedirectResponse(url="/dashboard")
     
     # Clear all auth-related cookies with matching security settings
@@ -834,6 +894,8 @@ async def get_github_repos(request: Request):
         github_api = GitHubAPI(token)
         repos = await github_api.get_user_repos()
         return {"repos": repos}
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -850,6 +912,8 @@ async def get_repo_branches(owner: str, repo: str, request: Request):
         github_api = GitHubAPI(token)
         branches = await github_api.get_repo_branches(owner, repo)
         return {"branches": branches}
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
@@ -868,6 +932,8 @@ async def get_repo_info(owner: str, repo: str, request: Request):
         github_api = GitHubAPI(token)
         repo_info = await github_api.get_repo_info(owner, repo)
         return repo_info
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
@@ -888,6 +954,8 @@ async def get_token_scopes(request: Request):
         github_api = GitHubAPI(token)
         scope_info = await github_api.get_scope_info()
         return scope_info
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -913,6 +981,8 @@ async def validate_token_scopes(request: Request):
             "reauth_required": not is_valid,
             "reauth_url": "/auth/github/login" if not is_valid else None
         }
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -993,18 +1063,13 @@ async def setup_repository_webhook(owner: str, repo: str, request: Request):
                 )
             )
         
-        # Get GitHub user info
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(
-                "https://api.github.com/user",
-                headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"},
-            )
-            if user_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Failed to get user info")
-            user_data = user_response.json()
+        # Resolve the GitHub user behind the token
+        identity = await resolve_identity(token)
+        if not identity:
+            raise HTTPException(status_code=401, detail="Failed to get user info")
         
         # Get or create user in database
-        user = get_user_by_github_id(user_data.get('id'))
+        user = get_user_by_github_id(identity.github_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found. Please complete setup first.")
         
@@ -1084,7 +1149,7 @@ async def setup_repository_webhook(owner: str, repo: str, request: Request):
                 f"https://github.com/{owner}/{repo}/settings/hooks"
             ) if e.status_code == 403 else None
         )
-    except HTTPException:
+    except (HTTPException, GitHubRateLimitError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1125,25 +1190,33 @@ async def connect_repository(owner: str, repo: str, request: Request):
         
         github_api = GitHubAPI(token)
         
-        # Get GitHub user info
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
-            )
-            
-            if user_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid token")
-            
-            github_user = user_response.json()
+        # Resolve the GitHub user behind the token
+        identity = await resolve_identity(token)
+        if not identity:
+            raise HTTPException(status_code=401, detail="Invalid token")
         
         # Get or create user
-        user = get_user_by_github_id(github_user.get('id'))
+        user = get_user_by_github_id(identity.github_id)
         if not user:
+            # Creating the user needs the full profile, not just the cached identity
+            async with http_client() as client:
+                user_response = await cached_get(
+                    client, "https://api.github.com/user",
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Accept": "application/vnd.github.v3+json",
+                    },
+                )
+                
+                if user_response.status_code != 200:
+                    forget_identity(token)
+                    raise HTTPException(status_code=401, detail="Invalid token")
+                
+                github_user = user_response.json()
+            
             user = create_user(github_user)  # Pass the full github user dict
+            if user:
+                remember_identity(token, github_user, user['id'])
         
         if not user:
             raise HTTPException(status_code=500, detail="Failed to get/create user")
@@ -1231,7 +1304,7 @@ async def connect_repository(owner: str, repo: str, request: Request):
             "webhook_error": webhook_error
         }
         
-    except HTTPException:
+    except (HTTPException, GitHubRateLimitError):
         raise
     except Exception as e:
         import traceback
@@ -1304,6 +1377,8 @@ async def delete_repository_webhook(owner: str, repo: str, request: Request):
         raise HTTPException(status_code=403, detail=str(e))
     except WebhookError as e:
         raise HTTPException(status_code=e.status_code or 500, detail=str(e))
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1749,10 +1824,19 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
     3. Extract features from diff
     4. Run ML Impact Analysis
     5. Store combined results
+    
+    Each stage is timed as a span of a PipelineTrace; spans are stored
+    per event in `pipeline_spans` and streamed as stage_progress events.
     """
     import json
     import asyncio
     
+    trace = PipelineTrace(
+        event_id, event_data.get('repository_full_name') or '',
+        listener=pipeline_events.trace_listener(event_id, event_data.get('repository_full_name'))
+    )
+    profile = pipeline_profiler.start_session(event_id, event_data.get('repository_full_name') or '')
+    
     try:
         print(f"[Pipeline] ========== Processing webhook event {event_id} ==========")
         
@@ -1791,28 +1875,58 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
             print(f"[Pipeline] No access token found for repo {repo_full_name}")
             return
         
+        has_prior_commit = bool(before_sha and after_sha and before_sha != '0' * 40)
+        
+        # Reuse a previous analysis of the same commit range without cloning
+        cached_analysis = None
+        if has_prior_commit:
+            cached_analysis = analysis_cache.lookup(repo_full_name, before_sha, after_sha)
+        
         # STEP 1: Clone or pull the repository
-        print(f"[Pipeline] Step 1: Cloning/pulling repository...")
-        local_path = await clone_or_pull_repo(owner, repo_name, token, branch)
+        local_path = None
+        if cached_analysis is None:
+            print(f"[Pipeline] Step 1: Cloning/pulling repository...")
+            async with pipeline_scheduler.stage("git"):
+                with trace.span("clone", branch=branch):
+                    local_path = await clone_or_pull_repo(owner, repo_name, token, branch)
+        else:
+            print(f"[Pipeline] Step 1: Skipped clone/pull (analysis cache hit)")
         
         # STEP 2: Run git diff + AST analysis (Code Change Detection)
         print(f"[Pipeline] Step 2: Running git diff and AST analysis...")
         analysis_result = None
         impact_result = None
         
-        if before_sha and after_sha and before_sha != '0' * 40:
+        if has_prior_commit:
             try:
-                analysis_result = analyze_commits(local_path, before_sha, after_sha)
+                with trace.span("diff_analysis", cached=cached_analysis is not None) as span:
+                    if cached_analysis is not None:
+                        analysis_result = cached_analysis
+                    else:
+                        analysis_result = await pipeline_scheduler.run_in_stage(
+                            "ast", profiled(profile, analysis_cache.analyze),
+                            repo_full_name, local_path, before_sha, after_sha
+                        )
+                    span.set(**diff_size_attributes(analysis_result))
                 print(f"[Pipeline] Git diff analysis complete for event {event_id}")
                 
                 # STEP 3: Extract features from diff
                 print(f"[Pipeline] Step 3: Extracting ML features from analysis...")
-                features = extract_features_from_diff(analysis_result, repo_full_name, branch, after_sha)
+                with trace.span("feature_extraction") as span:
+                    features = await pipeline_scheduler.run_in_stage(
+                        "model", profiled(profile, extract_features_from_diff),
+                        analysis_result, repo_full_name, branch, after_sha
+                    )
+                    span.set(files=features.get('files_changed'), lines=features.get('lines_changed'))
                 print(f"[Pipeline] Extracted features: {features.get('files_changed')} files, {features.get('lines_changed')} lines")
                 
                 # STEP 4: Run ML Impact Analysis
                 print(f"[Pipeline] Step 4: Running ML Impact Analysis...")
-                impact_result = run_impact_analysis_from_features(features)
+                with trace.span("impact_scoring") as span:
+                    impact_result = await pipeline_scheduler.run_in_stage(
+                        "model", profiled(profile, run_impact_analysis_from_features), features
+                    )
+                    span.set(risk_level=impact_result.get('risk_level'))
                 print(f"[Pipeline] Impact Analysis complete - Risk: {impact_result.get('risk_score')} ({impact_result.get('risk_level')})")
                 
             except Exception as e:
@@ -1835,35 +1949,57 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
         if risk_level in ['high', 'medium']:
             print(f"[Pipeline] Step 5: Auto-triggering test generation (risk: {impact_result.get('risk_level')})...")
             try:
-                from backend.model.LLM import generate_tests, prioritize_tests
+                from backend.model.LLM import (
+                    agenerate_tests_batch, build_change_descriptions, select_change_context, prioritize_tests
+                )
                 
-                # Build rich code description from diff analysis
-                files_changed = analysis_result.get('files', [])
+                # The analyzer returns 'changed_files' (the no-diff placeholder uses 'files')
+                files_changed = analysis_result.get('changed_files', analysis_result.get('files', []))
                 risk_domains = impact_result.get('detected_risk_domains', [])
                 
-                code_description = f"Security-sensitive code changes detected.\n"
-                code_description += f"Risk Level: {impact_result.get('risk_level')} ({impact_result.get('risk_score', 0):.2f})\n"
-                code_description += f"Risk Domains: {', '.join(risk_domains)}\n\n"
-                code_description += f"Files changed:\n"
+                # Keep the riskiest changed functions/classes within the prompt token budget
+                with trace.span("context_selection", files=len(files_changed)) as span:
+                    context = await pipeline_scheduler.run_in_stage(
+                        "model", select_change_context, files_changed, detect_keywords=detect_risk_keywords
+                    )
+                    span.set(**context.to_dict())
                 
-                for f in files_changed[:5]:  # Limit to 5 files
-                    filename = f.get('filename', 'unknown')
-                    code_description += f"\nFile: {filename}\n"
-                    code_description += f"Status: {f.get('status', 'modified')}\n"
-                    
-                    # Add function/class names from logical changes
-                    logical_changes = f.get('logical_changes', [])
-                    if logical_changes:
-                        code_description += "Functions/Methods:\n"
-                        for change in logical_changes[:5]:
-                            change_type = change.get('type', 'change')
-                            desc = change.get('description', change.get('name', ''))
-                            code_description += f"  - {change_type}: {desc}\n"
+                # One prompt per changed file (large files split by function),
+                # generated concurrently instead of one truncated mega-prompt
+                code_descriptions = build_change_descriptions(
+                    context.files, impact_result.get('risk_level'),
+                    impact_result.get('risk_score', 0), risk_domains
+                )
+                prompt_chars = sum(len(description) for description in code_descriptions)
                 
-                print(f"[Pipeline] Code description for LLM ({len(code_description)} chars)")
+                print(f"[Pipeline] {len(code_descriptions)} code descriptions for LLM ({prompt_chars} chars, "
+                      f"{context.kept} changes kept, {context.dropped} dropped for the token budget)")
                 
                 # Generate tests
-                gen_result = generate_tests(code_description, language="python")
+                with trace.span("test_generation", prompts=len(code_descriptions), prompt_chars=prompt_chars,
+                                prompt_tokens_est=prompt_chars // 4) as span:
+                    # Each test reaches the browser as soon as it is parsed from the stream
+                    def publish_test(test: dict):
+                        pipeline_events.publish(
+                            TEST_GENERATED, repo_full_name, event_id=event_id, commit_sha=after_sha, test=test
+                        )
+                    
+                    # Each prompt's generation is admitted by risk level; shed prompts are
+                    # skipped, and if every prompt was shed the rule-based tests are used
+                    admission = pipeline_scheduler.llm_admission(risk_level, event_id=event_id)
+                    gen_result = await agenerate_tests_batch(
+                        code_descriptions, language="python", on_test=publish_test, slot=admission.slot
+                    )
+                    span.set(queue_wait_ms=round(admission.waited * 1000, 2))
+                    if admission.shed:
+                        reason = admission.shed[-1].reason
+                        print(f"[Pipeline] {len(admission.shed)} of {len(code_descriptions)} LLM prompts shed "
+                              f"for event {event_id} ({reason})")
+                        span.set(shed=reason, shed_prompts=len(admission.shed))
+                        if not admission.admitted:
+                            gen_result["shed"] = reason
+                    span.set(tests=len(gen_result.get('tests', []) or []),
+                             duplicates=gen_result.get('duplicates_removed', 0))
                 
                 # Check if we have tests (success can be True, False, or None)
                 tests_generated = gen_result.get('tests', [])
@@ -1871,12 +2007,13 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
                     print(f"[Pipeline] LLM generated {len(tests_generated)} tests")
                     
                     # Prioritize tests
-                    priority_result = prioritize_tests(
-                        tests=tests_generated,
-                        change_risk_score=impact_result.get('risk_score', 0.5),
-                        files_changed=len(files_changed),
-                        critical_module=risk_level == 'high'
-                    )
+                    with trace.span("prioritization", tests=len(tests_generated)):
+                        priority_result = prioritize_tests(
+                            tests=tests_generated,
+                            change_risk_score=impact_result.get('risk_score', 0.5),
+                            files_changed=len(files_changed),
+                            critical_module=risk_level == 'high'
+                        )
                     
                     # Get all prioritized tests with scores (sorted by priority)
                     all_prioritized = priority_result.get('all_tests', tests_generated)
@@ -1891,7 +2028,9 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
                         "selected_tests": selected_tests,
                         "selected_count": priority_result.get('selected_count', 0),
                         "priority_level": priority_result.get('priority_level', 'all'),
-                        "generation_time_ms": gen_result.get('generation_time_ms', 0)
+                        "generation_time_ms": gen_result.get('generation_time_ms', 0),
+                        "cached": gen_result.get('cached', False),
+                        "prompt_count": gen_result.get('prompt_count', 1)
                     }
                     print(f"[Pipeline] Prioritized {len(all_prioritized)} tests, {len(selected_tests)} selected as important")
                 else:
@@ -1933,8 +2072,11 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
                             "test_count": len(fallback_tests),
                             "tests": fallback_tests,
                             "selected_count": len(fallback_tests),
-                            "note": "Generated from risk domain analysis (LLM unavailable)"
+                            "note": ("Generated from risk domain analysis (LLM saturated)" if gen_result.get('shed')
+                                     else "Generated from risk domain analysis (LLM unavailable)")
                         }
+                        if gen_result.get('shed'):
+                            test_generation_result["shed"] = gen_result['shed']
                         print(f"[Pipeline] Generated {len(fallback_tests)} fallback tests from risk domains")
                     
             except ImportError as e:
@@ -1954,8 +2096,16 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
         }
         
         # STEP 6: Mark as processed with results
-        result_json = json.dumps(combined_result)
-        mark_webhook_event_processed(event_id, result_json)
+        with trace.span("store"):
+            combined_result["timings"] = trace.to_dict()
+            result_json = await dumps_str_async(combined_result)
+            mark_webhook_event_processed(event_id, result_json)
+        trace.save()
+        pipeline_events.publish(
+            EVENT_COMPLETED, repo_full_name, event_id=event_id, commit_sha=after_sha,
+            status="completed", total_ms=round(trace.total_ms, 2)
+        )
+        print(f"[Pipeline] Timings for event {event_id}: {trace.summary()}")
         print(f"[Pipeline] ========== Event {event_id} processing complete ==========")
         
     except Exception as e:
@@ -1965,14 +2115,24 @@ async def process_webhook_event_background(event_id: int, event_data: dict):
         # Mark as processed with error to prevent infinite retries
         mark_webhook_event_processed(event_id, json.dumps({
             "error": str(e),
-            "pipeline_status": "failed"
+            "pipeline_status": "failed",
+            "timings": trace.to_dict()
         }))
+        trace.save()
+        pipeline_events.publish(
+            EVENT_COMPLETED, event_data.get('repository_full_name'), event_id=event_id,
+            commit_sha=event_data.get('commit_sha'), status="failed", error=str(e)
+        )
+    finally:
+        if profile:
+            profile_id = profile.finish()
+            print(f"[Pipeline] Stored profile {profile_id} for event {event_id} ({profile.sampler.samples} samples)")
 
 
 # ==================== WEBHOOK RECEIVER ENDPOINT ====================
 
 @app.post("/webhook/github")
-async def receive_github_webhook(request: Request, background_tasks: BackgroundTasks):
+async def receive_github_webhook(request: Request):
     """
     Receive and process GitHub webhook events.
     
@@ -1998,6 +2158,8 @@ async def receive_github_webhook(request: Request, background_tasks: BackgroundT
     if not delivery_id:
         raise HTTPException(status_code=400, detail="Missing X-GitHub-Delivery header")
     
+    WEBHOOK_EVENTS.inc(event_type=event_type)
+    
     # Get raw body for signature verification
     body = await request.body()
     
@@ -2073,7 +2235,12 @@ async def receive_github_webhook(request: Request, background_tasks: BackgroundT
     if not stored_event:
         raise HTTPException(status_code=500, detail="Failed to store webhook event")
     
-    # Trigger background processing for push events
+    pipeline_events.publish(
+        EVENT_CREATED, repo_full_name, event_id=stored_event['id'], event_type=event_type,
+        branch=event_data.get("branch"), commit_sha=event_data.get("commit_sha")
+    )
+    
+    # Queue push events on the priority scheduler
     if event_type == "push":
         # Add event data needed for processing
         processing_data = {
@@ -2082,8 +2249,14 @@ async def receive_github_webhook(request: Request, background_tasks: BackgroundT
             "commit_sha": event_data.get("commit_sha"),
             "branch": event_data.get("branch"),
         }
-        background_tasks.add_task(process_webhook_event_background, stored_event['id'], processing_data)
-        print(f"[Webhook] Queued background processing for event {stored_event['id']}")
+        scheduled = await pipeline_scheduler.submit(
+            stored_event['id'],
+            processing_data,
+            payload=payload,
+            default_branch=payload.get("repository", {}).get("default_branch")
+        )
+        print(f"[Webhook] Queued event {stored_event['id']} (cost={scheduled.estimated_cost}, "
+              f"default_branch={scheduled.is_default_branch}, queue_depth={pipeline_scheduler.queue_depth})")
     
     return {
         "status": "received",
@@ -2149,6 +2322,12 @@ def get_repo_local_path(owner: str, repo: str) -> str:
 
 async def clone_or_pull_repo(owner: str, repo: str, token: str, branch: str = None) -> str:
     """Clone a repository or pull latest changes if already cloned"""
+    # git subprocesses block, so keep them off the event loop
+    return await asyncio.to_thread(_clone_or_pull_repo_sync, owner, repo, token, branch)
+
+
+def _clone_or_pull_repo_sync(owner: str, repo: str, token: str, branch: str = None) -> str:
+    """Blocking implementation of clone_or_pull_repo"""
     ensure_repo_directory()
     
     local_path = get_repo_local_path(owner, repo)
@@ -2158,25 +2337,28 @@ async def clone_or_pull_repo(owner: str, repo: str, token: str, branch: str = No
         # Repository exists, fetch and checkout
         try:
             import subprocess
-            subprocess.run(
-                ['git', 'fetch', '--all'],
-                cwd=local_path,
-                capture_output=True,
-                timeout=120
-            )
-            if branch:
-                subprocess.run(
-                    ['git', 'checkout', branch],
-                    cwd=local_path,
-                    capture_output=True,
-                    timeout=30
-                )
-                subprocess.run(
-                    ['git', 'pull', 'origin', branch],
+            with track_git("fetch") as tracked:
+                tracked(subprocess.run(
+                    ['git', 'fetch', '--all'],
                     cwd=local_path,
                     capture_output=True,
                     timeout=120
-                )
+                ))
+            if branch:
+                with track_git("checkout") as tracked:
+                    tracked(subprocess.run(
+                        ['git', 'checkout', branch],
+                        cwd=local_path,
+                        capture_output=True,
+                        timeout=30
+                    ))
+                with track_git("pull") as tracked:
+                    tracked(subprocess.run(
+                        ['git', 'pull', 'origin', branch],
+                        cwd=local_path,
+                        capture_output=True,
+                        timeout=120
+                    ))
         except Exception as e:
             print(f"Error updating repo: {e}")
     else:
@@ -2187,7 +2369,8 @@ async def clone_or_pull_repo(owner: str, repo: str, token: str, branch: str = No
             cmd = ['git', 'clone', clone_url, local_path]
             if branch:
                 cmd.extend(['-b', branch])
-            subprocess.run(cmd, capture_output=True, timeout=300)
+            with track_git("clone") as tracked:
+                tracked(subprocess.run(cmd, capture_output=True, timeout=300))
         except Exception as e:
             raise Exception(f"Failed to clone repository: {e}")
     
@@ -2230,24 +2413,40 @@ async def trigger_event_processing(event_id: int, request: Request):
         repo_full_name = event['repository_full_name']
         owner, repo_name = repo_full_name.split('/')
         
-        # Clone or pull the repository
-        local_path = await clone_or_pull_repo(owner, repo_name, token, event.get('branch'))
-        
-        # Run diff analysis
         before_sha = event.get('before_sha')
         after_sha = event.get('commit_sha')
+        has_prior_commit = bool(before_sha and after_sha and before_sha != '0' * 40)
         
+        # Serve re-runs of an already analyzed range without cloning
         analysis_result = None
-        if before_sha and after_sha and before_sha != '0' * 40:
+        if has_prior_commit:
+            analysis_result = analysis_cache.lookup(repo_full_name, before_sha, after_sha)
+        
+        if analysis_result is None:
+            # Clone or pull the repository
+            local_path = await clone_or_pull_repo(owner, repo_name, token, event.get('branch'))
+        
+        # Run diff analysis
+        if has_prior_commit and analysis_result is None:
+            profile = pipeline_profiler.start_session(event_id, repo_full_name)
             try:
-                analysis_result = analyze_commits(local_path, before_sha, after_sha)
+                analysis_result = profiled(profile, analysis_cache.analyze)(
+                    repo_full_name, local_path, before_sha, after_sha
+                )
             except Exception as e:
                 print(f"Diff analysis error: {e}")
                 analysis_result = {"error": str(e)}
+            finally:
+                if profile:
+                    profile.finish()
         
         # Mark as processed with results
-        result_json = json.dumps(analysis_result) if analysis_result else None
+        result_json = await dumps_str_async(analysis_result) if analysis_result else None
         mark_webhook_event_processed(event_id, result_json)
+        pipeline_events.publish(
+            EVENT_COMPLETED, repo_full_name, event_id=event_id, commit_sha=after_sha,
+            status="failed" if analysis_result and analysis_result.get("error") else "completed"
+        )
         
         return {
             "status": "processed",
@@ -2297,15 +2496,23 @@ async def analyze_commit_range(request: Request):
                 detail="Missing required fields: owner, repo, old_commit, new_commit"
             )
         
-        # Clone or pull the repository
-        local_path = await clone_or_pull_repo(owner, repo_name, token)
+        repo_full_name = f"{owner}/{repo_name}"
         
-        # Run diff analysis
-        analysis_result = analyze_commits(local_path, old_commit, new_commit)
+        # Check the analysis cache before cloning
+        analysis_result = analysis_cache.lookup(repo_full_name, old_commit, new_commit)
+        cached = analysis_result is not None
+        
+        if not cached:
+            # Clone or pull the repository
+            local_path = await clone_or_pull_repo(owner, repo_name, token)
+            
+            # Run diff analysis
+            analysis_result = analysis_cache.analyze(repo_full_name, local_path, old_commit, new_commit)
         
         return {
             "status": "success",
-            "repository": f"{owner}/{repo_name}",
+            "repository": repo_full_name,
+            "cached": cached,
             "analysis": analysis_result
         }
         
@@ -2317,7 +2524,20 @@ async def analyze_commit_range(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/analyze/events/{event_id}")
+@app.get("/api/analyze/cache/stats")
+async def get_analysis_cache_stats(request: Request):
+    """
+    Get analysis cache statistics (hits, misses, stored entries).
+    """
+    token = request.cookies.get("github_token")
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    return analysis_cache.stats()
+
+
+@app.get("/api/analyze/events/{event_id}", response_class=FastJSONResponse)
 async def get_event_analysis(event_id: int, request: Request):
     """
     Get the analysis results for a processed webhook event.
@@ -2346,11 +2566,11 @@ async def get_event_analysis(event_id: int, request: Request):
         analysis = None
         if event.get('processing_result'):
             try:
-                analysis = json.loads(event['processing_result'])
+                analysis = await loads_async(event['processing_result'])
             except:
                 analysis = {"raw": event['processing_result']}
         
-        return {
+        return await json_response({
             "event_id": event_id,
             "event_type": event['event_type'],
             "repository": event['repository_full_name'],
@@ -2359,7 +2579,7 @@ async def get_event_analysis(event_id: int, request: Request):
             "processed": bool(event.get('processed')),
             "processed_at": event.get('processed_at'),
             "analysis": analysis
-        }
+        }, size_hint=len(event.get('processing_result') or ''))
         
     except HTTPException:
         raise
@@ -2389,37 +2609,20 @@ async def get_connected_repositories(request: Request):
     import json
     
     try:
-        # Get user info from GitHub
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid token")
-            
-            github_user = response.json()
-            user = get_user_by_github_id(github_user.get('id'))
-            
-            if not user:
-                return {"repositories": []}
+        # Resolve the user behind the token (cached, no GitHub call on a hit)
+        identity = await resolve_identity(token)
         
-        # Get user's repositories from database
-        repos = get_user_repositories(user['id'])
+        if not identity:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        if not identity.user_id:
+            return {"repositories": []}
+        
+        # Repositories with webhook status and last event, in one query
+        repos = get_user_repositories_overview(identity.user_id)
         
-        # Enrich with webhook status and last event
         result = []
         for repo in repos:
-            webhook = get_webhook_by_repository(repo['id'])
-            
-            # Get last webhook event for this repo
-            events = get_recent_webhook_events(repo['full_name'], limit=1)
-            last_event = events[0] if events else None
-            
             result.append({
                 "id": repo['id'],
                 "github_repo_id": repo['github_repo_id'],
@@ -2428,10 +2631,10 @@ async def get_connected_repositories(request: Request):
                 "description": repo.get('description'),
                 "default_branch": repo.get('default_branch', 'main'),
                 "is_private": bool(repo.get('is_private')),
-                "webhook_active": bool(webhook and webhook.get('is_active')),
-                "webhook_id": webhook['github_hook_id'] if webhook else None,
-                "last_commit": last_event.get('commit_sha') if last_event else None,
-                "last_event_at": last_event.get('created_at') if last_event else None,
+                "webhook_active": bool(repo.get('webhook_is_active')),
+                "webhook_id": repo.get('webhook_github_hook_id'),
+                "last_commit": repo.get('last_commit'),
+                "last_event_at": repo.get('last_event_at'),
             })
         
         return {"repositories": result}
@@ -2479,16 +2682,189 @@ async def get_latest_event(full_name: str, request: Request):
         }
 
 
+async def _find_repository_analysis(full_name: str, event_id: Optional[int]) -> tuple:
+    """
+    Find the processed analysis to show for a repository: the given event,
+    or the latest processed one.
+    
+    Returns:
+        (analysis dict, event id, webhook timestamp), or (None, None, None)
+    """
+    # Get repo from database
+    repo = get_repository_by_full_name(full_name)
+    if not repo:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    # Get recent webhook events with processing results
+    events = get_recent_webhook_events(full_name, limit=10)
+    
+    for event in events:
+        # If event_id specified, find that specific event
+        if event_id is not None and event.get('id') != event_id:
+            continue
+        if event.get('processed') and event.get('processing_result'):
+            try:
+                return await loads_async(event['processing_result']), event['id'], event.get('created_at')
+            except:
+                continue
+    
+    return None, None, None
+
+
+async def _build_repository_analysis(full_name: str, event_id: Optional[int], include_diffs: bool = False) -> dict:
+    """Build the analysis payload for a repository (see get_repository_analysis)"""
+    latest_analysis, analysis_event_id, webhook_timestamp = await _find_repository_analysis(full_name, event_id)
+    
+    if not latest_analysis:
+        # Return empty structure if no analysis available
+        return {
+            "repository": full_name,
+            "event_id": None,
+            "webhook_timestamp": None,
+            "summary": {
+                "files_changed": 0,
+                "lines_added": 0,
+                "lines_removed": 0,
+                "commits": 0,
+                "change_types": []
+            },
+            "files": [],
+            "logical_changes": {
+                "functions": [],
+                "classes": [],
+                "routes": [],
+                "imports": []
+            }
+        }
+    
+    # Handle both old format (direct) and new format (nested under diff_analysis)
+    diff_data = latest_analysis.get('diff_analysis', latest_analysis)
+    
+    # Transform the analysis data to match our data contract
+    # The analyzer returns 'changed_files', map to 'files' for frontend
+    files = diff_data.get('changed_files', diff_data.get('files', []))
+    logical = diff_data.get('logical_changes', {})
+    
+    # Also get summary from analyzer if available
+    analyzer_summary = diff_data.get('summary', {})
+    
+    # Calculate additions/deletions from line_ranges
+    # Each range has start/end - count actual lines, not just number of ranges
+    total_additions = 0
+    total_deletions = 0
+    for f in files:
+        line_ranges = f.get('line_ranges', [])
+        # If file has explicit additions/deletions, use those
+        if 'additions' in f:
+            total_additions += f['additions']
+        else:
+            # Count actual lines from ranges (end - start + 1 for each range)
+            for r in line_ranges:
+                if r.get('type') in ['added', 'modified']:
+                    start = r.get('start', 0)
+                    end = r.get('end', start)
+                    total_additions += (end - start + 1)
+        
+        if 'deletions' in f:
+            total_deletions += f['deletions']
+        else:
+            for r in line_ranges:
+                if r.get('type') == 'deleted':
+                    start = r.get('start', 0)
+                    end = r.get('end', start)
+                    total_deletions += (end - start + 1)
+    
+    # Determine change types from files
+    change_types = set()
+    for f in files:
+        file_path = f.get('path', '').lower()
+        if '/api/' in file_path or 'routes' in file_path or 'endpoints' in file_path:
+            change_types.add('api')
+        elif '/service' in file_path or '/services/' in file_path:
+            change_types.add('service')
+        elif any(x in file_path for x in ['.html', '.css', '.jsx', '.tsx', '/ui/', '/components/']):
+            change_types.add('ui')
+        elif any(x in file_path for x in ['config', '.json', '.yaml', '.yml', '.env', '.toml']):
+            change_types.add('config')
+        elif 'test' in file_path or 'spec' in file_path:
+            change_types.add('test')
+    
+    # Add change types from logical changes
+    if logical.get('routes'):
+        change_types.add('api')
+    
+    if not change_types:
+        change_types.add('other')
+    
+    return {
+        "repository": full_name,
+        "event_id": analysis_event_id,
+        "webhook_timestamp": webhook_timestamp,
+        "summary": {
+            "files_changed": analyzer_summary.get('total_files', len(files)),
+            "lines_added": total_additions,
+            "lines_removed": total_deletions,
+            "commits": latest_analysis.get('commits_analyzed', 1),
+            "change_types": list(change_types)
+        },
+        "files": [
+            {
+                "path": f.get('path', ''),
+                "change_type": f.get('status', f.get('change_type', 'modified')),
+                "additions": f.get('additions', sum((r.get('end', r.get('start', 0)) - r.get('start', 0) + 1) for r in f.get('line_ranges', []) if r.get('type') in ['added', 'modified'])),
+                "deletions": f.get('deletions', sum((r.get('end', r.get('start', 0)) - r.get('start', 0) + 1) for r in f.get('line_ranges', []) if r.get('type') == 'deleted')),
+                "has_diff": bool(f.get('diff')),
+                # Diffs are large: served per file by /diff unless asked for
+                **({"diff": f.get('diff', '')} if include_diffs else {})
+            }
+            for f in files
+        ],
+        "logical_changes": {
+            "functions": [
+                {
+                    "name": n.get('name'),
+                    "change_type": "modified",
+                    "file": f.get('path'),
+                    "line_start": n.get('start_line'),
+                    "line_end": n.get('end_line')
+                }
+                for f in files
+                for n in f.get('changed_nodes', [])
+                if n.get('type') == 'function'
+            ],
+            "classes": [
+                {
+                    "name": n.get('name'),
+                    "change_type": "modified", 
+                    "file": f.get('path'),
+                    "line_start": n.get('start_line'),
+                    "line_end": n.get('end_line')
+                }
+                for f in files
+                for n in f.get('changed_nodes', [])
+                if n.get('type') == 'class'
+            ],
+            "routes": [],
+            "imports": []
+        }
+    }
+
+
 @app.get("/api/repositories/{full_name:path}/analysis")
-async def get_repository_analysis(full_name: str, request: Request, event_id: Optional[int] = None):
+async def get_repository_analysis(full_name: str, request: Request, event_id: Optional[int] = None,
+                                  include_diffs: bool = False):
     """
     Get analysis data for a repository.
     If event_id is provided, get analysis for that specific event.
     Otherwise, get the latest analysis.
     
+    File diffs are not embedded unless include_diffs=true; fetch them one
+    file at a time from /api/repositories/{full_name}/diff.
+    
     Data Contract:
     {
         "repository": "owner/repo",
+        "event_id": int,
         "webhook_timestamp": "ISO datetime",
         "summary": {
             "files_changed": int,
@@ -2503,7 +2879,8 @@ async def get_repository_analysis(full_name: str, request: Request, event_id: Op
                 "change_type": "modified|added|deleted|renamed",
                 "additions": int,
                 "deletions": int,
-                "diff": "unified diff string"
+                "has_diff": bool,
+                "diff": "unified diff string" (only with include_diffs=true)
             }
         ],
         "logical_changes": {
@@ -2521,176 +2898,59 @@ async def get_repository_analysis(full_name: str, request: Request, event_id: Op
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    import json
-    
     try:
-        # Get repo from database
-        repo = get_repository_by_full_name(full_name)
-        if not repo:
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        # Get recent webhook events with processing results
-        events = get_recent_webhook_events(full_name, limit=10)
-        
-        # Find the target event (specific or latest)
-        latest_analysis = None
-        webhook_timestamp = None
+        return await response_cache.respond(
+            request, ("repository_analysis", full_name, event_id, include_diffs),
+            lambda: _build_repository_analysis(full_name, event_id, include_diffs)
+        )
         
-        for event in events:
-            # If event_id specified, find that specific event
-            if event_id is not None:
-                if event.get('id') == event_id and event.get('processed') and event.get('processing_result'):
-                    try:
-                        latest_analysis = json.loads(event['processing_result'])
-                        webhook_timestamp = event.get('created_at')
-                        break
-                    except:
-                        continue
-            else:
-                # Otherwise get the latest processed event
-                if event.get('processed') and event.get('processing_result'):
-                    try:
-                        latest_analysis = json.loads(event['processing_result'])
-                        webhook_timestamp = event.get('created_at')
-                        break
-                    except:
-                        continue
-        
-        if not latest_analysis:
-            # Return empty structure if no analysis available
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _build_repository_diff(full_name: str, event_id: Optional[int], path: str) -> dict:
+    """Build the diff payload for one file of an analysis (see get_repository_file_diff)"""
+    analysis, analysis_event_id, _ = await _find_repository_analysis(full_name, event_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="No analysis available")
+    
+    diff_data = analysis.get('diff_analysis', analysis)
+    for f in diff_data.get('changed_files', diff_data.get('files', [])):
+        if f.get('path') == path:
             return {
                 "repository": full_name,
-                "webhook_timestamp": None,
-                "summary": {
-                    "files_changed": 0,
-                    "lines_added": 0,
-                    "lines_removed": 0,
-                    "commits": 0,
-                    "change_types": []
-                },
-                "files": [],
-                "logical_changes": {
-                    "functions": [],
-                    "classes": [],
-                    "routes": [],
-                    "imports": []
-                }
+                "event_id": analysis_event_id,
+                "path": path,
+                "diff": f.get('diff', '')
             }
-        
-        # Handle both old format (direct) and new format (nested under diff_analysis)
-        diff_data = latest_analysis.get('diff_analysis', latest_analysis)
-        
-        # Transform the analysis data to match our data contract
-        # The analyzer returns 'changed_files', map to 'files' for frontend
-        files = diff_data.get('changed_files', diff_data.get('files', []))
-        logical = diff_data.get('logical_changes', {})
-        
-        # Also get summary from analyzer if available
-        analyzer_summary = diff_data.get('summary', {})
-        
-        # Calculate additions/deletions from line_ranges
-        # Each range has start/end - count actual lines, not just number of ranges
-        total_additions = 0
-        total_deletions = 0
-        for f in files:
-            line_ranges = f.get('line_ranges', [])
-            # If file has explicit additions/deletions, use those
-            if 'additions' in f:
-                total_additions += f['additions']
-            else:
-                # Count actual lines from ranges (end - start + 1 for each range)
-                for r in line_ranges:
-                    if r.get('type') in ['added', 'modified']:
-                        start = r.get('start', 0)
-                        end = r.get('end', start)
-                        total_additions += (end - start + 1)
-            
-            if 'deletions' in f:
-                total_deletions += f['deletions']
-            else:
-                for r in line_ranges:
-                    if r.get('type') == 'deleted':
-                        start = r.get('start', 0)
-                        end = r.get('end', start)
-                        total_deletions += (end - start + 1)
-        
-        # Determine change types from files
-        change_types = set()
-        for f in files:
-            file_path = f.get('path', '').lower()
-            if '/api/' in file_path or 'routes' in file_path or 'endpoints' in file_path:
-                change_types.add('api')
-            elif '/service' in file_path or '/services/' in file_path:
-                change_types.add('service')
-            elif any(x in file_path for x in ['.html', '.css', '.jsx', '.tsx', '/ui/', '/components/']):
-                change_types.add('ui')
-            elif any(x in file_path for x in ['config', '.json', '.yaml', '.yml', '.env', '.toml']):
-                change_types.add('config')
-            elif 'test' in file_path or 'spec' in file_path:
-                change_types.add('test')
-        
-        # Add change types from logical changes
-        if logical.get('routes'):
-            change_types.add('api')
-        
-        if not change_types:
-            change_types.add('other')
-        
-        return {
-            "repository": full_name,
-            "webhook_timestamp": webhook_timestamp,
-            "summary": {
-                "files_changed": analyzer_summary.get('total_files', len(files)),
-                "lines_added": total_additions,
-                "lines_removed": total_deletions,
-                "commits": latest_analysis.get('commits_analyzed', 1),
-                "change_types": list(change_types)
-            },
-            "files": [
-                {
-                    "path": f.get('path', ''),
-                    "change_type": f.get('status', f.get('change_type', 'modified')),
-                    "additions": f.get('additions', sum((r.get('end', r.get('start', 0)) - r.get('start', 0) + 1) for r in f.get('line_ranges', []) if r.get('type') in ['added', 'modified'])),
-                    "deletions": f.get('deletions', sum((r.get('end', r.get('start', 0)) - r.get('start', 0) + 1) for r in f.get('line_ranges', []) if r.get('type') == 'deleted')),
-                    "diff": f.get('diff', '')
-                }
-                for f in files
-            ],
-            "logical_changes": {
-                "functions": [
-                    {
-                        "name": n.get('name'),
-                        "change_type": "modified",
-                        "file": f.get('path'),
-                        "line_start": n.get('start_line'),
-                        "line_end": n.get('end_line')
-                    }
-                    for f in files
-                    for n in f.get('changed_nodes', [])
-                    if n.get('type') == 'function'
-                ],
-                "classes": [
-                    {
-                        "name": n.get('name'),
-                        "change_type": "modified", 
-                        "file": f.get('path'),
-                        "line_start": n.get('start_line'),
-                        "line_end": n.get('end_line')
-                    }
-                    for f in files
-                    for n in f.get('changed_nodes', [])
-                    if n.get('type') == 'class'
-                ],
-                "routes": [],
-                "imports": []
-            }
-        }
+    
+    raise HTTPException(status_code=404, detail="File not found in analysis")
+
+
+@app.get("/api/repositories/{full_name:path}/diff")
+async def get_repository_file_diff(full_name: str, path: str, request: Request, event_id: Optional[int] = None):
+    """
+    Get the unified diff of one changed file from a repository analysis
+    (the event from /analysis, or the latest processed event).
+    """
+    token = request.cookies.get("github_token")
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    try:
+        return await response_cache.respond(
+            request, ("repository_diff", full_name, event_id, path),
+            lambda: _build_repository_diff(full_name, event_id, path)
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -2704,7 +2964,7 @@ async def get_repository_events(full_name: str, request: Request, limit: int = 2
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    try:
+    def build():
         events = get_recent_webhook_events(full_name, limit=limit)
         
         return {
@@ -2721,6 +2981,9 @@ async def get_repository_events(full_name: str, request: Request, limit: int = 2
                 for e in events
             ]
         }
+    
+    try:
+        return await response_cache.respond(request, ("repository_events", full_name, limit), build)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3234,7 +3497,7 @@ async def run_impact_analysis_from_event(event_id: int, request: Request):
             raise HTTPException(status_code=400, detail="Event not yet processed. Please wait for diff analysis to complete.")
         
         # Parse the analysis result
-        analysis = json.loads(event['processing_result'])
+        analysis = await loads_async(event['processing_result'])
         
         # Extract features from analysis
         files = analysis.get('changed_files', analysis.get('files', []))
@@ -3322,14 +3585,14 @@ async def get_recent_pipeline_results(request: Request, repository: Optional[str
     
     import json
     
-    try:
+    async def build():
         events = get_recent_webhook_events(repository, min(limit, 50))
         
         results = []
         for event in events:
             if event.get('processed') and event.get('processing_result'):
                 try:
-                    result_data = json.loads(event['processing_result'])
+                    result_data = await loads_async(event['processing_result'])
                     impact = result_data.get('impact_analysis')
                     
                     results.append({
@@ -3351,6 +3614,9 @@ async def get_recent_pipeline_results(request: Request, repository: Optional[str
             "results": results,
             "count": len(results)
         }
+    
+    try:
+        return await response_cache.respond(request, ("pipeline_recent", repository, min(limit, 50)), build)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3368,7 +3634,7 @@ async def get_pipeline_stats(request: Request):
     
     import json
     
-    try:
+    async def build():
         # Get recent events
         events = get_recent_webhook_events(None, 100)
         
@@ -3381,7 +3647,7 @@ async def get_pipeline_stats(request: Request):
         for event in events:
             if event.get('processed') and event.get('processing_result'):
                 try:
-                    result_data = json.loads(event['processing_result'])
+                    result_data = await loads_async(event['processing_result'])
                     impact = result_data.get('impact_analysis')
                     
                     if impact:
@@ -3417,12 +3683,189 @@ async def get_pipeline_stats(request: Request):
             "low_risk_changes": low_risk_count,
             "latest_analysis": latest_analysis
         }
+    
+    try:
+        return await response_cache.respond(request, ("pipeline_stats",), build)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/pipeline/event/{event_id}")
+@app.get("/api/pipeline/queue")
+async def get_pipeline_queue(request: Request):
+    """
+    Get the pipeline scheduler state (queued/running events, stage usage).
+    """
+    token = request.cookies.get("github_token")
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    return pipeline_scheduler.snapshot()
+
+
+@app.get("/api/pipeline/events/stream")
+async def stream_pipeline_events(request: Request, repository: Optional[str] = None):
+    """
+    Server-Sent Events stream of pipeline notifications (event_created,
+    stage_progress, event_completed), optionally for one repository.
+
+    Replaces frontend polling: an idle stream sends only keep-alive
+    comments and runs no database queries. Reconnecting EventSource
+    clients get the messages they missed via the Last-Event-ID header.
+    """
+    token = request.cookies.get("github_token")
+
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    last_event_id = request.headers.get("Last-Event-ID")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    return StreamingResponse(
+        pipeline_events.stream(repository, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def require_admin(request: Request):
+    """Check the admin token header (admin endpoints are disabled without ADMIN_TOKEN)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    
+    provided = request.headers.get("X-Admin-Token", "")
+    if not secrets.compare_digest(provided, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/api/admin/profiler")
+async def get_profiler_status(request: Request, repository: Optional[str] = None, event_id: Optional[int] = None):
+    """
+    Get the profiler arming state and recently stored profiles.
+    """
+    require_admin(request)
+    
+    return {
+        **pipeline_profiler.status(),
+        "profiles": get_pipeline_profiles(event_id=event_id, repository_full_name=repository)
+    }
+
+
+@app.post("/api/admin/profiler")
+async def arm_profiler(request: Request):
+    """
+    Profile the next N pipeline runs.
+    
+    Request body:
+    {
+        "runs": 5,
+        "repository": "owner/repo",   # optional, any repository if omitted
+        "interval_ms": 5              # optional sampling interval
+    }
+    """
+    require_admin(request)
+    
+    try:
+        body = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    
+    try:
+        runs = int(body.get('runs', 1))
+        interval_ms = float(body.get('interval_ms', 5))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="runs and interval_ms must be numbers")
+    
+    return pipeline_profiler.arm(runs, repository=body.get('repository'), interval_ms=interval_ms)
+
+
+@app.delete("/api/admin/profiler")
+async def disarm_profiler(request: Request, repository: Optional[str] = None):
+    """
+    Stop profiling upcoming runs (globally, or for one repository).
+    """
+    require_admin(request)
+    
+    pipeline_profiler.disarm(repository)
+    return pipeline_profiler.status()
+
+
+@app.get("/api/admin/profiler/profiles/{profile_id}")
+async def download_profile(profile_id: int, request: Request):
+    """
+    Download a stored profile in collapsed-stack format.
+    """
+    require_admin(request)
+    
+    profile = get_pipeline_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    filename = f"etta-event-{profile['event_id']}-profile-{profile_id}.folded"
+    return Response(
+        content=profile['data'] or "",
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/api/pipeline/timings")
+async def get_pipeline_timings(request: Request, repository: Optional[str] = None, since_hours: int = 168):
+    """
+    Get per-stage latency percentiles (p50/p95/p99) and histograms.
+
+    Query params:
+    - repository: Restrict to one repository (owner/repo)
+    - since_hours: Time window in hours (default 7 days)
+    """
+    token = request.cookies.get("github_token")
+
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        durations = get_pipeline_stage_durations(repository, since_hours=since_hours)
+        return {
+            "repository": repository,
+            "since_hours": since_hours,
+            "stages": {
+                stage: summarize_durations(values)
+                for stage, values in durations.items()
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/pipeline/event/{event_id}/timings")
+async def get_pipeline_event_timings(event_id: int, request: Request):
+    """
+    Get the stage spans recorded for a specific pipeline event.
+    """
+    token = request.cookies.get("github_token")
+
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    spans = get_pipeline_spans(event_id)
+    for span in spans:
+        try:
+            span['attributes'] = json.loads(span['attributes']) if span['attributes'] else {}
+        except (json.JSONDecodeError, TypeError):
+            span['attributes'] = {}
+
+    return {
+        "event_id": event_id,
+        "total_ms": round(sum(s['duration_ms'] for s in spans), 2),
+        "spans": spans
+    }
+
+
+@app.get("/api/pipeline/event/{event_id}", response_class=FastJSONResponse)
 async def get_pipeline_event_detail(event_id: int, request: Request):
     """
     Get detailed pipeline result for a specific event.
@@ -3449,11 +3892,11 @@ async def get_pipeline_event_detail(event_id: int, request: Request):
         result_data = None
         if event.get('processing_result'):
             try:
-                result_data = json.loads(event['processing_result'])
+                result_data = await loads_async(event['processing_result'])
             except:
                 result_data = {"raw": event['processing_result']}
         
-        return {
+        return await json_response({
             "event_id": event['id'],
             "repository": event['repository_full_name'],
             "branch": event.get('branch'),
@@ -3465,7 +3908,7 @@ async def get_pipeline_event_detail(event_id: int, request: Request):
             "diff_analysis": result_data.get('diff_analysis') if result_data else None,
             "impact_analysis": result_data.get('impact_analysis') if result_data else None,
             "pipeline_status": result_data.get('pipeline_status') if result_data else 'pending'
-        }
+        }, size_hint=len(event.get('processing_result') or ''))
         
     except HTTPException:
         raise
@@ -3484,6 +3927,11 @@ async def sync_commits_from_github(request: Request, repository: Optional[str] =
     """
     Sync recent commits from GitHub API directly.
     This bypasses webhooks and fetches commits directly from GitHub.
+    
+    Repositories are synced concurrently; each one is paged back to its
+    last synced commit (see CommitSyncEngine). Requests are sent as
+    background traffic so the rate limit scheduler keeps part of the token
+    budget for interactive calls.
     """
     token = request.cookies.get("github_token")
     
@@ -3491,155 +3939,56 @@ async def sync_commits_from_github(request: Request, repository: Optional[str] =
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     try:
-        synced_count = 0
-        errors = []
+        # Get user's repos if no specific repo provided
+        if repository:
+            repos_to_sync = [repository]
+        else:
+            # Get connected repos from database
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT full_name FROM repositories")
+                repos_to_sync = [row[0] for row in cursor.fetchall()]
         
-        async with httpx.AsyncClient() as client:
-            # Get user's repos if no specific repo provided
-            if repository:
-                repos_to_sync = [repository]
-            else:
-                # Get connected repos from database
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT full_name FROM repositories")
-                    repos_to_sync = [row[0] for row in cursor.fetchall()]
-            
-            if not repos_to_sync:
-                return {"synced": 0, "message": "No repositories connected"}
-            
-            for repo_full_name in repos_to_sync:
-                try:
-                    owner, repo = repo_full_name.split('/')
-                    
-                    # Fetch recent commits from GitHub
-                    commits_response = await client.get(
-                        f"https://api.github.com/repos/{owner}/{repo}/commits",
-                        params={"per_page": 20},
-                        headers={
-                            "Authorization": f"Bearer {token}",
-                            "Accept": "application/vnd.github.v3+json",
-                        },
-                    )
-                    
-                    if commits_response.status_code != 200:
-                        errors.append(f"{repo_full_name}: Failed to fetch commits")
-                        continue
-                    
-                    commits = commits_response.json()
-                    
-                    for commit in commits:
-                        commit_sha = commit['sha']
-                        
-                        # Check if we already have this commit
-                        existing = get_webhook_event_by_delivery_id(f"sync-{commit_sha}")
-                        if existing:
-                            continue
-                        
-                        # Also check by commit_sha
-                        with get_db_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute(
-                                "SELECT id FROM webhook_events WHERE commit_sha = ?",
-                                (commit_sha,)
-                            )
-                            if cursor.fetchone():
-                                continue
-                        
-                        # Get the parent SHA for diff
-                        parent_sha = commit['parents'][0]['sha'] if commit.get('parents') else None
-                        
-                        # Create a synthetic webhook event
-                        event_data = {
-                            "github_delivery_id": f"sync-{commit_sha}",
-                            "event_type": "push",
-                            "repository_full_name": repo_full_name,
-                            "branch": "main",
-                            "commit_sha": commit_sha,
-                            "before_sha": parent_sha,
-                            "payload": json.dumps({
-                                "ref": "refs/heads/main",
-                                "after": commit_sha,
-                                "before": parent_sha,
-                                "repository": {"full_name": repo_full_name},
-                                "commits": [{
-                                    "id": commit_sha,
-                                    "message": commit['commit']['message'],
-                                    "author": commit['commit']['author'],
-                                    "added": [],
-                                    "modified": [],
-                                    "removed": []
-                                }],
-                                "head_commit": {
-                                    "id": commit_sha,
-                                    "message": commit['commit']['message']
-                                }
-                            })
-                        }
-                        
-                        # Create the event in database
-                        event_id = create_webhook_event(
-                            webhook_id=1,
-                            github_delivery_id=event_data["github_delivery_id"],
-                            event_type=event_data["event_type"],
-                            repository_full_name=event_data["repository_full_name"],
-                            branch=event_data["branch"],
-                            commit_sha=event_data["commit_sha"],
-                            before_sha=event_data["before_sha"],
-                            payload=event_data["payload"]
-                        )
-                        
-                        if event_id:
-                            synced_count += 1
-                            
-                            # Process the event immediately
-                            try:
-                                # Get diff from GitHub
-                                diff_response = await client.get(
-                                    f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_sha}",
-                                    headers={
-                                        "Authorization": f"Bearer {token}",
-                                        "Accept": "application/vnd.github.v3.diff",
-                                    },
-                                )
-                                
-                                if diff_response.status_code == 200:
-                                    diff_content = diff_response.text
-                                    
-                                    # Run impact analysis
-                                    features = extract_features_from_diff(diff_content)
-                                    analysis_result = run_impact_analysis_from_features(features)
-                                    
-                                    # Store the result
-                                    processing_result = {
-                                        "pipeline_status": "completed",
-                                        "diff_analysis": features,
-                                        "impact_analysis": analysis_result
-                                    }
-                                    
-                                    mark_webhook_event_processed(
-                                        event_id,
-                                        json.dumps(processing_result)
-                                    )
-                            except Exception as proc_error:
-                                print(f"Error processing commit {commit_sha}: {proc_error}")
-                                
-                except Exception as repo_error:
-                    errors.append(f"{repo_full_name}: {str(repo_error)}")
+        if not repos_to_sync:
+            return {"synced": 0, "message": "No repositories connected"}
+        
+        with background_requests():
+            async with http_client() as client:
+                engine = CommitSyncEngine(client, token, score_commit_diff)
+                result = await engine.sync(repos_to_sync)
         
         return {
-            "synced": synced_count,
+            "synced": result["synced"],
             "repositories": repos_to_sync,
-            "errors": errors if errors else None,
-            "message": f"Synced {synced_count} new commits"
+            "per_repository": result["per_repository"],
+            "errors": result["errors"] or None,
+            "message": f"Synced {result['synced']} new commits"
         }
         
+    except GitHubRateLimitError:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def score_commit_diff(diff_text: str, repo_full_name: str, branch: str,
+                      commit_sha: str, parent_sha: Optional[str] = None) -> dict:
+    """Run change detection and impact analysis on a diff fetched from GitHub"""
+    analysis_result = analyze_unified_diff(diff_text, parent_sha or "", commit_sha)
+    features = extract_features_from_diff(analysis_result, repo_full_name, branch, commit_sha)
+    impact_result = run_impact_analysis_from_features(features)
+    
+    return {
+        "pipeline_status": "completed",
+        "source": "github_sync",
+        "diff_analysis": analysis_result,
+        "impact_analysis": impact_result,
+        "processed_at": datetime.now().isoformat()
+    }
+
+
 @app.get("/test-runs", response_class=HTMLResponse)
 async def test_runs_page():
     """Serve the test runs page"""
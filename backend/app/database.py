@@ -5,13 +5,69 @@ SQLite database initialization and user management
 
 import sqlite3
 import os
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Callable, List
 from contextlib import contextmanager
 
+from backend.api.metrics import DB_QUERIES, DB_QUERY_DURATION, sql_operation
+
 # Database configuration
 DB_PATH = os.getenv("DATABASE_PATH", "backend/data/etta_x.db")
 
+# Called after repository or webhook event writes commit (the app registers
+# its response cache invalidation here)
+_write_hooks: List[Callable[[], None]] = []
+
+
+def on_write(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register a function to call after repository or webhook event writes"""
+    if hook not in _write_hooks:
+        _write_hooks.append(hook)
+    return hook
+
+
+def _notify_write():
+    for hook in _write_hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error in database write hook: {e}")
+
+
+def _record_query(sql: str, started: float):
+    operation = sql_operation(sql)
+    DB_QUERIES.inc(operation=operation)
+    DB_QUERY_DURATION.observe(time.perf_counter() - started, operation=operation)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records statement counts and times for /metrics"""
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (and shortcut execute) are instrumented"""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
 
 def ensure_db_directory():
     """Ensure the database directory exists"""
@@ -24,7 +80,7 @@ def ensure_db_directory():
 def get_db_connection():
     """Context manager for database connections"""
     ensure_db_directory()
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = sqlite3.connect(DB_PATH, timeout=30.0, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
     # Enable WAL mode to prevent database locks
     conn.execute('PRAGMA journal_mode=WAL')
@@ -165,6 +221,116 @@ def init_database():
             ON webhook_events(repository_full_name, branch)
         """)
         
+        # Latest event per repository (Repositories view)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_webhook_events_repo_created 
+            ON webhook_events(repository_full_name, created_at)
+        """)
+        
+        # Analysis cache table - stores diff/AST analysis results per commit range
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                repository_full_name VARCHAR(255) NOT NULL,
+                commit_key VARCHAR(100) NOT NULL,
+                tree_key VARCHAR(100),
+                analyzer_version VARCHAR(50) NOT NULL,
+                result TEXT NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                last_hit_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(repository_full_name, commit_key, analyzer_version)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_analysis_cache_tree 
+            ON analysis_cache(repository_full_name, tree_key, analyzer_version)
+        """)
+        
+        # LLM cache table - stores raw LLM responses per prompt/model/options hash
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cache_key VARCHAR(64) UNIQUE NOT NULL,
+                model VARCHAR(255) NOT NULL,
+                template_version VARCHAR(50) NOT NULL,
+                response TEXT NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used 
+            ON llm_cache(last_used_at)
+        """)
+        
+        # Pipeline spans table - stores per-stage timings of pipeline runs
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_spans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER NOT NULL,
+                repository_full_name VARCHAR(255) NOT NULL,
+                stage VARCHAR(100) NOT NULL,
+                start_offset_ms REAL DEFAULT 0,
+                duration_ms REAL NOT NULL,
+                status VARCHAR(20) DEFAULT 'ok',
+                attributes TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (event_id) REFERENCES webhook_events(id) ON DELETE CASCADE
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pipeline_spans_event 
+            ON pipeline_spans(event_id)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pipeline_spans_repo_stage 
+            ON pipeline_spans(repository_full_name, stage, created_at)
+        """)
+        
+        # Pipeline profiles table - stores sampled stacks of profiled runs
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_profiles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER,
+                repository_full_name VARCHAR(255),
+                format VARCHAR(20) DEFAULT 'collapsed',
+                samples INTEGER DEFAULT 0,
+                interval_ms REAL,
+                duration_ms REAL,
+                data TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pipeline_profiles_event 
+            ON pipeline_profiles(event_id)
+        """)
+        
+        # Sync checkpoints table - last commit synced from the GitHub API per repository,
+        # plus the resume point of a catch-up that has not reached it yet
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_checkpoints (
+                repository_full_name VARCHAR(255) PRIMARY KEY,
+                last_synced_sha VARCHAR(40) NOT NULL,
+                commits_synced INTEGER DEFAULT 0,
+                last_synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                resume_sha VARCHAR(40),
+                resume_head_sha VARCHAR(40)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_webhook_events_commit_sha 
+            ON webhook_events(commit_sha)
+        """)
+        
         # App metadata table - stores application state
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS app_metadata (
@@ -396,6 +562,7 @@ def create_repository(user_id: int, repo_data: dict) -> Optional[dict]:
             ))
             
             conn.commit()
+            _notify_write()
             
             return get_repository_by_github_id(user_id, repo_data.get('id'))
             
@@ -436,6 +603,42 @@ def get_user_repositories(user_id: int) -> list:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def get_user_repositories_overview(user_id: int) -> list:
+    """
+    Get all repositories for a user with their active webhook and latest
+    event in one query (instead of two extra queries per repository).
+    
+    Each row has the repository columns plus webhook_github_hook_id,
+    webhook_is_active, last_commit and last_event_at (NULL when missing).
+    The latest event is picked through idx_webhook_events_repo_created, and
+    event payloads are never read.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT r.*,
+                   w.github_hook_id AS webhook_github_hook_id,
+                   w.is_active AS webhook_is_active,
+                   e.commit_sha AS last_commit,
+                   e.created_at AS last_event_at
+            FROM repositories r
+            LEFT JOIN webhooks w ON w.id = (
+                SELECT id FROM webhooks
+                WHERE repository_id = r.id AND is_active = 1
+                LIMIT 1
+            )
+            LEFT JOIN webhook_events e ON e.id = (
+                SELECT id FROM webhook_events
+                WHERE repository_full_name = r.full_name
+                ORDER BY created_at DESC, id DESC
+                LIMIT 1
+            )
+            WHERE r.user_id = ?
+            ORDER BY r.updated_at DESC
+        """, (user_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+
 # ==================== WEBHOOK CRUD ====================
 
 def create_webhook(repository_id: int, github_hook_id: int, webhook_url: str, 
@@ -568,6 +771,7 @@ def create_webhook_event(event_data: dict) -> Optional[dict]:
             ))
             
             conn.commit()
+            _notify_write()
             
             return get_webhook_event_by_id(cursor.lastrowid)
             
@@ -622,9 +826,103 @@ def mark_webhook_event_processed(event_id: int, result: str = None) -> bool:
             WHERE id = ?
         """, (result, event_id))
         conn.commit()
+        _notify_write()
         return cursor.rowcount > 0
 
 
+def get_existing_commit_shas(commit_shas: list) -> set:
+    """Return which of the given commit SHAs already have a webhook event"""
+    existing = set()
+    if not commit_shas:
+        return existing
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(commit_shas), 500):
+            chunk = commit_shas[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT commit_sha FROM webhook_events WHERE commit_sha IN ({placeholders})",
+                chunk
+            )
+            existing.update(row['commit_sha'] for row in cursor.fetchall())
+    return existing
+
+
+def get_unprocessed_sync_events(repository_full_name: str, limit: int = 100) -> list:
+    """Get commit sync events of a repository that were stored but not processed"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, branch, commit_sha, before_sha FROM webhook_events
+            WHERE repository_full_name = ? AND processed = 0 AND github_delivery_id LIKE 'sync-%'
+            ORDER BY created_at ASC
+            LIMIT ?
+        """, (repository_full_name, limit))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def create_webhook_events_batch(events: list) -> list:
+    """
+    Create several webhook event records in one transaction.
+    
+    Returns:
+        List of new event IDs (None for events skipped as duplicates)
+    """
+    import json
+    
+    ids = []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            for event_data in events:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO webhook_events (
+                        webhook_id, github_delivery_id, event_type,
+                        repository_full_name, branch, commit_sha, before_sha, payload
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    event_data.get('webhook_id'),
+                    event_data.get('delivery_id'),
+                    event_data.get('event_type'),
+                    event_data.get('repository_full_name'),
+                    event_data.get('branch'),
+                    event_data.get('commit_sha'),
+                    event_data.get('before_sha'),
+                    json.dumps(event_data.get('payload', {})),
+                ))
+                ids.append(cursor.lastrowid if cursor.rowcount else None)
+            conn.commit()
+            _notify_write()
+            return ids
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"Error creating webhook events: {e}")
+            return []
+
+
+def mark_webhook_events_processed(results: list) -> int:
+    """Mark several webhook events processed in one transaction ([(event_id, result), ...])"""
+    if not results:
+        return 0
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            UPDATE webhook_events 
+            SET processed = 1,
+                processed_at = CURRENT_TIMESTAMP,
+                processing_result = ?
+            WHERE id = ?
+        """, [(result, event_id) for event_id, result in results])
+        conn.commit()
+        _notify_write()
+        return cursor.rowcount
+
+
 def get_recent_webhook_events(repository_full_name: str = None, 
                                limit: int = 50) -> list:
     """Get recent webhook events, optionally filtered by repository"""
@@ -647,4 +945,361 @@ def get_recent_webhook_events(repository_full_name: str = None,
         
         return [dict(row) for row in cursor.fetchall()]
 
+
+# ==================== ANALYSIS CACHE CRUD ====================
+
+def get_analysis_cache_entry(repository_full_name: str, analyzer_version: str,
+                             commit_key: str = None, tree_key: str = None) -> Optional[dict]:
+    """Get a cached analysis result by commit key or tree key, recording the hit"""
+    if not commit_key and not tree_key:
+        return None
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        if commit_key:
+            cursor.execute("""
+                SELECT * FROM analysis_cache 
+                WHERE repository_full_name = ? AND commit_key = ? AND analyzer_version = ?
+            """, (repository_full_name, commit_key, analyzer_version))
+        else:
+            cursor.execute("""
+                SELECT * FROM analysis_cache 
+                WHERE repository_full_name = ? AND tree_key = ? AND analyzer_version = ?
+                ORDER BY created_at DESC 
+                LIMIT 1
+            """, (repository_full_name, tree_key, analyzer_version))
+        
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        cursor.execute("""
+            UPDATE analysis_cache 
+            SET hit_count = hit_count + 1, last_hit_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (row['id'],))
+        conn.commit()
+        
+        return dict(row)
+
+
+def store_analysis_cache_entry(repository_full_name: str, analyzer_version: str,
+                               commit_key: str, result: str, tree_key: str = None) -> bool:
+    """Store (or replace) a cached analysis result"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO analysis_cache (
+                    repository_full_name, commit_key, tree_key, analyzer_version, result
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(repository_full_name, commit_key, analyzer_version) DO UPDATE SET
+                    tree_key = excluded.tree_key,
+                    result = excluded.result,
+                    created_at = CURRENT_TIMESTAMP
+            """, (repository_full_name, commit_key, tree_key, analyzer_version, result))
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Error storing analysis cache entry: {e}")
+            return False
+
+
+def get_analysis_cache_summary() -> dict:
+    """Get aggregate statistics for the analysis cache table"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) as entries, 
+                   COALESCE(SUM(hit_count), 0) as total_hits,
+                   COALESCE(SUM(LENGTH(result)), 0) as total_bytes
+            FROM analysis_cache
+        """)
+        row = cursor.fetchone()
+        return dict(row) if row else {"entries": 0, "total_hits": 0, "total_bytes": 0}
+
+
+# ==================== LLM CACHE CRUD ====================
+
+def get_llm_cache_entry(cache_key: str, max_age_seconds: int = None) -> Optional[dict]:
+    """Get a cached LLM response by key (ignoring entries older than max_age_seconds), recording the hit"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        if max_age_seconds:
+            cursor.execute("""
+                SELECT * FROM llm_cache 
+                WHERE cache_key = ? AND created_at >= datetime('now', ?)
+            """, (cache_key, f"-{int(max_age_seconds)} seconds"))
+        else:
+            cursor.execute("SELECT * FROM llm_cache WHERE cache_key = ?", (cache_key,))
+        
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        cursor.execute("""
+            UPDATE llm_cache 
+            SET hit_count = hit_count + 1, last_used_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (row['id'],))
+        conn.commit()
+        
+        return dict(row)
+
+
+def store_llm_cache_entry(cache_key: str, model: str, template_version: str, response: str,
+                          max_entries: int = None, max_age_seconds: int = None) -> bool:
+    """
+    Store (or replace) a cached LLM response, then drop expired entries and
+    the least recently used ones beyond max_entries.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO llm_cache (cache_key, model, template_version, response)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = CURRENT_TIMESTAMP,
+                    last_used_at = CURRENT_TIMESTAMP
+            """, (cache_key, model, template_version, response))
+            
+            if max_age_seconds:
+                cursor.execute("""
+                    DELETE FROM llm_cache WHERE created_at < datetime('now', ?)
+                """, (f"-{int(max_age_seconds)} seconds",))
+            if max_entries:
+                cursor.execute("""
+                    DELETE FROM llm_cache WHERE id NOT IN (
+                        SELECT id FROM llm_cache ORDER BY last_used_at DESC, id DESC LIMIT ?
+                    )
+                """, (max_entries,))
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Error storing LLM cache entry: {e}")
+            return False
+
+
+def clear_llm_cache() -> int:
+    """Delete all cached LLM responses; returns the number removed"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM llm_cache")
+        conn.commit()
+        return cursor.rowcount
+
+
+def get_llm_cache_summary() -> dict:
+    """Get aggregate statistics for the LLM cache table"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) as entries, 
+                   COALESCE(SUM(hit_count), 0) as total_hits,
+                   COALESCE(SUM(LENGTH(response)), 0) as total_bytes
+            FROM llm_cache
+        """)
+        row = cursor.fetchone()
+        return dict(row) if row else {"entries": 0, "total_hits": 0, "total_bytes": 0}
+
+
+# ==================== PIPELINE SPAN CRUD ====================
+
+def create_pipeline_spans(event_id: int, repository_full_name: str, spans: list) -> bool:
+    """Store the stage spans of a pipeline run (replaces spans from earlier runs)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM pipeline_spans WHERE event_id = ?", (event_id,))
+            cursor.executemany("""
+                INSERT INTO pipeline_spans (
+                    event_id, repository_full_name, stage, start_offset_ms,
+                    duration_ms, status, attributes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    event_id,
+                    repository_full_name,
+                    span.get('stage'),
+                    span.get('start_offset_ms', 0),
+                    span.get('duration_ms', 0),
+                    span.get('status', 'ok'),
+                    span.get('attributes'),
+                )
+                for span in spans
+            ])
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Error storing pipeline spans: {e}")
+            return False
+
+
+def get_pipeline_spans(event_id: int) -> list:
+    """Get the stage spans recorded for a webhook event"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT stage, start_offset_ms, duration_ms, status, attributes, created_at
+            FROM pipeline_spans 
+            WHERE event_id = ?
+            ORDER BY start_offset_ms ASC
+        """, (event_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def get_pipeline_stage_durations(repository_full_name: str = None, 
+                                 since_hours: int = 24 * 7,
+                                 limit_per_stage: int = 1000) -> dict:
+    """Get recent stage durations grouped by stage, optionally for one repository"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        query = """
+            SELECT stage, duration_ms FROM (
+                SELECT stage, duration_ms,
+                       ROW_NUMBER() OVER (PARTITION BY stage ORDER BY created_at DESC) as rn
+                FROM pipeline_spans
+                WHERE created_at >= datetime('now', ?)
+        """
+        params = [f"-{int(since_hours)} hours"]
+        
+        if repository_full_name:
+            query += " AND repository_full_name = ?"
+            params.append(repository_full_name)
+        
+        query += ") WHERE rn <= ?"
+        params.append(limit_per_stage)
+        
+        cursor.execute(query, params)
+        
+        durations = {}
+        for row in cursor.fetchall():
+            durations.setdefault(row['stage'], []).append(row['duration_ms'])
+        return durations
+
+
+# ==================== PIPELINE PROFILE CRUD ====================
+
+def create_pipeline_profile(event_id: int, repository_full_name: str, format: str,
+                            samples: int, interval_ms: float, duration_ms: float,
+                            data: str) -> Optional[int]:
+    """Store a sampled profile of a pipeline run"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO pipeline_profiles (
+                    event_id, repository_full_name, format, samples,
+                    interval_ms, duration_ms, data
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (event_id, repository_full_name, format, samples, interval_ms, duration_ms, data))
+            conn.commit()
+            return cursor.lastrowid
+            
+        except Exception as e:
+            print(f"Error storing pipeline profile: {e}")
+            return None
+
+
+def get_pipeline_profiles(event_id: int = None, repository_full_name: str = None,
+                          limit: int = 50) -> list:
+    """List stored profiles (without their stack data)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        query = """
+            SELECT id, event_id, repository_full_name, format, samples,
+                   interval_ms, duration_ms, created_at
+            FROM pipeline_profiles WHERE 1=1
+        """
+        params = []
+        
+        if event_id is not None:
+            query += " AND event_id = ?"
+            params.append(event_id)
+        
+        if repository_full_name:
+            query += " AND repository_full_name = ?"
+            params.append(repository_full_name)
+        
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def get_pipeline_profile(profile_id: int) -> Optional[dict]:
+    """Get a stored profile including its stack data"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM pipeline_profiles WHERE id = ?", (profile_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+# ==================== SYNC CHECKPOINT CRUD ====================
+
+def get_sync_checkpoint(repository_full_name: str) -> Optional[dict]:
+    """Get the last commit synced from the GitHub API for a repository"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM sync_checkpoints WHERE repository_full_name = ?",
+            (repository_full_name,)
+        )
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+def update_sync_checkpoint(repository_full_name: str, last_synced_sha: str, commits_synced: int = 0) -> bool:
+    """Move a repository's sync checkpoint to a newer commit (ends any catch-up)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO sync_checkpoints (repository_full_name, last_synced_sha, commits_synced)
+            VALUES (?, ?, ?)
+            ON CONFLICT(repository_full_name) DO UPDATE SET
+                last_synced_sha = excluded.last_synced_sha,
+                commits_synced = sync_checkpoints.commits_synced + excluded.commits_synced,
+                last_synced_at = CURRENT_TIMESTAMP,
+                resume_sha = NULL,
+                resume_head_sha = NULL
+        """, (repository_full_name, last_synced_sha, commits_synced))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def update_sync_resume_point(repository_full_name: str, resume_sha: str, resume_head_sha: str,
+                             commits_synced: int = 0) -> bool:
+    """
+    Record how far a catch-up sync got without reaching the checkpoint.
+    
+    The next sync continues below resume_sha (the oldest commit fetched);
+    once it reaches the checkpoint, resume_head_sha (the newest commit
+    seen when the catch-up started) becomes the new checkpoint.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE sync_checkpoints
+            SET resume_sha = ?, resume_head_sha = ?,
+                commits_synced = commits_synced + ?, last_synced_at = CURRENT_TIMESTAMP
+            WHERE repository_full_name = ?
+        """, (resume_sha, resume_head_sha, commits_synced, repository_full_name))
+        conn.commit()
+        return cursor.rowcount > 0
+
 # Database is initialized via app.py startup event
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Benchmark: Repositories view query (N+1 lookups vs one joined query).
+
+Seeds a throwaway SQLite database with one user, N repositories, an
+active webhook for most of them and several push events per repository
+(with realistic payload sizes), then times building the Repositories
+view payload:
+
+- n_plus_one: get_user_repositories + get_webhook_by_repository +
+  get_recent_webhook_events(limit=1) per repository (the old handler)
+- joined: get_user_repositories_overview (one query)
+
+and checks that both produce the same rows.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_connected_repositories --repos 1000
+
+Author: ETTA-X
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# DATABASE_PATH is read at import time, so point it at a scratch file first
+_tmpdir = tempfile.mkdtemp(prefix="etta-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmpdir, "bench.db")
+
+from backend.app.database import (  # noqa: E402
+    init_database, get_db_connection, get_user_repositories, get_user_repositories_overview,
+    get_webhook_by_repository, get_recent_webhook_events
+)
+
+
+def seed(repo_count: int, events_per_repo: int, payload_bytes: int) -> int:
+    """Insert one user with repo_count repositories; returns the user id"""
+    payload = json.dumps({"commits": [{"message": "x" * payload_bytes}]})
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (github_id, username) VALUES (?, ?)", (1, "etta-bench")
+        )
+        user_id = cursor.lastrowid
+        for index in range(repo_count):
+            full_name = f"etta-bench/repo-{index:04d}"
+            cursor.execute("""
+                INSERT INTO repositories (user_id, github_repo_id, name, full_name, default_branch)
+                VALUES (?, ?, ?, ?, 'main')
+            """, (user_id, 100000 + index, f"repo-{index:04d}", full_name))
+            repository_id = cursor.lastrowid
+            if index % 10:
+                cursor.execute("""
+                    INSERT INTO webhooks (repository_id, github_hook_id, webhook_url, secret_hash, events)
+                    VALUES (?, ?, 'http://localhost/api/webhooks/github', 'x', '["push"]')
+                """, (repository_id, 500000 + index))
+            cursor.executemany("""
+                INSERT INTO webhook_events (github_delivery_id, event_type, repository_full_name,
+                                            branch, commit_sha, payload, created_at)
+                VALUES (?, 'push', ?, 'main', ?, ?, datetime('now', ?))
+            """, [
+                (f"d-{index}-{n}", full_name, f"{index:020x}{n:020x}", payload, f"-{n} minutes")
+                for n in range(events_per_repo)
+            ])
+        conn.commit()
+    return user_id
+
+
+def n_plus_one(user_id: int) -> list:
+    rows = []
+    for repo in get_user_repositories(user_id):
+        webhook = get_webhook_by_repository(repo['id'])
+        events = get_recent_webhook_events(repo['full_name'], limit=1)
+        last_event = events[0] if events else None
+        rows.append((
+            repo['id'],
+            bool(webhook and webhook.get('is_active')),
+            webhook['github_hook_id'] if webhook else None,
+            last_event.get('commit_sha') if last_event else None,
+        ))
+    return rows
+
+
+def joined(user_id: int) -> list:
+    return [
+        (repo['id'], bool(repo['webhook_is_active']), repo['webhook_github_hook_id'], repo['last_commit'])
+        for repo in get_user_repositories_overview(user_id)
+    ]
+
+
+def measure(fn, user_id: int, rounds: int):
+    times = []
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(user_id)
+        times.append((time.perf_counter() - start) * 1000)
+    return result, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=20, help="events per repository")
+    parser.add_argument("--payload-bytes", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        init_database()
+        user_id = seed(args.repos, args.events, args.payload_bytes)
+
+        results = {}
+        for name, fn in (("n_plus_one", n_plus_one), ("joined", joined)):
+            rows, times = measure(fn, user_id, args.rounds)
+            results[name] = rows
+            print(
+                f"{name:<11} repos={len(rows):<5} median={statistics.median(times):8.1f}ms "
+                f"min={min(times):8.1f}ms"
+            )
+
+        if results["n_plus_one"] != results["joined"]:
+            print("MISMATCH between N+1 and joined results")
+            sys.exit(1)
+    finally:
+        for name in os.listdir(_tmpdir):
+            os.remove(os.path.join(_tmpdir, name))
+        os.rmdir(_tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: per-call AsyncClient vs the shared pooled HTTP client.
+
+Runs the same sequence of GitHubAPI-style requests against the local fake
+GitHub server twice:
+- "per-call": a new httpx.AsyncClient for every request (previous behaviour)
+- "pooled":   the shared client from backend.api.http_client
+
+The fake server adds `--handshake-ms` to every new connection to stand in
+for the TCP + TLS setup against api.github.com, and `--latency-ms` to
+every request.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_github_client --calls 200
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from backend.api.git_repo import GitHubAPI
+from backend.api.http_client import close_http_client
+from backend.benchmarks.fake_github import FakeGitHub
+
+
+async def run_per_call(url: str, calls: int) -> list:
+    timings = []
+    headers = {"Authorization": "Bearer bench", "Accept": "application/vnd.github.v3+json"}
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{url}/user/repos", headers=headers, params={"per_page": 100})
+            response.json()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run_pooled(url: str, calls: int) -> list:
+    api = GitHubAPI("bench")
+    api.BASE_URL = url
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await api.get_user_repos()
+        timings.append(time.perf_counter() - start)
+    await close_http_client()
+    return timings
+
+
+def describe(name: str, timings: list, connections: int) -> str:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[max(0, int(len(ms) * 0.95) - 1)]
+    return (
+        f"{name:<9} calls={len(ms):<5} mean={statistics.mean(ms):7.2f}ms "
+        f"p50={statistics.median(ms):7.2f}ms p95={p95:7.2f}ms connections={connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = {}
+    for name, runner in (("per-call", run_per_call), ("pooled", run_pooled)):
+        with FakeGitHub(handshake_delay=args.handshake_ms / 1000, latency=args.latency_ms / 1000) as server:
+            timings = asyncio.run(runner(server.url, args.calls))
+            results[name] = timings
+            print(describe(name, timings, server.connections))
+
+    saved = statistics.mean(results["per-call"]) - statistics.mean(results["pooled"])
+    print(f"saved per call: {saved * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
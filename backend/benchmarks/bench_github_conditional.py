@@ -0,0 +1,62 @@
+"""
+Benchmark: ETag revalidation of GitHub REST reads.
+
+Repeats the GitHubAPI reads the dashboard performs (token scopes, repo
+list, repo info, branches, webhooks) against the local fake GitHub server,
+with and without the conditional request cache, and reports how many
+responses were answered with 304 and how many body bytes were skipped.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_github_conditional --rounds 20 --repos 100
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import time
+
+from backend.api.git_repo import GitHubAPI
+from backend.api.github_cache import github_cache
+from backend.api.http_client import close_http_client
+from backend.benchmarks.fake_github import FakeGitHub, FakeGitHubData
+
+
+async def run_rounds(url: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        api = GitHubAPI("bench")
+        api.BASE_URL = url
+        await api.get_token_scopes()
+        repos = await api.get_user_repos()
+        owner, name = repos[0]["owner"], repos[0]["name"]
+        await api.get_repo_info(owner, name)
+        await api.get_repo_branches(owner, name)
+        await api.list_webhooks(owner, name)
+    await close_http_client()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    default_max_bytes = github_cache.max_bytes
+    for name, max_bytes in (("uncached", 0), ("etag", default_max_bytes)):
+        # A zero-byte budget means no response is ever stored
+        github_cache.max_bytes = max_bytes
+        github_cache.clear()
+        data = FakeGitHubData(repo_count=args.repos)
+        with FakeGitHub(latency=args.latency_ms / 1000, data=data) as server:
+            elapsed = asyncio.run(run_rounds(server.url, args.rounds))
+            stats = github_cache.stats()
+            print(
+                f"{name:<9} requests={server.requests:<5} not_modified={server.not_modified:<5} "
+                f"elapsed={elapsed * 1000:8.1f}ms cached_entries={stats['entries']} cached_bytes={stats['bytes']}"
+            )
+
+if __name__ == "__main__":
+    main()
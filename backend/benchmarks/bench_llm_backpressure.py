@@ -0,0 +1,153 @@
+"""
+Benchmark: LLM backpressure (unbounded slot queue vs risk-ordered admission).
+
+Sends a burst of --requests test generation requests, one every
+--interval-ms, to MockLLM. About --high-percent of them are high risk and
+the rest medium. Like a pipeline event, each request is a batch of
+--prompts prompts (TestGenerator.agenerate_batch). Each generation holds
+one of --concurrency slots for roughly --generation-ms, so the burst
+offers more work than the model can do. Two strategies are compared:
+
+- unbounded: a plain semaphore per generation; every prompt waits for a
+             slot however long that takes
+- admission: PipelineScheduler.llm_admission, one admission per
+             generation, with a queue of at most --queue-depth waiting
+             generations admitted by risk level and deadlines of
+             --deadline-high / --deadline-medium seconds. Shed prompts are
+             skipped; a request with every prompt shed returns the
+             rule-based fallback at once
+
+Reported per risk level: completion latency (request -> tests), the
+longest queue wait of each request, requests that got LLM tests, and
+prompts shed by reason.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_backpressure --requests 60 --interval-ms 50
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+# The scheduler imports the database module, which reads DATABASE_PATH
+_tmpdir = tempfile.mkdtemp(prefix="etta-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmpdir, "bench.db")
+
+from backend.api.llm_cache import llm_cache  # noqa: E402
+from backend.api.pipeline_scheduler import PipelineScheduler  # noqa: E402
+from backend.api.pipeline_tracing import summarize_durations  # noqa: E402
+from backend.model.LLM import MockLLM, TestGenerator, set_llm_instance  # noqa: E402
+
+
+def prompts(count: int) -> list:
+    return [f"Generate tests for:\nFile: app/api/payments_{n}.py\nStatus: modified\n" for n in range(count)]
+
+
+async def run_unbounded(args, requests: list) -> dict:
+    slots = asyncio.Semaphore(args.concurrency)
+    results = defaultdict(lambda: defaultdict(list))
+
+    async def one(risk_level: str):
+        started = time.perf_counter()
+        waits = [0.0]
+
+        @asynccontextmanager
+        async def slot():
+            queued = time.perf_counter()
+            async with slots:
+                waits.append(time.perf_counter() - queued)
+                yield
+
+        result = await TestGenerator().agenerate_batch(prompts(args.prompts), use_cache=False, slot=slot)
+        results[risk_level]["wait_ms"].append(max(waits) * 1000)
+        results[risk_level]["latency_ms"].append((time.perf_counter() - started) * 1000)
+        if result.tests:
+            results[risk_level]["generated"].append(1)
+
+    await send(args, requests, one)
+    return {"results": results, "shed": {}}
+
+
+async def run_admission(args, requests: list) -> dict:
+    scheduler = PipelineScheduler(
+        stage_limits={"llm": args.concurrency}, llm_queue_depth=args.queue_depth,
+        llm_deadlines={"high": args.deadline_high, "medium": args.deadline_medium, "low": 0.0},
+    )
+    results = defaultdict(lambda: defaultdict(list))
+
+    async def one(risk_level: str):
+        started = time.perf_counter()
+        admission = scheduler.llm_admission(risk_level)
+        result = await TestGenerator().agenerate_batch(prompts(args.prompts), use_cache=False, slot=admission.slot)
+        results[risk_level]["wait_ms"].append(admission.waited * 1000)
+        results[risk_level]["latency_ms"].append((time.perf_counter() - started) * 1000)
+        if result.tests:
+            results[risk_level]["generated"].append(1)
+
+    await send(args, requests, one)
+    return {"results": results, "shed": dict(scheduler.llm_queue.shed)}
+
+
+async def send(args, requests: list, one):
+    tasks = []
+    for risk_level in requests:
+        tasks.append(asyncio.create_task(one(risk_level)))
+        await asyncio.sleep(args.interval_ms / 1000)
+    await asyncio.gather(*tasks)
+
+
+def report(name: str, outcome: dict, wall: float):
+    print(f"{name}  (wall {wall:.2f}s)")
+    for risk_level in ("high", "medium"):
+        results = outcome["results"][risk_level]
+        latency = summarize_durations(results["latency_ms"])
+        wait = summarize_durations(results["wait_ms"])
+        shed = {reason: count for (level, reason), count in outcome["shed"].items() if level == risk_level}
+        print(f"  {risk_level:<7} n={latency['count']:<3} generated={len(results['generated']):<3} "
+              f"latency p50={latency['p50_ms']:7.0f}ms p95={latency['p95_ms']:7.0f}ms max={latency['max_ms']:7.0f}ms "
+              f"wait p95={wait['p95_ms']:7.0f}ms shed={shed or 0}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--interval-ms", type=float, default=50.0, help="pause between requests")
+    parser.add_argument("--high-percent", type=float, default=30.0)
+    parser.add_argument("--prompts", type=int, default=4, help="prompts per request")
+    parser.add_argument("--concurrency", type=int, default=2, help="LLM generation slots")
+    parser.add_argument("--generation-ms", type=float, default=500.0, help="mock time per generation")
+    parser.add_argument("--queue-depth", type=int, default=32, help="waiting generations")
+    parser.add_argument("--deadline-high", type=float, default=4.0)
+    parser.add_argument("--deadline-medium", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.getLogger("backend.model.LLM.test_generator").setLevel(logging.CRITICAL)
+    llm_cache.enabled = False  # Measure generation, not the result cache
+    try:
+        rng = random.Random(args.seed)
+        requests = ["high" if rng.random() * 100 < args.high_percent else "medium" for _ in range(args.requests)]
+        print(f"{len(requests)} requests of {args.prompts} prompts ({requests.count('high')} high, "
+              f"{requests.count('medium')} medium), {args.prompts * 1000 / args.interval_ms:.0f} generations/s "
+              f"offered, capacity {args.concurrency * 1000 / args.generation_ms:.0f}/s\n")
+
+        for name, strategy in (("unbounded", run_unbounded), ("admission", run_admission)):
+            set_llm_instance(MockLLM(latency=args.generation_ms / 1000, max_concurrency=args.concurrency))
+            start = time.perf_counter()
+            outcome = asyncio.run(strategy(args, requests))
+            report(name, outcome, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
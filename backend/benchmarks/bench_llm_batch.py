@@ -0,0 +1,131 @@
+"""
+Benchmark: one truncated mega-prompt vs batched per-file test generation.
+
+Builds a synthetic diff analysis in the analyzer's output shape
+(`changed_files` entries with path, status, diff and changed_nodes) with
+`--files` changed files of `--changes` changed functions each, and
+generates tests against the local
+fake Ollama server, which answers with two tests per file named in the
+prompt plus one generic test every prompt repeats:
+
+- single: the previous pipeline prompt (first 5 files, 5 changes each),
+          one generation
+- batch:  build_change_descriptions + agenerate_batch with the LLM client
+          limited to `--concurrency` generations at a time
+
+Prompt evaluation and generation are both charged per token, so a long
+prompt and a long answer are slow. Reports wall time, tests produced,
+duplicates removed and how many of the changed files got tests.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_batch --files 12 --concurrency 4
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+
+from backend.api.llm_cache import llm_cache
+from backend.model.LLM.local_model import get_llm_instance
+from backend.model.LLM.test_generator import TestGenerator, build_change_descriptions
+from backend.benchmarks.fake_ollama import FakeOllama
+
+
+def synthetic_analysis(count: int, changes: int) -> dict:
+    """A DiffAnalyzer result with `count` changed files"""
+    changed_files = []
+    for index in range(count):
+        path = f"app/module_{index:02d}.py"
+        nodes, diff = [], [f"--- a/{path}", f"+++ b/{path}"]
+        for n in range(changes):
+            name, line = f"handler_{index}_{n}", n * 3 + 1
+            diff += [f"@@ -{line},0 +{line},3 @@", f"+def {name}(value):",
+                     "+    if not value:", "+        raise ValueError('value required')"]
+            nodes.append({"name": name, "type": "function", "start_line": line, "end_line": line + 2,
+                          "parent": None, "decorators": []})
+        changed_files.append({"path": path, "status": "modified", "diff": "\n".join(diff),
+                              "changed_nodes": nodes, "change_types": ["service_change"]})
+    return {"changed_files": changed_files}
+
+
+def respond(prompt: str) -> str:
+    """Two tests per file mentioned in the prompt plus a shared one"""
+    tests = [{
+        "name": "test_requires_authentication", "endpoint": "/api/health", "method": "GET",
+        "payload": {}, "expected_status": 401, "description": "Unauthenticated access is rejected",
+    }]
+    for module in re.findall(r"File: app/(module_\d+)\.py", prompt):
+        for status, kind in ((200, "valid"), (400, "invalid")):
+            tests.append({
+                "name": f"test_{module}_{kind}_input", "endpoint": f"/api/{module}", "method": "POST",
+                "payload": {"value": kind}, "expected_status": status,
+                "description": f"{module} handles {kind} input",
+            })
+    return json.dumps({"tests": tests})
+
+
+def single_prompt(files: list) -> str:
+    """The pipeline's former description: first 5 files, 5 changes each"""
+    description = "Security-sensitive code changes detected.\nRisk Level: high (0.80)\nRisk Domains: security\n\n"
+    description += "Files changed:\n"
+    for f in files[:5]:
+        description += f"\nFile: {f['path']}\nStatus: {f['status']}\nFunctions/Methods:\n"
+        for change in f['changed_nodes'][:5]:
+            description += f"  - {change['type']}: {change['name']}\n"
+    return description
+
+
+def covered(tests: list, files: list) -> int:
+    endpoints = {test.endpoint for test in tests}
+    return sum(1 for f in files if f"/api/{f['path'][4:-3]}" in endpoints)
+
+
+async def run(mode: str, files: list) -> dict:
+    generator = TestGenerator()
+    start = time.perf_counter()
+    if mode == "single":
+        result = await generator.agenerate(single_prompt(files), max_tests=None, use_cache=False)
+    else:
+        prompts = build_change_descriptions(files, "high", 0.8, ["security"])
+        result = await generator.agenerate_batch(prompts, max_tests=None, use_cache=False)
+    wall = time.perf_counter() - start
+    await generator.llm.aclose()
+    return {"wall": wall, "result": result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--changes", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="simulated time per generated token")
+    parser.add_argument("--prompt-token-ms", type=float, default=0.5, help="simulated time per prompt token")
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "backend.model.LLM.test_generator", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    llm_cache.enabled = False  # Measure generation, not the result cache
+    # The files the pipeline reads from the analyzer result
+    files = synthetic_analysis(args.files, args.changes)["changed_files"]
+    with FakeOllama(respond=respond, token_delay=args.token_ms / 1000,
+                    prompt_token_delay=args.prompt_token_ms / 1000, parallel=args.concurrency) as server:
+        get_llm_instance().configure(base_url=server.url, max_concurrency=args.concurrency)
+        for mode in ("single", "batch"):
+            requests_before = server.requests
+            outcome = asyncio.run(run(mode, files))
+            result = outcome["result"]
+            print(
+                f"{mode:<7} prompts={server.requests - requests_before:<3} wall={outcome['wall'] * 1000:8.1f}ms "
+                f"tests={len(result.tests):<3} duplicates_removed={result.duplicates_removed:<3} "
+                f"files_covered={covered(result.tests, files)}/{len(files)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: repeated test generations with and without the LLM result cache.
+
+Generates tests for the same code description `--repeats` times against
+the local fake Ollama server (every real generation costs about
+`--token-ms` per token), first with the cache bypassed and then with it
+enabled. A re-formatted copy of the description (extra whitespace) is
+generated last to show that it shares the cached entry.
+
+Uses a throwaway SQLite database.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_cache --repeats 5 --token-ms 10
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+# DATABASE_PATH is read at import time, so point it at a scratch file first
+_tmpdir = tempfile.mkdtemp(prefix="etta-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmpdir, "bench.db")
+
+from backend.app.database import init_database  # noqa: E402
+from backend.api.llm_cache import llm_cache  # noqa: E402
+from backend.model.LLM.local_model import get_llm_instance  # noqa: E402
+from backend.model.LLM.test_generator import agenerate_tests  # noqa: E402
+from backend.benchmarks.fake_ollama import FakeOllama  # noqa: E402
+
+
+DESCRIPTION = (
+    "POST /login accepts JSON with username and password.\n"
+    "Returns 200 with a token, 401 on a wrong password, 400 on missing fields."
+)
+
+
+async def run(repeats: int, use_cache: bool, description: str = DESCRIPTION) -> list:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await agenerate_tests(description, use_cache=use_cache)
+        timings.append(((time.perf_counter() - start) * 1000, result["cached"], result["test_count"]))
+    await get_llm_instance().aclose()
+    return timings
+
+
+def describe(name: str, timings: list) -> str:
+    ms = [t[0] for t in timings]
+    return (
+        f"{name:<12} runs={len(ms):<3} first={ms[0]:8.1f}ms "
+        f"median={statistics.median(ms):8.1f}ms cached={sum(t[1] for t in timings)} "
+        f"tests={timings[-1][2]}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--token-ms", type=float, default=10.0, help="simulated time per generated token")
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "backend.model.LLM.test_generator", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    try:
+        init_database()
+        with FakeOllama(token_delay=args.token_ms / 1000) as server:
+            get_llm_instance().configure(base_url=server.url)
+            print(describe("bypass", asyncio.run(run(args.repeats, use_cache=False))))
+            llm_cache.clear()
+            print(describe("cached", asyncio.run(run(args.repeats, use_cache=True))))
+            reformatted = "  " + DESCRIPTION.replace(" ", "  ").replace("\n", "\n\n")
+            print(describe("reformatted", asyncio.run(run(1, use_cache=True, description=reformatted))))
+            print(f"server generations={server.requests} cache={llm_cache.stats()}")
+    finally:
+        for name in os.listdir(_tmpdir):
+            os.remove(os.path.join(_tmpdir, name))
+        os.rmdir(_tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: serialized blocking LLM calls vs concurrent async generation.
+
+Fires `--requests` concurrent test generations at the local fake Ollama
+server (which serves `--parallel` generations at once, like
+OLLAMA_NUM_PARALLEL) in three modes:
+
+- inline:     LocalLLM.generate called directly from a coroutine (what the
+              /api/tests/generate handler did); blocks the event loop
+- serialized: LocalLLM.generate in worker threads behind a limit of one
+              (the old global lock / llm stage cap)
+- async:      LocalLLM.agenerate with max_concurrency=--concurrency
+
+While each mode runs, a ticker task measures event loop lag (how late a
+10 ms sleep wakes up). Finally one generation is cancelled mid-flight to
+check that the server notices and the slot is released.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_concurrency --requests 16 --concurrency 4
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from backend.model.LLM.local_model import get_llm_instance
+from backend.benchmarks.fake_ollama import FakeOllama
+
+
+async def loop_lag(stop: asyncio.Event, samples: list):
+    """Record how late a 10 ms sleep wakes up until stopped"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def run_mode(mode: str, llm, requests: int, prompt: str) -> dict:
+    async def one() -> float:
+        start = time.perf_counter()
+        if mode == "inline":
+            llm.generate(prompt)
+        elif mode == "serialized":
+            await asyncio.to_thread(llm.generate, prompt)
+        else:
+            await llm.agenerate(prompt)
+        return (time.perf_counter() - start) * 1000
+
+    # Connect (and build the async client) before measuring steady state
+    if mode == "async":
+        await llm.aload()
+    else:
+        llm.load()
+
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    wall = (time.perf_counter() - start) * 1000
+    stop.set()
+    await ticker
+    await llm.aclose()
+    return {"wall": wall, "latencies": latencies, "lag": lag or [0.0]}
+
+
+async def check_cancellation(llm, server: FakeOllama, prompt: str) -> str:
+    cancelled_before = server.cancelled
+    task = asyncio.create_task(llm.agenerate(prompt))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    for _ in range(100):  # The server notices the disconnect between tokens
+        if server.cancelled > cancelled_before:
+            break
+        await asyncio.sleep(0.01)
+    return (
+        f"cancellation: server_aborted={server.cancelled - cancelled_before} "
+        f"client_in_flight={llm.in_flight}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM_MAX_CONCURRENCY for the async mode")
+    parser.add_argument("--parallel", type=int, default=4, help="generations the fake server runs at once")
+    parser.add_argument("--token-ms", type=float, default=1.0, help="simulated time per generated token")
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    prompt = "Generate API tests for POST /login. " * 20
+    llm = get_llm_instance()
+
+    with FakeOllama(token_delay=args.token_ms / 1000, parallel=args.parallel) as server:
+        for mode, limit in (("inline", 1), ("serialized", 1), ("async", args.concurrency)):
+            llm.configure(base_url=server.url, max_concurrency=limit)
+            server.max_in_flight = 0
+            result = asyncio.run(run_mode(mode, llm, args.requests, prompt))
+            ms = sorted(result["latencies"])
+            print(
+                f"{mode:<10} requests={len(ms):<4} wall={result['wall']:8.1f}ms "
+                f"p50={statistics.median(ms):8.1f}ms max={ms[-1]:8.1f}ms "
+                f"loop_lag_max={max(result['lag']):7.1f}ms server_max_in_flight={server.max_in_flight}"
+            )
+
+        async def cancel_then_close():
+            message = await check_cancellation(llm, server, prompt)
+            await llm.aclose()
+            return message
+
+        print(asyncio.run(cancel_then_close()))
+
+
+if __name__ == "__main__":
+    main()
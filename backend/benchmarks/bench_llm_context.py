@@ -0,0 +1,146 @@
+"""
+Benchmark: prompt context selection (fixed caps vs full batch vs token budget).
+
+Builds a synthetic diff analysis in the analyzer's changed_files format.
+It has --files files with --functions changed functions each. About
+--risky-percent of the functions touch auth, payment or permission code,
+and the rest are formatting helpers. Test files and docs are mixed in.
+The prompts are built three ways:
+
+- capped:   the original description (first 5 files, first 5 changes
+            each, one prompt)
+- full:     build_change_descriptions over every change (one prompt per file)
+- budgeted: select_change_context(--budget tokens, detect_risk_keywords)
+            followed by build_change_descriptions
+
+For each strategy the benchmark reports the prompts, the prompt tokens,
+the share of risky functions that reach a prompt, and the time to
+generate tests for all prompts. Generation uses MockLLM with prompt
+evaluation at --prompt-tps tokens/s, so prompt size shows up in the
+latency.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_context --files 20 --functions 12 --budget 1024
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+# Importing the app reads DATABASE_PATH; keep it away from the real database
+_tmpdir = tempfile.mkdtemp(prefix="etta-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmpdir, "bench.db")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+from backend.app.app import detect_risk_keywords  # noqa: E402
+from backend.model.LLM import (  # noqa: E402
+    MockLLM, set_llm_instance, agenerate_tests_batch, build_change_descriptions, select_change_context
+)
+from backend.model.LLM.context_builder import estimate_tokens  # noqa: E402
+
+
+RISKY_BODIES = [
+    "    if not verify_password(user, password):\n        raise PermissionError('invalid credentials')\n",
+    "    if amount <= 0:\n        raise ValueError('invalid payment amount')\n    return refund(account, amount)\n",
+    "    if not user.is_admin:\n        raise PermissionError('admin required')\n    grant(user, role)\n",
+    "    token = session.get('csrf_token')\n    if token != request_token:\n        abort(403)\n",
+]
+TRIVIAL_BODY = "    label = value.strip().title()\n    return f'{label:>20}'\n"
+HEADER = "Security-sensitive code changes detected.\nRisk Level: High (0.80)\nRisk Domains: security, financial\n\nFiles changed:\n"
+
+
+def build_analysis(files: int, functions: int, risky_percent: float, seed: int) -> tuple:
+    """changed_files entries plus the names of the risky functions"""
+    rng = random.Random(seed)
+    changed_files, risky = [], set()
+    for i in range(files):
+        kind = "test" if i % 7 == 6 else "docs" if i % 11 == 10 else "code"
+        path = {"test": f"tests/test_module_{i}.py", "docs": f"docs/module_{i}.py"}.get(kind, f"app/module_{i}.py")
+        nodes, diff = [], [f"--- a/{path}", f"+++ b/{path}"]
+        line = 1
+        for j in range(functions):
+            is_risky = kind == "code" and rng.random() * 100 < risky_percent
+            name = f"{'secure' if is_risky else 'format'}_handler_{i}_{j}"
+            signature = "(user, account, amount=0, password=None)" if is_risky else "(value)"
+            body = f"def {name}{signature}:\n" + (rng.choice(RISKY_BODIES) if is_risky else TRIVIAL_BODY)
+            length = body.count("\n")
+            diff.append(f"@@ -{line},0 +{line},{length} @@")
+            diff += ["+" + text for text in body.splitlines()]
+            nodes.append({"name": name, "type": "function", "start_line": line, "end_line": line + length - 1,
+                          "parent": None, "decorators": []})
+            if is_risky:
+                risky.add(name)
+            line += length
+        changed_files.append({
+            "path": path, "status": "modified", "diff": "\n".join(diff), "changed_nodes": nodes,
+            "change_types": [{"test": "test_change", "docs": "docs_change"}.get(kind, "service_change")],
+        })
+    return changed_files, risky
+
+
+def capped_descriptions(files: list) -> list:
+    """The original single description: first 5 files, first 5 changes each"""
+    description = HEADER
+    for f in files[:5]:
+        description += f"\nFile: {f['path']}\nStatus: {f['status']}\nFunctions/Methods:\n"
+        for change in f["changed_nodes"][:5]:
+            description += f"  - {change['type']}: {change['name']}\n"
+    return [description]
+
+
+def evaluate(name: str, prompts: list, risky: set, llm: MockLLM, select_ms: float = 0.0):
+    text = "\n".join(prompts)
+    covered = sum(1 for function in risky if function in text)
+    requests_before = llm.requests
+    start = time.perf_counter()
+    result = asyncio.run(agenerate_tests_batch(prompts))
+    wall = time.perf_counter() - start
+    print(f"{name:<9} prompts={len(prompts):<3} prompt_tokens={sum(estimate_tokens(p) for p in prompts):<6} "
+          f"risky_covered={covered}/{len(risky)} ({covered / max(1, len(risky)):.0%}) "
+          f"select={select_ms:6.1f}ms generate={wall * 1000:8.1f}ms "
+          f"tests={result['test_count']} requests={llm.requests - requests_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--functions", type=int, default=12, help="changed functions per file")
+    parser.add_argument("--risky-percent", type=float, default=15.0)
+    parser.add_argument("--budget", type=int, default=1024, help="context token budget")
+    parser.add_argument("--prompt-tps", type=float, default=400.0, help="mock prompt evaluation tokens/s")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="mock generation speed (0 = instant)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.test_generator", "backend.model.LLM.mock_model"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    try:
+        files, risky = build_analysis(args.files, args.functions, args.risky_percent, args.seed)
+        print(f"{len(files)} files, {args.files * args.functions} changed functions, {len(risky)} risky\n")
+
+        llm = MockLLM(prompt_tokens_per_second=args.prompt_tps, tokens_per_second=args.tokens_per_second)
+        set_llm_instance(llm)
+
+        evaluate("capped", capped_descriptions(files), risky, llm)
+        evaluate("full", build_change_descriptions(files, "High", 0.8, ["security", "financial"]), risky, llm)
+
+        start = time.perf_counter()
+        context = select_change_context(files, token_budget=args.budget, detect_keywords=detect_risk_keywords)
+        select_ms = (time.perf_counter() - start) * 1000
+        prompts = build_change_descriptions(context.files, "High", 0.8, ["security", "financial"])
+        evaluate("budgeted", prompts, risky, llm, select_ms)
+        print(f"\nbudget={context.budget} context_tokens={context.tokens} kept={context.kept} dropped={context.dropped}")
+    finally:
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
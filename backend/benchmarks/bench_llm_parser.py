@@ -0,0 +1,177 @@
+"""
+Benchmark: LLM response parsing (multi-strategy vs single-pass tolerant parser).
+
+Runs every sample of llm_output_corpus.json (clean, fenced, bare array,
+truncated, trailing commas, prose with braces, one object per test, ...)
+through:
+
+- legacy:   the previous TestGenerator._parse_response (fence stripping,
+            json.loads, manual bracket matching, array search, per-object
+            regex; up to four passes)
+- tolerant: StreamingTestParser.parse on the full text
+- streamed: StreamingTestParser.feed in --chunk-chars pieces, like tokens
+            arriving from Ollama
+
+and compares the number of tests extracted against the expected count,
+then reports throughput over the whole corpus and how each parser scales
+with a truncated response of --scale-tests tests.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_parser --rounds 200
+
+Author: ETTA-X
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+from backend.model.LLM.stream_parser import StreamingTestParser
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "llm_output_corpus.json")
+
+
+def _legacy_extract(data):
+    if isinstance(data, dict):
+        if isinstance(data.get("tests"), list):
+            return [t for t in data["tests"] if isinstance(t, dict)]
+        if "name" in data or "endpoint" in data:
+            return [data]
+    elif isinstance(data, list):
+        return [t for t in data if isinstance(t, dict)]
+    return []
+
+
+def legacy_parse(response: str) -> list:
+    """The four-strategy parser this benchmark replaces"""
+    cleaned = re.sub(r'```\s*', '', re.sub(r'```python\s*', '', re.sub(r'```json\s*', '', response.strip()))).strip()
+    try:
+        tests = _legacy_extract(json.loads(cleaned))
+        if tests:
+            return tests
+    except json.JSONDecodeError:
+        pass
+
+    match = re.search(r'\{\s*"tests"\s*:\s*\[', cleaned)
+    if match:
+        start = match.start()
+        try:
+            tests = _legacy_extract(json.loads(cleaned[start:]))
+            if tests:
+                return tests
+        except json.JSONDecodeError:
+            depth, in_string, escape = 0, False, False
+            for i, char in enumerate(cleaned[start:]):
+                if escape:
+                    escape = False
+                    continue
+                if char == '\\':
+                    escape = True
+                    continue
+                if char == '"':
+                    in_string = not in_string
+                    continue
+                if not in_string:
+                    if char == '{':
+                        depth += 1
+                    elif char == '}':
+                        depth -= 1
+                        if depth == 0:
+                            try:
+                                tests = _legacy_extract(json.loads(cleaned[start:start + i + 1]))
+                                if tests:
+                                    return tests
+                            except json.JSONDecodeError:
+                                pass
+                            break
+
+    array_match = re.search(r'\[\s*\{', cleaned)
+    if array_match:
+        try:
+            tests = _legacy_extract(json.loads(cleaned[array_match.start():]))
+            if tests:
+                return tests
+        except json.JSONDecodeError:
+            pass
+
+    tests = []
+    for match in re.finditer(r'\{[^{}]*"name"[^{}]*"endpoint"[^{}]*\}', cleaned):
+        try:
+            obj = json.loads(match.group())
+            if isinstance(obj, dict) and 'name' in obj:
+                tests.append(obj)
+        except json.JSONDecodeError:
+            continue
+    return tests
+
+
+def streamed_parse(response: str, chunk_chars: int) -> list:
+    parser = StreamingTestParser()
+    for i in range(0, len(response), chunk_chars):
+        parser.feed(response[i:i + chunk_chars])
+    return parser.items
+
+
+def throughput(parse, outputs: list, rounds: int) -> float:
+    """MB/s over `rounds` passes of the corpus"""
+    size = sum(len(o) for o in outputs) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for output in outputs:
+            parse(output)
+    return size / (time.perf_counter() - start) / 1e6
+
+
+def truncated_response(tests: int) -> str:
+    """{"tests": [...]} with `tests` entries, cut off inside the last one"""
+    body = json.dumps({"tests": [
+        {"name": f"test_case_{i}", "description": "Checks the endpoint", "method": "POST",
+         "endpoint": f"/items/{i}", "payload": {"name": "x" * 20, "tags": ["a", "b"]}, "expected_status": 201}
+        for i in range(tests)
+    ]})
+    return body[:-40]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="passes over the corpus for throughput")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="characters per streamed chunk")
+    parser.add_argument("--scale-tests", type=int, default=2000, help="tests in the truncated scaling sample")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        samples = json.load(f)["samples"]
+
+    parsers = {
+        "legacy": legacy_parse,
+        "tolerant": StreamingTestParser.parse,
+        "streamed": lambda text: streamed_parse(text, args.chunk_chars),
+    }
+
+    print(f"{'sample':<28} {'expected':>8} " + " ".join(f"{name:>9}" for name in parsers))
+    correct = {name: 0 for name in parsers}
+    for sample in samples:
+        counts = {name: len(parse(sample["output"])) for name, parse in parsers.items()}
+        for name, count in counts.items():
+            correct[name] += count == sample["expected_tests"]
+        print(f"{sample['name']:<28} {sample['expected_tests']:>8} " + " ".join(f"{counts[n]:>9}" for n in parsers))
+    print(f"{'correct':<28} {len(samples):>8} " + " ".join(f"{correct[n]:>9}" for n in parsers))
+
+    outputs = [sample["output"] for sample in samples]
+    print()
+    for name, parse in parsers.items():
+        print(f"{name:<9} {throughput(parse, outputs, args.rounds):8.2f} MB/s")
+
+    big = truncated_response(args.scale_tests)
+    print(f"\ntruncated response: {args.scale_tests} tests, {len(big) / 1e6:.2f} MB")
+    for name, parse in parsers.items():
+        start = time.perf_counter()
+        found = len(parse(big))
+        print(f"{name:<9} tests={found:<6} {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: Ollama model residency and connection reuse.
+
+Sends --requests streamed test generations through LocalLLM to a
+FakeOllama server, one every --gap-s seconds. The server needs --load-s
+seconds to load the model and, like Ollama, evicts it after
+--server-keep-alive-s seconds idle, which is shorter than the gap. Three
+residency settings are compared:
+
+- default:   no keep_alive, so the server default applies and every
+             request after a gap starts cold
+- keep_alive: keep_alive of --keep-alive (Ollama duration), sent with
+             every request
+- warm-up:   no keep_alive, but start_warmup pings the model after
+             --warmup-s seconds idle, before the server evicts it
+
+Reported: time to first token (TTFT) of each request, model loads on the
+server, and the etta_llm_first_request_after_idle_seconds count and sum.
+Every request follows a gap longer than --idle-threshold-s, so every one
+is counted there.
+
+A second section sends --sync-requests blocking generations through
+LocalLLM.generate (pooled session) and through a new requests.post per
+call, and counts the TCP connections the server accepted.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_residency --requests 6 --gap-s 1.0
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from contextlib import aclosing
+
+import requests
+
+from backend.api.metrics import LLM_FIRST_REQUEST_AFTER_IDLE
+from backend.benchmarks.fake_ollama import FakeOllama
+from backend.model.LLM.local_model import LocalLLM
+
+
+PROMPT = "Generate API tests for POST /login. " * 20
+
+
+async def first_token(llm: LocalLLM) -> float:
+    """One streamed generation; returns its time to first token in ms"""
+    started = time.perf_counter()
+    ttft = None
+    async with aclosing(llm.astream(PROMPT)) as tokens:
+        async for _ in tokens:
+            if ttft is None:
+                ttft = (time.perf_counter() - started) * 1000
+    return ttft or 0.0
+
+
+async def run_sparse(llm: LocalLLM, args, warmup: bool) -> list:
+    if warmup:
+        llm.start_warmup(args.warmup_s)
+        await asyncio.sleep(args.load_s + 0.1)  # Startup warm-up, as the app does on boot
+    ttfts = []
+    for index in range(args.requests):
+        await asyncio.sleep(args.gap_s)
+        ttfts.append(await first_token(llm))
+    await llm.aclose()
+    return ttfts
+
+
+def idle_series(model: str) -> tuple:
+    """(count, sum) of etta_llm_first_request_after_idle_seconds for a model"""
+    count = total = 0.0
+    for line in LLM_FIRST_REQUEST_AFTER_IDLE.render():
+        if f'model="{model}"' not in line:
+            continue
+        if line.startswith(f"{LLM_FIRST_REQUEST_AFTER_IDLE.name}_count"):
+            count = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{LLM_FIRST_REQUEST_AFTER_IDLE.name}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+    return count, total
+
+
+def residency(args):
+    print(f"residency: {args.requests} requests every {args.gap_s:.1f}s, model load {args.load_s:.1f}s, "
+          f"server evicts after {args.server_keep_alive_s:.1f}s idle")
+    modes = (
+        ("default", None, False),
+        ("keep_alive", args.keep_alive, False),
+        ("warm-up", None, True),
+    )
+    for name, keep_alive, warmup in modes:
+        model = f"codellama-{name}:7b"
+        with FakeOllama(model=model, token_delay=args.token_ms / 1000, load_delay=args.load_s,
+                        default_keep_alive=args.server_keep_alive_s) as server:
+            llm = LocalLLM(base_url=server.url, model=model)
+            llm.configure(keep_alive=keep_alive if keep_alive is not None else "",
+                          idle_threshold=args.idle_threshold_s)
+            ttfts = asyncio.run(run_sparse(llm, args, warmup))
+            count, total = idle_series(model)
+            print(f"  {name:<11} ttft p50={statistics.median(ttfts):7.1f}ms max={max(ttfts):7.1f}ms "
+                  f"loads={server.loads} warmups={llm.warmups} "
+                  f"after_idle count={count:.0f} mean={total / max(count, 1) * 1000:7.1f}ms")
+
+
+def connections(args):
+    print(f"\nconnections: {args.sync_requests} blocking generations")
+    with FakeOllama(model="codellama:7b-instruct") as server:
+        llm = LocalLLM(base_url=server.url, model=server.model)
+        started = time.perf_counter()
+        for _ in range(args.sync_requests):
+            llm.generate(PROMPT)
+        pooled = (time.perf_counter() - started) * 1000
+        pooled_connections = server.connections
+        asyncio.run(llm.aclose())
+
+        started = time.perf_counter()
+        for _ in range(args.sync_requests):
+            requests.post(f"{server.url}/api/generate", json={"model": server.model, "prompt": PROMPT,
+                                                               "stream": False}, timeout=30).raise_for_status()
+        fresh = (time.perf_counter() - started) * 1000
+        print(f"  {'session':<11} connections={pooled_connections:<4} wall={pooled:7.1f}ms")
+        print(f"  {'per request':<11} connections={server.connections - pooled_connections:<4} wall={fresh:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=6)
+    parser.add_argument("--gap-s", type=float, default=1.0, help="idle time before each request")
+    parser.add_argument("--load-s", type=float, default=0.5, help="simulated model load time")
+    parser.add_argument("--server-keep-alive-s", type=float, default=0.6, help="server default keep-alive")
+    parser.add_argument("--keep-alive", default="5m", help="keep_alive sent in the keep_alive mode")
+    parser.add_argument("--warmup-s", type=float, default=0.3, help="idle seconds before a warm-up ping")
+    parser.add_argument("--idle-threshold-s", type=float, default=0.8, help="idle time that counts as after-idle")
+    parser.add_argument("--token-ms", type=float, default=1.0, help="simulated time per generated token")
+    parser.add_argument("--sync-requests", type=int, default=50)
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "httpx"):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    residency(args)
+    connections(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark: LLM router over several local fake Ollama servers.
+
+Streams test generations through LLMRouter (the path TestGenerator uses)
+against FakeOllama servers in three scenarios:
+
+- scale-out: --requests concurrent streams on one server vs on a pool of
+  --servers identical servers (each serving --parallel at once, with
+  LocalLLM max_concurrency matching)
+- slow-primary: a slow primary model plus a smaller model that is
+  --slow-factor times faster. --paced-requests requests arrive every
+  --interval-ms and are routed with least_outstanding and with ewma
+- failover: a steady stream over --servers servers. The first server
+  returns 503 for the middle third of the run, then comes back.
+  Reported: failed requests (should be none), failovers, and where the
+  router sent requests in each phase (health probes every 0.2 s)
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_router --requests 24 --servers 3
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from contextlib import ExitStack, aclosing
+
+from backend.benchmarks.fake_ollama import FakeOllama
+from backend.model.LLM.local_model import LocalLLM
+from backend.model.LLM.router import LLMRouter
+
+
+PROMPT = "Generate API tests for POST /login. " * 20
+
+
+async def stream(router: LLMRouter) -> float:
+    """One streamed generation; returns its latency in ms"""
+    started = time.perf_counter()
+    async with aclosing(router.astream(PROMPT)) as tokens:
+        async for _ in tokens:
+            pass
+    return (time.perf_counter() - started) * 1000
+
+
+async def run_burst(router: LLMRouter, requests: int) -> dict:
+    await router.aload()
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(stream(router) for _ in range(requests)))
+    wall = (time.perf_counter() - started) * 1000
+    await router.aclose()
+    return {"wall": wall, "latencies": sorted(latencies)}
+
+
+async def run_paced(router: LLMRouter, requests: int, interval: float, on_request=None) -> dict:
+    await router.aload()
+    tasks, errors = [], []
+
+    async def one() -> float:
+        try:
+            return await stream(router)
+        except Exception as e:
+            errors.append(str(e))
+            return 0.0
+
+    started = time.perf_counter()
+    for index in range(requests):
+        if on_request:
+            on_request(index)
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(interval)
+    latencies = await asyncio.gather(*tasks)
+    wall = (time.perf_counter() - started) * 1000
+    await router.aclose()
+    return {"wall": wall, "latencies": sorted(latency for latency in latencies if latency), "errors": errors}
+
+
+def describe(name: str, result: dict, servers: list) -> str:
+    ms = result["latencies"] or [0.0]
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    share = " ".join(f"{server.model.split(':')[0]}={server.completed}" for server in servers)
+    return (f"  {name:<18} wall={result['wall']:8.1f}ms p50={statistics.median(ms):7.1f}ms "
+            f"p95={p95:7.1f}ms max={ms[-1]:7.1f}ms served: {share}")
+
+
+def endpoint(server: FakeOllama, parallel: int) -> LocalLLM:
+    return LocalLLM(base_url=server.url, model=server.model, max_concurrency=parallel)
+
+
+def scale_out(args):
+    print(f"scale-out: {args.requests} concurrent streams, {args.parallel} parallel per server")
+    with ExitStack() as stack:
+        servers = [stack.enter_context(FakeOllama(model=f"server-{index}:7b", token_delay=args.token_ms / 1000,
+                                                  parallel=args.parallel))
+                   for index in range(args.servers)]
+        single = LLMRouter([endpoint(servers[0], args.parallel)], health_interval=0)
+        print(describe("1 server", asyncio.run(run_burst(single, args.requests)), servers[:1]))
+        for server in servers:
+            server.completed = 0
+        pool = LLMRouter([endpoint(server, args.parallel) for server in servers], health_interval=0)
+        print(describe(f"{args.servers} servers", asyncio.run(run_burst(pool, args.requests)), servers))
+
+
+def slow_primary(args):
+    print(f"\nslow-primary: {args.paced_requests} streams every {args.interval_ms:.0f}ms, "
+          f"primary {args.slow_factor:.0f}x slower than the small model")
+    for strategy in ("least_outstanding", "ewma"):
+        with FakeOllama(model="codellama:7b-instruct", token_delay=args.token_ms * args.slow_factor / 1000,
+                        parallel=args.parallel) as primary, \
+                FakeOllama(model="qwen2.5-coder:1.5b", token_delay=args.token_ms / 1000,
+                           parallel=args.parallel) as small:
+            router = LLMRouter([endpoint(primary, args.parallel), endpoint(small, args.parallel)],
+                               strategy=strategy, health_interval=0)
+            result = asyncio.run(run_paced(router, args.paced_requests, args.interval_ms / 1000))
+            print(describe(strategy, result, [primary, small]))
+
+
+def failover(args):
+    print(f"\nfailover: {args.requests} streams every {args.interval_ms:.0f}ms over {args.servers} servers, "
+          f"server-0 down for the middle third")
+    with ExitStack() as stack:
+        servers = [stack.enter_context(FakeOllama(model=f"server-{index}:7b", token_delay=args.token_ms / 1000,
+                                                  parallel=args.parallel))
+                   for index in range(args.servers)]
+        router = LLMRouter([endpoint(server, args.parallel) for server in servers], health_interval=0.2)
+        phases = []
+        down, up = args.requests // 3, 2 * args.requests // 3
+
+        def on_request(index: int):
+            if index in (down, up):
+                phases.append([target.requests for target in router.targets])
+                servers[0].unavailable = index == down
+
+        result = asyncio.run(run_paced(router, args.requests, args.interval_ms / 1000, on_request))
+        phases.append([target.requests for target in router.targets])
+        previous = [0] * len(servers)
+        for label, counts in zip(("before", "server-0 down", "after"), phases):
+            print(f"  {label:<14} routed: " + " ".join(
+                f"server-{index}={count - before}" for index, (count, before) in enumerate(zip(counts, previous))))
+            previous = counts
+        info = router.get_info()
+        print(f"  errors={len(result['errors'])} failovers={info['failovers']} "
+              f"failures={[backend['failures'] for backend in info['backends']]} "
+              f"healthy={[backend['healthy'] for backend in info['backends']]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--paced-requests", type=int, default=60, help="requests of the slow-primary scenario")
+    parser.add_argument("--servers", type=int, default=3)
+    parser.add_argument("--parallel", type=int, default=2, help="generations each server runs at once")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="simulated time per generated token")
+    parser.add_argument("--slow-factor", type=float, default=4.0, help="how much slower the primary model is")
+    parser.add_argument("--interval-ms", type=float, default=120.0, help="pause between paced requests")
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "backend.model.LLM.router", "httpx"):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    scale_out(args)
+    slow_primary(args)
+    failover(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: waiting for the full LLM response vs streaming with early stop.
+
+The fake Ollama server answers with the {"tests": [...]} object followed by
+`--chatter-tokens` tokens of explanation, the way instruct models tend to
+keep talking until num_predict. Test generation is timed in three modes:
+
+- blocking:  agenerate (stream: false) + the regular response parser; waits
+             for every token
+- streaming: TestGenerator.agenerate; stops once the JSON object closes
+- max-tests: TestGenerator.agenerate with max_tests=--max-tests
+
+For each mode the wall time, time until the first test was available and
+tokens the server actually generated are reported.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_streaming --token-ms 5
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from backend.api.llm_cache import llm_cache
+from backend.model.LLM.local_model import get_llm_instance
+from backend.model.LLM.test_generator import TestGenerator
+from backend.benchmarks.fake_ollama import FakeOllama, DEFAULT_RESPONSE
+
+
+CHATTER = (
+    "These tests cover the happy path, authentication failures and input validation. "
+    "You may also want to add rate limiting and timing attack checks. "
+)
+
+
+def build_response(chatter_tokens: int) -> str:
+    tests = json.dumps({"tests": json.loads(DEFAULT_RESPONSE)})
+    chatter = (CHATTER * (chatter_tokens * 4 // len(CHATTER) + 1))[:chatter_tokens * 4]
+    return f"{tests}\n\nExplanation:\n{chatter}"
+
+
+async def run(mode: str, generator: TestGenerator, max_tests: int) -> dict:
+    start = time.perf_counter()
+    first_test = []
+
+    def on_test(test):
+        if not first_test:
+            first_test.append(time.perf_counter() - start)
+
+    if mode == "blocking":
+        prompt = generator._build_prompt("POST /login", "python")
+        response = await generator.llm.agenerate(prompt, max_tokens=2048, temperature=0.1)
+        result = generator._build_result(response, time.time())
+        first_test.append(time.perf_counter() - start)
+    else:
+        result = await generator.agenerate(
+            "POST /login", max_tests=max_tests if mode == "max-tests" else None, on_test=on_test
+        )
+    wall = time.perf_counter() - start
+    await generator.llm.aclose()
+    return {"wall": wall, "first": first_test[0] if first_test else wall, "tests": len(result.tests)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token-ms", type=float, default=5.0, help="simulated time per generated token")
+    parser.add_argument("--chatter-tokens", type=int, default=800)
+    parser.add_argument("--max-tests", type=int, default=2)
+    args = parser.parse_args()
+
+    for name in ("backend.model.LLM.local_model", "backend.model.LLM.test_generator", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    llm_cache.enabled = False  # Measure generation, not the result cache
+    response = build_response(args.chatter_tokens)
+    with FakeOllama(response_text=response, token_delay=args.token_ms / 1000) as server:
+        get_llm_instance().configure(base_url=server.url)
+        generator = TestGenerator()
+        for mode in ("blocking", "streaming", "max-tests"):
+            tokens_before = server.tokens_generated
+            result = asyncio.run(run(mode, generator, args.max_tests))
+            time.sleep(0.05)  # Let the server notice an early disconnect
+            print(
+                f"{mode:<10} tests={result['tests']:<2} wall={result['wall'] * 1000:8.1f}ms "
+                f"first_test={result['first'] * 1000:8.1f}ms "
+                f"server_tokens={server.tokens_generated - tokens_before}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark: end-to-end webhook pipeline with the mock LLM backend.
+
+Builds --repos throwaway local git repositories, each with a history of
+--pushes commits that touch security-sensitive Python files (auth,
+payments, user model). It then registers them in a scratch database
+(user, session token, repository) and sends one signed push webhook per
+commit to POST /webhook/github (receive_github_webhook) on the
+in-process ASGI app. Each event is followed until event_completed is
+published on the pipeline event broker. The events go through the
+scheduler, git fetch, diff/AST analysis, feature extraction, impact
+scoring, test generation, prioritization and the result store.
+
+The LLM is MockLLM (--llm-latency-ms before the first token, then
+--tokens-per-second), so everything around the model is measured
+without Ollama. The LLM result cache is disabled so every event
+generates.
+
+Reported:
+- throughput: completed events per second of wall time
+- webhook receive latency (POST round trip) and end-to-end latency
+  (POST sent -> event_completed)
+- per-stage latency from the stored pipeline spans
+- LLM requests admitted and shed by the scheduler's admission queue
+- mock LLM requests, peak concurrent generations and generated tokens
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_pipeline --repos 4 --pushes 5 --tokens-per-second 50
+
+Author: ETTA-X
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+
+# DATABASE_PATH, REPOS_BASE_PATH and the webhook secret are read at import
+# time, so point them at scratch locations first
+_tmpdir = tempfile.mkdtemp(prefix="etta-bench-")
+WEBHOOK_SECRET = "etta-bench-secret"
+os.environ["DATABASE_PATH"] = os.path.join(_tmpdir, "bench.db")
+os.environ["REPOS_BASE_PATH"] = os.path.join(_tmpdir, "repos")
+os.environ["WEBHOOK_SECRET"] = WEBHOOK_SECRET
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ.setdefault("EVENT_STREAM_QUEUE_SIZE", "100000")
+
+import httpx  # noqa: E402
+
+from backend.api.pipeline_events import pipeline_events, EVENT_COMPLETED  # noqa: E402
+from backend.api.pipeline_tracing import summarize_durations  # noqa: E402
+from backend.app.database import get_db_connection, get_pipeline_spans  # noqa: E402
+from backend.model.LLM import MockLLM, set_llm_instance  # noqa: E402
+
+
+OWNER = "etta-bench"
+
+# Files of the synthetic service and the kind of function each push adds
+SOURCES = {
+    "app/api/auth.py": (
+        "import hashlib\n\n\ndef verify_password(user, password):\n"
+        "    return user.password_hash == hashlib.sha256(password.encode()).hexdigest()\n",
+        "def login_with_token_{n}(session, token):\n"
+        "    if not token or session.get('csrf') != token:\n"
+        "        raise PermissionError('invalid auth token')\n"
+        "    session['authenticated'] = True\n    return session\n",
+    ),
+    "app/services/payments.py": (
+        "def charge(account, amount):\n    if amount <= 0:\n        raise ValueError('amount')\n"
+        "    account.balance -= amount\n    return account.balance\n",
+        "def refund_payment_{n}(account, amount, currency='USD'):\n"
+        "    if amount <= 0 or amount > account.last_charge:\n"
+        "        raise ValueError('invalid refund amount')\n"
+        "    account.balance += amount\n    return {{'refunded': amount, 'currency': currency}}\n",
+    ),
+    "app/models/user.py": (
+        "class User:\n    def __init__(self, name, role='member'):\n        self.name = name\n"
+        "        self.role = role\n",
+        "def grant_admin_role_{n}(user, actor):\n"
+        "    if actor.role != 'admin':\n        raise PermissionError('admin required')\n"
+        "    user.role = 'admin'\n    return user\n",
+    ),
+}
+
+
+def git(path: str, *args: str) -> str:
+    result = subprocess.run(
+        ["git", "-c", "user.name=ETTA Bench", "-c", "user.email=bench@etta.invalid", *args],
+        cwd=path, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def build_repository(path: str, pushes: int, files_per_push: int) -> list:
+    """Create a repo with `pushes` commits after the initial one; returns (before, after, files) per push"""
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    for filename, (initial, _) in SOURCES.items():
+        os.makedirs(os.path.join(path, os.path.dirname(filename)), exist_ok=True)
+        with open(os.path.join(path, filename), "w") as f:
+            f.write(initial)
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "Initial service")
+    before = git(path, "rev-parse", "HEAD")
+
+    history = []
+    names = list(SOURCES)
+    for n in range(pushes):
+        changed = [names[(n + i) % len(names)] for i in range(min(files_per_push, len(names)))]
+        for filename in changed:
+            with open(os.path.join(path, filename), "a") as f:
+                f.write("\n\n" + SOURCES[filename][1].format(n=n))
+        git(path, "add", "-A")
+        git(path, "commit", "-q", "-m", f"Change {n}: update {', '.join(changed)}")
+        after = git(path, "rev-parse", "HEAD")
+        history.append((before, after, changed))
+        before = after
+    return history
+
+
+def seed_database(repositories: list):
+    """One user with a live session token owning every benchmark repository"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (github_id, username) VALUES (?, ?)", (1, OWNER))
+        user_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO user_sessions (user_id, session_token, github_access_token, expires_at)
+            VALUES (?, 'bench-session', 'bench-token', datetime('now', '+1 day'))
+        """, (user_id,))
+        for index, name in enumerate(repositories):
+            cursor.execute("""
+                INSERT INTO repositories (user_id, github_repo_id, name, full_name, default_branch)
+                VALUES (?, ?, ?, ?, 'main')
+            """, (user_id, 100000 + index, name, f"{OWNER}/{name}"))
+        conn.commit()
+
+
+def push_payload(index: int, name: str, before: str, after: str, files: list) -> dict:
+    return {
+        "ref": "refs/heads/main",
+        "before": before,
+        "after": after,
+        "repository": {
+            "id": 100000 + index, "name": name, "full_name": f"{OWNER}/{name}", "private": True,
+            "owner": {"login": OWNER}, "default_branch": "main",
+            "clone_url": f"https://github.com/{OWNER}/{name}.git",
+        },
+        "pusher": {"name": OWNER},
+        "commits": [{
+            "id": after, "message": "update", "timestamp": "2026-01-01T00:00:00Z",
+            "author": {"name": OWNER}, "added": [], "removed": [], "modified": files,
+        }],
+    }
+
+
+async def run(args, pushes: list) -> dict:
+    from backend.app.app import app, startup_event, shutdown_event
+
+    await startup_event()
+    completed = {}
+    sent = {}
+    receive_ms = []
+
+    async def collect(subscription, expected: int):
+        while len(completed) < expected:
+            message = await subscription.queue.get()
+            if message is not None and getattr(message, "type", None) == EVENT_COMPLETED:
+                completed[message.data["event_id"]] = (time.perf_counter(), message.data.get("status"))
+
+    async def send(client, delivery: int, payload: dict):
+        body = json.dumps(payload).encode()
+        signature = "sha256=" + hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        started = time.perf_counter()
+        r = await client.post("/webhook/github", content=body, headers={
+            "X-GitHub-Event": "push", "X-GitHub-Delivery": f"bench-{delivery}",
+            "X-Hub-Signature-256": signature, "Content-Type": "application/json",
+        })
+        receive_ms.append((time.perf_counter() - started) * 1000)
+        r.raise_for_status()
+        sent[r.json()["event_id"]] = started
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with pipeline_events.subscribe() as subscription:
+            collector = asyncio.create_task(collect(subscription, len(pushes)))
+            started = time.perf_counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://etta.bench") as client:
+                for delivery, payload in enumerate(pushes):
+                    await send(client, delivery, payload)
+                    if args.interval_ms:
+                        await asyncio.sleep(args.interval_ms / 1000)
+            try:
+                await asyncio.wait_for(collector, args.timeout)
+            except asyncio.TimeoutError:
+                print(f"Timed out with {len(completed)}/{len(pushes)} events completed")
+            wall = time.perf_counter() - started
+    finally:
+        await shutdown_event()
+
+    return {"wall": wall, "sent": sent, "completed": completed, "receive_ms": receive_ms}
+
+
+def report(result: dict, llm: MockLLM):
+    completed, sent = result["completed"], result["sent"]
+    ok = [event_id for event_id, (_, status) in completed.items() if status == "completed"]
+    end_to_end = sorted((completed[e][0] - sent[e]) * 1000 for e in completed if e in sent)
+    wall = result["wall"]
+
+    print(f"events: sent={len(sent)} completed={len(ok)} failed={len(completed) - len(ok)}")
+    print(f"wall={wall:.2f}s throughput={len(completed) / wall:.2f} events/s")
+
+    def line(label: str, durations: list):
+        stats = summarize_durations(durations)
+        if stats["count"]:
+            print(f"  {label:<20} n={stats['count']:<4} mean={stats['mean_ms']:9.1f}ms "
+                  f"p50={stats['p50_ms']:9.1f}ms p95={stats['p95_ms']:9.1f}ms max={stats['max_ms']:9.1f}ms")
+
+    print("latency:")
+    line("webhook_receive", result["receive_ms"])
+    line("end_to_end", end_to_end)
+
+    stages = defaultdict(list)
+    for event_id in completed:
+        for span in get_pipeline_spans(event_id):
+            stages[span["stage"]].append(span["duration_ms"])
+    print("stages:")
+    for stage, durations in stages.items():
+        line(stage, durations)
+
+    from backend.api.pipeline_scheduler import pipeline_scheduler
+    queue = pipeline_scheduler.llm_queue.snapshot()
+    print(f"llm queue: admitted={queue['admitted']} shed={queue['shed'] or 0} (max depth {queue['max_depth']})")
+    print(f"llm: requests={llm.requests} max_in_flight={llm.max_in_flight} "
+          f"tokens={llm.tokens_generated} (latency={llm.latency * 1000:.0f}ms, "
+          f"{llm.tokens_per_second or 'instant'} tokens/s)")
+    if end_to_end:
+        print(f"end-to-end median {statistics.median(end_to_end):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=4)
+    parser.add_argument("--pushes", type=int, default=5, help="pushes per repository")
+    parser.add_argument("--files-per-push", type=int, default=2)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="mock time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="mock generation speed (0 = instant)")
+    parser.add_argument("--llm-concurrency", type=int, default=2)
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="pause between webhook deliveries")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--verbose", action="store_true", help="show pipeline logs")
+    args = parser.parse_args()
+
+    try:
+        pushes = []
+        names = [f"repo-{index:02d}" for index in range(args.repos)]
+        for index, name in enumerate(names):
+            history = build_repository(
+                os.path.join(os.environ["REPOS_BASE_PATH"], OWNER, name), args.pushes, args.files_per_push
+            )
+            pushes.append([push_payload(index, name, *entry) for entry in history])
+        # Interleave repositories like concurrent developers pushing
+        pushes = [payload for round_ in zip(*pushes) for payload in round_]
+
+        from backend.app.database import init_database
+        init_database()
+        seed_database(names)
+
+        llm = MockLLM(latency=args.llm_latency_ms / 1000, tokens_per_second=args.tokens_per_second,
+                      max_concurrency=args.llm_concurrency)
+        set_llm_instance(llm)
+
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            result = asyncio.run(run(args, pushes))
+        report(result, llm)
+    finally:
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Local stand-in GitHub API server for ETTA-X benchmarks.
+
+Serves canned, deterministic responses for the REST endpoints ETTA-X uses
+(/user, /user/repos, /repos/{owner}/{repo}[/branches|/commits|/hooks]) from a
+threaded stdlib HTTP server, so client-side changes can be measured without
+network access or a GitHub token.
+
+Every 200 response carries an ETag; a matching If-None-Match gets an
+empty 304 (counted in `not_modified`).
+
+The primary rate limit is simulated too: each non-304 request spends one
+unit of `rate_limit` per `rate_window` seconds, X-RateLimit-* headers are
+sent on every response, and an exhausted budget returns 403.
+
+Network costs are simulated:
+- handshake_delay: seconds added once per new TCP connection (stands in
+  for the TCP + TLS handshake to api.github.com)
+- latency: seconds added to every request (stands in for the round trip)
+
+Usage:
+    with FakeGitHub(handshake_delay=0.03, latency=0.01) as server:
+        api = GitHubAPI("token")
+        api.BASE_URL = server.url
+        ...
+    print(server.connections, server.requests, server.not_modified)
+
+Author: ETTA-X
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class FakeGitHubData:
+    """Deterministic fake users, repositories and commits"""
+
+    def __init__(self, repo_count: int = 10, commits_per_repo: int = 20, owner: str = "etta-bench"):
+        self.owner = owner
+        self.repo_count = repo_count
+        self.commits_per_repo = commits_per_repo
+
+    def user(self) -> Dict[str, Any]:
+        return {"id": 1, "login": self.owner, "name": "ETTA Bench", "avatar_url": "", "email": None}
+
+    def repo(self, index: int) -> Dict[str, Any]:
+        name = f"repo-{index:04d}"
+        full_name = f"{self.owner}/{name}"
+        return {
+            "id": 100000 + index,
+            "name": name,
+            "full_name": full_name,
+            "private": False,
+            "owner": {"login": self.owner},
+            "default_branch": "main",
+            "clone_url": f"https://github.com/{full_name}.git",
+            "ssh_url": f"git@github.com:{full_name}.git",
+            "html_url": f"https://github.com/{full_name}",
+            "description": f"Benchmark repository {index}",
+            "language": "Python",
+            "size": 128,
+            "stargazers_count": 0,
+            "forks_count": 0,
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-06-01T00:00:00Z",
+        }
+
+    def repos(self) -> List[Dict[str, Any]]:
+        return [self.repo(i) for i in range(self.repo_count)]
+
+    def commit(self, repo: str, index: int) -> Dict[str, Any]:
+        sha = _sha(repo, index)
+        return {
+            "sha": sha,
+            "commit": {
+                "message": f"Commit {index} in {repo}",
+                "author": {"name": "bench", "email": "bench@example.com", "date": "2024-06-01T00:00:00Z"},
+            },
+            "parents": [{"sha": _sha(repo, index + 1)}],
+        }
+
+    def commits(self, repo: str) -> List[Dict[str, Any]]:
+        return [self.commit(repo, i) for i in range(self.commits_per_repo)]
+
+    @staticmethod
+    def diff(sha: str) -> str:
+        return (
+            "diff --git a/app/auth.py b/app/auth.py\n"
+            "--- a/app/auth.py\n"
+            "+++ b/app/auth.py\n"
+            "@@ -1,3 +1,4 @@\n"
+            " def login(user, password):\n"
+            f"+    # {sha}\n"
+            "     return check_password(user, password)\n"
+        )
+
+
+class FakeGitHub:
+    """Threaded fake GitHub REST API bound to 127.0.0.1 on a free port"""
+
+    def __init__(self, handshake_delay: float = 0.0, latency: float = 0.0,
+                 data: Optional[FakeGitHubData] = None,
+                 rate_limit: int = 5000, rate_window: float = 3600.0):
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.data = data or FakeGitHubData()
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rate_remaining = rate_limit
+        self.rate_reset = time.time() + rate_window
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def start(self) -> "FakeGitHub":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                fake._count("connections")
+                if fake.handshake_delay:
+                    time.sleep(fake.handshake_delay)
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fake._count("requests")
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, body, headers = fake.route(self.path, dict(self.headers))
+                if not fake._spend(status, body, headers, self.headers.get("If-None-Match")):
+                    fake._count("rate_limited")
+                    status, body = 403, json.dumps({"message": "API rate limit exceeded"}).encode()
+                headers = {**headers, **fake._rate_headers()}
+                if status == 200:
+                    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+                    headers = {**headers, "ETag": etag}
+                    if self.headers.get("If-None-Match") == etag:
+                        fake._count("not_modified")
+                        status, body = 304, b""
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "FakeGitHub":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ==================== RATE LIMIT ====================
+
+    def _spend(self, status: int, body: bytes, headers: Dict[str, str], if_none_match: Optional[str]) -> bool:
+        """Charge one request against the budget; 304 revalidations are free"""
+        if status == 200 and if_none_match and if_none_match == f'W/"{hashlib.sha1(body).hexdigest()}"':
+            return True
+        with self._lock:
+            now = time.time()
+            if now >= self.rate_reset:
+                self.rate_remaining = self.rate_limit
+                self.rate_reset = now + self.rate_window
+            if self.rate_remaining <= 0:
+                return False
+            self.rate_remaining -= 1
+            return True
+
+    def _rate_headers(self) -> Dict[str, str]:
+        with self._lock:
+            return {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.rate_remaining),
+                "X-RateLimit-Reset": str(int(self.rate_reset)),
+            }
+
+    # ==================== ROUTES ====================
+
+    def route(self, path: str, headers: Dict[str, str]):
+        """Return (status, body bytes, headers) for a GET request"""
+        parsed = urlparse(path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        route = parsed.path.rstrip("/")
+        base_headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "X-OAuth-Scopes": "user, repo, admin:repo_hook",
+        }
+
+        if route == "/user":
+            return self._json(self.data.user(), base_headers)
+
+        if route == "/user/repos":
+            return self._paginated(self.data.repos(), query, route, base_headers)
+
+        match = re.fullmatch(r"/repos/([^/]+)/([^/]+)(/.*)?", route)
+        if not match:
+            return self._json({"message": "Not Found"}, base_headers, status=404)
+
+        repo_name, rest = match.group(2), match.group(3) or ""
+        full_name = f"{match.group(1)}/{repo_name}"
+        index = int(repo_name.rsplit("-", 1)[-1]) if repo_name.rsplit("-", 1)[-1].isdigit() else 0
+
+        if rest == "":
+            return self._json(self.data.repo(index), base_headers)
+        if rest == "/branches":
+            return self._json([{"name": "main", "protected": False, "commit": {"sha": _sha(full_name, 0)}}], base_headers)
+        if rest == "/hooks":
+            return self._json([], base_headers)
+        if rest == "/commits":
+            return self._paginated(self.data.commits(full_name), query, route, base_headers)
+
+        commit_match = re.fullmatch(r"/commits/([0-9a-f]+)", rest)
+        if commit_match:
+            sha = commit_match.group(1)
+            if "diff" in headers.get("Accept", ""):
+                return 200, self.data.diff(sha).encode(), {**base_headers, "Content-Type": "text/plain; charset=utf-8"}
+            return self._json({"sha": sha, "files": []}, base_headers)
+
+        return self._json({"message": "Not Found"}, base_headers, status=404)
+
+    @staticmethod
+    def _json(payload: Any, headers: Dict[str, str], status: int = 200):
+        return status, json.dumps(payload).encode(), headers
+
+    def _paginated(self, items: List[Any], query: Dict[str, str], route: str, headers: Dict[str, str]):
+        per_page = max(1, min(int(query.get("per_page", 30)), 100))
+        page = max(1, int(query.get("page", 1)))
+        last_page = max(1, -(-len(items) // per_page))
+        chunk = items[(page - 1) * per_page: page * per_page]
+
+        links = []
+        if page < last_page:
+            links.append(f'<{self.url}{route}?per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{self.url}{route}?per_page={per_page}&page={last_page}>; rel="last"')
+        if links:
+            headers = {**headers, "Link": ", ".join(links)}
+        return self._json(chunk, headers)
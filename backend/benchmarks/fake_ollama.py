@@ -0,0 +1,346 @@
+"""
+Local stand-in Ollama server for ETTA-X tests and benchmarks.
+
+Implements the parts of the Ollama HTTP API that LocalLLM uses
+(GET /api/tags, GET /api/ps, POST /api/generate with and without
+"stream", an empty prompt only loading the model) on a
+threaded stdlib HTTP server, so generation paths can be exercised without
+a GPU or a downloaded model. Streamed responses are NDJSON, one line per
+token (four characters), ending with a "done" line carrying the stats.
+
+Generation cost is simulated:
+- prompt_token_delay: seconds per prompt token (prompt evaluation)
+- token_delay: seconds per generated token
+- parallel: generations served at once, like OLLAMA_NUM_PARALLEL; further
+  requests wait for a free slot
+- load_delay: seconds to load the model when it is not resident. After a
+  request the model stays loaded for the request's keep_alive (seconds or
+  "30s"/"5m"/"1h"; negative keeps it), else `default_keep_alive`, like
+  Ollama evicting idle models. Loads are counted in `loads` and reported
+  as load_duration
+
+The answer is `response_text`, or `respond(prompt)` when a function is
+given (e.g. to answer differently per prompt).
+
+Setting `unavailable` makes every request answer 503, like a server that
+is down or restarting, until it is cleared again.
+
+A client that disconnects mid-generation (e.g. a cancelled request) is
+noticed between tokens and counted in `cancelled`, as Ollama aborts the
+generation in that case.
+
+Usage:
+    with FakeOllama(token_delay=0.01, parallel=4) as server:
+        llm = get_llm_instance()
+        llm.configure(base_url=server.url)
+        ...
+    print(server.requests, server.max_in_flight, server.cancelled, server.tokens_generated,
+          server.loads, server.connections)
+
+Author: ETTA-X
+"""
+
+import json
+import math
+import re
+import select
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Callable
+
+
+DEFAULT_RESPONSE = json.dumps([
+    {
+        "name": "test_login_valid_credentials",
+        "endpoint": "/login",
+        "method": "POST",
+        "payload": {"username": "alice", "password": "correct-horse"},
+        "expected_status": 200,
+        "description": "Valid credentials return a token",
+    },
+    {
+        "name": "test_login_wrong_password",
+        "endpoint": "/login",
+        "method": "POST",
+        "payload": {"username": "alice", "password": "wrong"},
+        "expected_status": 401,
+        "description": "A wrong password is rejected",
+    },
+    {
+        "name": "test_login_missing_fields",
+        "endpoint": "/login",
+        "method": "POST",
+        "payload": {},
+        "expected_status": 400,
+        "description": "Missing fields are a bad request",
+    },
+], indent=2)
+
+
+_DURATION = re.compile(r"^\s*(-?[\d.]+)\s*(ms|s|m|h)?\s*$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def keep_alive_seconds(value, default: float) -> float:
+    """Seconds an Ollama keep_alive value keeps the model loaded (inf when negative)"""
+    if value is None or value == "":
+        return default
+    match = _DURATION.match(str(value))
+    if not match:
+        return default
+    seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return math.inf if seconds < 0 else seconds
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeOllama:
+    """Threaded fake Ollama API bound to 127.0.0.1 on a free port"""
+
+    def __init__(self, model: str = "codellama:7b-instruct", response_text: str = DEFAULT_RESPONSE,
+                 token_delay: float = 0.0, prompt_token_delay: float = 0.0, parallel: int = 4,
+                 respond: Optional[Callable[[str], str]] = None, load_delay: float = 0.0,
+                 default_keep_alive: float = 300.0):
+        self.model = model
+        self.response_text = response_text
+        self.respond = respond
+        self.token_delay = token_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.parallel = parallel
+        self.load_delay = load_delay
+        self.default_keep_alive = default_keep_alive
+        self.unavailable = False
+        self.loads = 0
+        self.connections = 0
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.tokens_generated = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._slots = threading.BoundedSemaphore(parallel)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._resident_until: Optional[float] = None  # Monotonic time the model is evicted at
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, counter: str, delta: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + delta)
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def start(self) -> "FakeOllama":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                fake._count("connections")
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _client_gone(self) -> bool:
+                """True once the client closed its end of the connection"""
+                readable, _, _ = select.select([self.connection], [], [], 0)
+                if not readable:
+                    return False
+                try:
+                    return self.connection.recv(1, socket.MSG_PEEK) == b""
+                except OSError:
+                    return True
+
+            def do_GET(self):
+                if fake.unavailable:
+                    self._send_json(503, {"error": "server unavailable"})
+                elif self.path.rstrip("/") == "/api/tags":
+                    self._send_json(200, {"models": [{"name": fake.model, "size": 3825819519}]})
+                elif self.path.rstrip("/") == "/api/ps":
+                    resident = fake.resident_seconds()
+                    models = [] if resident is None else [{
+                        "name": fake.model, "size_vram": 3825819519,
+                        "expires_at": "forever" if resident == math.inf else f"in {resident:.1f}s",
+                    }]
+                    self._send_json(200, {"models": models})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if fake.unavailable:
+                    self._send_json(503, {"error": "server unavailable"})
+                    return
+                if self.path.rstrip("/") != "/api/generate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                if request.get("model") != fake.model:
+                    self._send_json(404, {"error": f"model '{request.get('model')}' not found"})
+                    return
+                fake._count("requests")
+                if request.get("stream", True):
+                    self._stream(request)
+                    return
+                result = fake.generate(request, self._client_gone)
+                if result is None:
+                    self.close_connection = True
+                    return
+                self._send_json(200, result)
+
+            def _stream(self, request: Dict[str, Any]):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write_line(payload: Dict[str, Any]):
+                    data = json.dumps(payload).encode() + b"\n"
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                def on_token(token: str) -> bool:
+                    try:
+                        write_line({"model": fake.model, "response": token, "done": False})
+                        return True
+                    except OSError:
+                        return False
+
+                result = fake.generate(request, self._client_gone, on_token)
+                if result is None:
+                    self.close_connection = True
+                    return
+                try:
+                    write_line({**result, "response": ""})
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    self.close_connection = True
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ==================== RESIDENCY ====================
+
+    def resident_seconds(self) -> Optional[float]:
+        """Seconds until the model is evicted, None when it is not loaded"""
+        if self._resident_until is None or time.monotonic() >= self._resident_until:
+            return None
+        return self._resident_until - time.monotonic()
+
+    def _ensure_loaded(self) -> float:
+        """Load the model unless it is resident; returns the seconds spent loading"""
+        with self._load_lock:
+            if self.resident_seconds() is not None:
+                self._resident_until = math.inf  # Not evicted while in use
+                return 0.0
+            started = time.perf_counter()
+            if self.load_delay:
+                time.sleep(self.load_delay)
+            self._count("loads")
+            self._resident_until = math.inf
+            return time.perf_counter() - started
+
+    def _release_model(self, request: Dict[str, Any]):
+        """Start the keep-alive countdown once no generation uses the model"""
+        with self._load_lock:
+            if self.in_flight == 0:
+                keep = keep_alive_seconds(request.get("keep_alive"), self.default_keep_alive)
+                self._resident_until = time.monotonic() + keep
+
+    # ==================== GENERATION ====================
+
+    def generate(self, request: Dict[str, Any], client_gone: Callable[[], bool],
+                 on_token: Optional[Callable[[str], bool]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Simulate one generation; None if the client went away.
+
+        on_token receives each token as it is produced (streaming) and
+        returns False once the client can no longer be written to.
+        """
+        if not request.get("prompt"):
+            # An empty prompt only loads the model (what warm-up pings send)
+            load_seconds = self._ensure_loaded()
+            self._release_model(request)
+            return {"model": self.model, "response": "", "done": True, "done_reason": "load",
+                    "load_duration": int(load_seconds * 1e9)}
+
+        options = request.get("options") or {}
+        prompt_tokens = count_tokens(request.get("prompt", ""))
+        text = self.respond(request.get("prompt", "")) if self.respond else self.response_text
+        eval_tokens = count_tokens(text)
+        num_predict = int(options.get("num_predict", 1024))
+        if num_predict < eval_tokens:
+            eval_tokens, text = num_predict, text[:num_predict * 4]
+
+        with self._slots:
+            self._count("in_flight")
+            started = time.perf_counter()
+            try:
+                load_seconds = self._ensure_loaded()
+                if self.prompt_token_delay:
+                    time.sleep(prompt_tokens * self.prompt_token_delay)
+                prompt_done = time.perf_counter()
+                for index in range(eval_tokens):
+                    if client_gone():
+                        self._count("cancelled")
+                        return None
+                    if self.token_delay:
+                        time.sleep(self.token_delay)
+                    self._count("tokens_generated")
+                    if on_token:
+                        token = text[index * 4:] if index == eval_tokens - 1 else text[index * 4:index * 4 + 4]
+                        if not on_token(token):
+                            self._count("cancelled")
+                            return None
+                finished = time.perf_counter()
+            finally:
+                self._count("in_flight", -1)
+                self._release_model(request)
+
+        self._count("completed")
+        return {
+            "model": self.model,
+            "response": text,
+            "done": True,
+            "total_duration": int((finished - started) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int((prompt_done - started) * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int((finished - prompt_done) * 1e9),
+        }
@@ -7,24 +7,39 @@ Uses CodeLlama-7B-Instruct quantized model with llama-cpp-python backend.
 Runs entirely locally on GPU (CUDA) with CPU fallback.
 
 Pipeline Flow:
-    1. LocalLLM - Load and run GGUF model
+    1. LocalLLM - Generate via Ollama (or MockLLM / LLMRouter, see backends.py)
     2. TestGenerator - Generate tests from code descriptions
     3. TestPrioritizer - ML-based test prioritization
     4. PytestGenerator - Convert JSON tests to pytest files
 """
 
-from .local_model import LocalLLM, get_llm_instance
-from .test_generator import TestGenerator, generate_tests
+from .backends import LLMBackend, get_llm_instance, set_llm_instance
+from .local_model import LocalLLM
+from .mock_model import MockLLM
+from .router import LLMRouter
+from .test_generator import (
+    TestGenerator, generate_tests, agenerate_tests, agenerate_tests_batch, build_change_descriptions
+)
+from .context_builder import select_change_context, ChangeContext
 from .prioritizer import TestPrioritizer, prioritize_tests
 from .pytest_generator import PytestGenerator, generate_pytest_file
 
 __all__ = [
     # Model
+    'LLMBackend',
     'LocalLLM',
+    'MockLLM',
+    'LLMRouter',
     'get_llm_instance',
+    'set_llm_instance',
     # Test Generation
     'TestGenerator',
     'generate_tests',
+    'agenerate_tests',
+    'agenerate_tests_batch',
+    'build_change_descriptions',
+    'select_change_context',
+    'ChangeContext',
     # Prioritization
     'TestPrioritizer', 
     'prioritize_tests',
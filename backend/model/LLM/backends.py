@@ -0,0 +1,181 @@
+"""
+LLM Backends
+============
+Interface shared by the text-generation backends, and selection of the
+backend the rest of the package (TestGenerator, the pipeline, the test
+pipeline API) talks to through get_llm_instance().
+
+Backends:
+- ollama: LocalLLM (local_model.py), Ollama's local HTTP API (default)
+- mock:   MockLLM (mock_model.py), deterministic stand-in with simulated
+          latency and tokens/sec that replays recorded responses; needs no
+          server, model or GPU
+- router: LLMRouter (router.py), a pool of Ollama servers/models with
+          health checks, least-outstanding or latency routing and failover
+
+Usage:
+    from backend.model.LLM.backends import get_llm_instance, set_llm_instance
+    from backend.model.LLM.mock_model import MockLLM
+
+    llm = get_llm_instance()
+    set_llm_instance(MockLLM(tokens_per_second=40))  # e.g. in a benchmark
+
+Configuration (environment variables):
+- LLM_BACKEND: "ollama" (default), "mock" or "router"
+"""
+
+import logging
+import os
+from threading import Lock
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+from .stream_parser import StreamingTestParser
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+
+
+class LLMBackend:
+    """
+    Base class for LLM backends.
+
+    Subclasses implement load/aload, generate/agenerate and astream;
+    JSON helpers and bookkeeping are shared. Backends expose `model`,
+    `is_loaded`, `max_concurrency` and `in_flight` (generations running).
+    """
+
+    backend_name = "base"
+
+    model: str = ""
+    is_loaded: bool = False
+    max_concurrency: int = 1
+    in_flight: int = 0
+
+    def load(self, force_cpu: bool = False) -> bool:
+        """Check the backend is usable (blocking)"""
+        raise NotImplementedError
+
+    async def aload(self) -> bool:
+        """Async variant of load()"""
+        raise NotImplementedError
+
+    async def ahealth_check(self) -> bool:
+        """Check now whether the backend can serve generations"""
+        return await self.aload()
+
+    def generate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                 stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Generate text (blocking)"""
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                        stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Generate text without blocking the event loop"""
+        raise NotImplementedError
+
+    def astream(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                stop: Optional[List[str]] = None, **kwargs) -> AsyncIterator[str]:
+        """Yield generated text as it is produced; closing the stream stops generation"""
+        raise NotImplementedError
+
+    def configure(self, **settings):
+        """Change backend settings (model, max_concurrency, ...)"""
+        raise NotImplementedError
+
+    async def awarm_up(self) -> bool:
+        """Load the model so the next generation does not pay for it"""
+        return await self.aload()
+
+    async def aresidency(self) -> Dict[str, Any]:
+        """Whether the model is loaded and ready"""
+        return {"resident": self.is_loaded}
+
+    def start_warmup(self, interval: Optional[float] = None):
+        """Keep the model loaded while idle (no-op for backends without a model server)"""
+
+    async def aclose(self):
+        """Release connections (called on application shutdown)"""
+
+    def unload(self):
+        """Reset the connection state."""
+        self.is_loaded = False
+
+    def generate_json(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Generate and parse JSON output from the model.
+
+        Args:
+            prompt: Input prompt (should request JSON output)
+            **kwargs: Generation parameters
+
+        Returns:
+            Parsed JSON as dictionary
+        """
+        return self.parse_json(self.generate(prompt, **kwargs))
+
+    async def agenerate_json(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Async variant of generate_json()"""
+        return self.parse_json(await self.agenerate(prompt, **kwargs))
+
+    @staticmethod
+    def parse_json(response: str) -> Dict[str, Any]:
+        """Extract a JSON object/array from a model response"""
+        value = StreamingTestParser.first_json(response)
+        if value is not None:
+            return value
+
+        logger.warning(f"Failed to parse JSON from response: {response[:200]}...")
+        return {"raw_response": response, "error": "Failed to parse JSON"}
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get information about the current model."""
+        return {
+            "backend": self.backend_name,
+            "model": self.model,
+            "is_loaded": self.is_loaded,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+        }
+
+
+def create_backend(name: str) -> LLMBackend:
+    """Instantiate a backend by name ("ollama", "mock" or "router")"""
+    if name == "ollama":
+        from .local_model import LocalLLM
+        return LocalLLM()
+    if name == "mock":
+        from .mock_model import MockLLM
+        return MockLLM.from_env()
+    if name == "router":
+        from .router import LLMRouter
+        return LLMRouter.from_env()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+# Active backend
+_llm_instance: Optional[LLMBackend] = None
+_instance_lock = Lock()
+
+
+def get_llm_instance() -> LLMBackend:
+    """Get the active LLM backend (LLM_BACKEND, Ollama by default)."""
+    global _llm_instance
+    if _llm_instance is None:
+        with _instance_lock:
+            if _llm_instance is None:
+                _llm_instance = create_backend(LLM_BACKEND)
+    return _llm_instance
+
+
+def set_llm_instance(backend: Optional[LLMBackend]) -> Optional[LLMBackend]:
+    """Replace the active backend (None restores LLM_BACKEND); returns the previous one"""
+    global _llm_instance
+    with _instance_lock:
+        previous, _llm_instance = _llm_instance, backend
+    return previous
+
+
+def current_llm_instance() -> Optional[LLMBackend]:
+    """Active backend if one was created, without creating it"""
+    return _llm_instance
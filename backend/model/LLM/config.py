@@ -56,7 +56,21 @@ GENERATION_CONFIG = {
     "stop": ["```\n\n", "</tests>", "---", "\n\n\n"],
 }
 
+# Streaming generation stops once this many valid tests have been parsed
+MAX_GENERATED_TESTS = int(os.getenv("LLM_MAX_TESTS", 6))
+
+# Batch generation: logical changes described per prompt, and prompts per batch
+# (files beyond the prompt budget share prompts instead of being dropped)
+BATCH_CHANGES_PER_PROMPT = int(os.getenv("LLM_BATCH_CHANGES_PER_PROMPT", 8))
+BATCH_MAX_PROMPTS = int(os.getenv("LLM_BATCH_MAX_PROMPTS", 16))
+
+# Tokens of changed-code context per event; the riskiest changes are kept
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", 1024))
+
 # Prompt templates (Llama Instruct format)
+# Bump when a template changes so cached LLM responses are not reused
+PROMPT_TEMPLATE_VERSION = "1"
+
 SYSTEM_PROMPT = """You are an expert software testing engineer. Generate test cases in valid JSON format only."""
 
 TEST_GENERATION_PROMPT_TEMPLATE = """[INST] You are a test case generator. Output ONLY valid JSON, no explanations.
@@ -0,0 +1,243 @@
+"""
+Prompt Context Builder
+======================
+Chooses which changed functions and classes go into the test generation
+prompts of an event, within a token budget.
+
+Every changed AST node (or a whole file when it has none, e.g. non-Python
+files) becomes a candidate. Each candidate is scored by:
+- risk keywords in its added/removed diff lines, through the same
+  detector the impact analysis uses (security, financial, permission, ...)
+- the file's change types from the diff analyzer (api_change weighs more
+  than service_change; tests and docs weigh least)
+- the node type (functions and classes over imports)
+- the size of the change
+
+Candidates are then taken from the highest score down while their
+estimated tokens (about four characters per token) fit into the budget,
+and are handed to build_change_descriptions in their original file
+order. Each kept change is annotated with its risk domains so the model
+knows why it was picked. Trivial changes no longer use prompt tokens,
+and the risky ones are not cut by a fixed file/change cap.
+
+Usage:
+    from backend.model.LLM.context_builder import select_change_context
+
+    context = select_change_context(analysis["changed_files"], detect_keywords=detect_risk_keywords)
+    prompts = build_change_descriptions(context.files, risk_level, risk_score, domains)
+
+Configuration (environment variables):
+- LLM_PROMPT_TOKEN_BUDGET: tokens of change context per event (default 1024)
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .config import PROMPT_TOKEN_BUDGET
+
+CHARS_PER_TOKEN = 4
+
+# Weight of the diff analyzer's file change types
+CHANGE_TYPE_WEIGHTS = {
+    "api_change": 0.30,
+    "service_change": 0.20,
+    "config_change": 0.15,
+    "unknown_change": 0.10,
+    "ui_change": 0.05,
+    "test_change": 0.0,
+    "docs_change": 0.0,
+}
+
+NODE_TYPE_WEIGHTS = {
+    "function": 0.10,
+    "class": 0.10,
+    "decorator": 0.05,
+    "import": 0.0,
+}
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of prompt text"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def changed_lines(diff: str) -> List[Tuple[int, str]]:
+    """(new-file line number, text) of the added and removed lines of a unified diff"""
+    lines = []
+    new_line = 0
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            new_line = int(header.group(1))
+            continue
+        if not new_line or line.startswith(("+++", "---")):
+            continue
+        if line.startswith("+"):
+            lines.append((new_line, line[1:]))
+            new_line += 1
+        elif line.startswith("-"):
+            lines.append((new_line, line[1:]))  # Removed at this position of the new file
+        else:
+            new_line += 1
+    return lines
+
+
+@dataclass
+class ContextCandidate:
+    """One change that may go into a prompt"""
+    file_index: int
+    order: int
+    filename: str
+    status: str
+    change: Optional[Dict[str, Any]]  # None: the file itself (no AST nodes)
+    score: float
+    domains: List[str]
+    tokens: int
+
+
+@dataclass
+class ChangeContext:
+    """Selected changes, in build_change_descriptions' file format"""
+    files: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    kept: int = 0
+    dropped: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": len(self.files),
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "kept": self.kept,
+            "dropped": self.dropped,
+        }
+
+
+def _change_line(change: Dict[str, Any], domains: List[str]) -> Dict[str, Any]:
+    """Logical change entry for the prompt, annotated with its risk domains"""
+    name = change.get("description", change.get("name", ""))
+    if change.get("parent"):
+        name = f"{change['parent']}.{name}"
+    if domains:
+        name = f"{name} [{', '.join(domains)}]"
+    return {"type": change.get("type", "change"), "description": name}
+
+
+def _file_header(filename: str, status: str) -> str:
+    return f"\nFile: {filename}\nStatus: {status}\nFunctions/Methods:\n"
+
+
+def score_change(text: str, change_types: List[str], node_type: Optional[str], changed: int,
+                 detect_keywords: Optional[Callable[[str], Dict[str, Any]]] = None) -> Tuple[float, List[str]]:
+    """
+    Risk score of one change.
+
+    Args:
+        text: Diff lines (and names) belonging to the change
+        change_types: Change types of the file (api_change, ...)
+        node_type: AST node type, None for a whole file
+        changed: Number of changed lines
+        detect_keywords: Risk keyword detector (detect_risk_keywords)
+
+    Returns:
+        (score, detected risk domains)
+    """
+    domains = []
+    score = 0.0
+    if detect_keywords and text:
+        keywords = detect_keywords(text)
+        domains = keywords.get("detected_domains", [])
+        score += keywords.get("total_boost", 0.0)
+    score += max((CHANGE_TYPE_WEIGHTS.get(t, 0.1) for t in change_types), default=0.1)
+    score += NODE_TYPE_WEIGHTS.get(node_type, 0.1) if node_type else 0.05
+    score += min(changed, 50) / 500  # Up to +0.1 for larger changes
+    return round(score, 4), domains
+
+
+def _candidates(files: List[Dict[str, Any]],
+                detect_keywords: Optional[Callable[[str], Dict[str, Any]]]) -> List[ContextCandidate]:
+    candidates = []
+    for file_index, f in enumerate(files):
+        filename = f.get("filename") or f.get("path", "unknown")
+        status = f.get("status", "modified")
+        change_types = f.get("change_types") or []
+        diff_lines = changed_lines(f.get("diff") or "")
+        line_numbers = [number for number, _ in diff_lines]
+        changes = f.get("logical_changes") or f.get("changed_nodes") or []
+        header_tokens = estimate_tokens(_file_header(filename, status))
+
+        if not changes:
+            text = "\n".join(line for _, line in diff_lines)
+            score, domains = score_change(f"{filename}\n{text}", change_types, None, len(diff_lines),
+                                          detect_keywords)
+            candidates.append(ContextCandidate(file_index, 0, filename, status, None, score, domains,
+                                               header_tokens))
+            continue
+
+        for order, change in enumerate(changes):
+            start, end = change.get("start_line"), change.get("end_line")
+            lines = []
+            if start is not None and end is not None:
+                lines = [line for _, line in
+                         diff_lines[bisect_left(line_numbers, start):bisect_right(line_numbers, end)]]
+            text = "\n".join([change.get("name", ""), *(change.get("decorators") or []), *lines])
+            score, domains = score_change(text, change_types, change.get("type"), len(lines),
+                                          detect_keywords)
+            entry = _change_line(change, domains)
+            tokens = estimate_tokens(f"  - {entry['type']}: {entry['description']}\n")
+            candidates.append(ContextCandidate(file_index, order, filename, status, change, score, domains,
+                                               tokens + header_tokens))
+    return candidates
+
+
+def select_change_context(
+    files: List[Dict[str, Any]],
+    token_budget: int = PROMPT_TOKEN_BUDGET,
+    detect_keywords: Optional[Callable[[str], Dict[str, Any]]] = None
+) -> ChangeContext:
+    """
+    Pick the highest-risk changes that fit into the token budget.
+
+    Args:
+        files: Diff analysis files (changed_files entries, or files with
+            filename/logical_changes)
+        token_budget: Tokens of change context allowed for the event
+        detect_keywords: Risk keyword detector, e.g. detect_risk_keywords
+
+    Returns:
+        ChangeContext with the kept changes grouped per file
+    """
+    candidates = _candidates(files, detect_keywords)
+    context = ChangeContext(budget=token_budget)
+
+    selected = []
+    files_in = set()
+    for candidate in sorted(candidates, key=lambda c: (-c.score, c.file_index, c.order)):
+        # A file's header is only paid for by its first selected change
+        header = estimate_tokens(_file_header(candidate.filename, candidate.status))
+        cost = candidate.tokens - (header if candidate.file_index in files_in else 0)
+        if context.tokens + cost > token_budget:
+            context.dropped += 1
+            continue
+        context.tokens += cost
+        files_in.add(candidate.file_index)
+        selected.append(candidate)
+
+    by_file: Dict[int, Dict[str, Any]] = {}
+    for candidate in sorted(selected, key=lambda c: (c.file_index, c.order)):
+        entry = by_file.setdefault(candidate.file_index, {
+            "filename": candidate.filename,
+            "status": candidate.status,
+            "logical_changes": [],
+        })
+        if candidate.change is not None:
+            entry["logical_changes"].append(_change_line(candidate.change, candidate.domains))
+
+    context.files = list(by_file.values())
+    context.kept = len(selected)
+    return context
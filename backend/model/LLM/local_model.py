@@ -4,44 +4,132 @@ Local LLM Model Loader (Ollama API)
 Uses Ollama's local API for fast LLM inference.
 Ollama must be running with codellama:7b-instruct model loaded.
 
+Model residency: every request passes OLLAMA_KEEP_ALIVE, so the model
+stays in memory between sparse pushes instead of being evicted after
+Ollama's default five minutes. With LLM_WARMUP_INTERVAL set,
+start_warmup() loads the model right away and re-pings it whenever the
+backend has been idle for that long. The first request after
+LLM_IDLE_THRESHOLD seconds without generations records its time to first
+token in etta_llm_first_request_after_idle_seconds, so cold starts show
+up in /metrics.
+
+Blocking calls go through a pooled requests.Session, so connections to
+Ollama are reused instead of opened per generation.
+
+Generations are not serialized: up to LLM_MAX_CONCURRENCY requests run
+against Ollama at once (match it to the server's OLLAMA_NUM_PARALLEL).
+Async callers use agenerate(), which goes through a pooled httpx client
+and never blocks the event loop; cancelling the awaiting task closes the
+connection, which makes Ollama stop generating. astream() yields tokens
+as they are generated, so callers can stop as soon as they have enough.
+
+LocalLLM() is a shared instance configured from the environment;
+LocalLLM(base_url=..., model=...) creates a separate client for one
+server, as used by the router (router.py).
+
 Usage:
     from backend.model.LLM.local_model import get_llm_instance
     
     llm = get_llm_instance()
     response = llm.generate("Your prompt here")
+    response = await llm.agenerate("Your prompt here")
+    async with aclosing(llm.astream("Your prompt here")) as tokens:
+        async for token in tokens:
+            ...
+
+Configuration (environment variables):
+- OLLAMA_BASE_URL: Ollama server (default http://localhost:11434)
+- OLLAMA_MODEL: model name (default codellama:7b-instruct)
+- LLM_MAX_CONCURRENCY: generations in flight at once (default 2)
+- LLM_TIMEOUT: seconds a single generation may take (default 300)
+- OLLAMA_KEEP_ALIVE: how long Ollama keeps the model loaded after a request,
+  seconds or a duration like "30m"; -1 keeps it loaded (default: server default)
+- LLM_WARMUP_INTERVAL: seconds of idleness after which the model is pinged,
+  0 disables (default 0); keep it below the keep-alive
+- LLM_IDLE_THRESHOLD: seconds without generations after which a request
+  counts as first-after-idle (default 300)
 """
 
+import asyncio
 import json
 import logging
-import re
+import os
+import time
+import httpx
 import requests
-from typing import Optional, Dict, Any, List
-from threading import Lock
+from contextlib import contextmanager, asynccontextmanager
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List, AsyncIterator, Union, Tuple
+from threading import Lock, BoundedSemaphore
+
+from .backends import LLMBackend, get_llm_instance, current_llm_instance
+
+try:
+    from backend.api.metrics import REGISTRY, observe_llm_generation, LLM_FIRST_REQUEST_AFTER_IDLE
+except ImportError:  # Package used standalone, outside the ETTA-X app
+    REGISTRY = None
+    observe_llm_generation = None
+    LLM_FIRST_REQUEST_AFTER_IDLE = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Ollama API configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
-OLLAMA_MODEL = "codellama:7b-instruct"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "codellama:7b-instruct")
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", 2)))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 300))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "")
+LLM_WARMUP_INTERVAL = float(os.getenv("LLM_WARMUP_INTERVAL", 0))
+LLM_IDLE_THRESHOLD = float(os.getenv("LLM_IDLE_THRESHOLD", 300))
+
+
+def parse_keep_alive(value: Union[str, int, float, None]) -> Union[str, int, float, None]:
+    """Ollama keep_alive value: numbers as seconds, duration strings as-is, empty for the server default"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    except ValueError:
+        return value.strip()
+
 
+def _close_on_loop(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """Schedule aclose() of an async client on the event loop it belongs to"""
+    if client.is_closed:
+        return
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    # Otherwise its loop has ended, and the loop's transports went with it
 
-class LocalLLM:
+
+class LocalLLM(LLMBackend):
     """
     Local LLM wrapper using Ollama API for inference.
     
     Features:
     - Fast inference via Ollama's optimized runtime
     - Singleton pattern for consistency
-    - Thread-safe generation
+    - Concurrent generation, capped at max_concurrency
+    - Async API on a pooled HTTP client, blocking API on a pooled session
+    - Model residency control (keep_alive, warm-up pings)
     - Automatic connection checking
     """
     
+    backend_name = "ollama"
     _instance: Optional['LocalLLM'] = None
     _lock = Lock()
     
-    def __new__(cls):
+    def __new__(cls, base_url: Optional[str] = None, model: Optional[str] = None, **kwargs):
+        if base_url is not None or model is not None:
+            # A specific server/model (e.g. one endpoint of the router), not the shared instance
+            instance = super().__new__(cls)
+            instance._initialized = False
+            return instance
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -49,14 +137,39 @@ class LocalLLM:
                     cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
         if self._initialized:
             return
             
-        self.base_url = OLLAMA_BASE_URL
-        self.model = OLLAMA_MODEL
+        self.base_url = base_url or OLLAMA_BASE_URL
+        self.model = model or OLLAMA_MODEL
         self.is_loaded = False
-        self._gen_lock = Lock()
+        self.max_concurrency = max(1, max_concurrency or LLM_MAX_CONCURRENCY)
+        self.timeout = timeout or LLM_TIMEOUT
+        self.keep_alive = parse_keep_alive(OLLAMA_KEEP_ALIVE)
+        self.warmup_interval = LLM_WARMUP_INTERVAL
+        self.idle_threshold = LLM_IDLE_THRESHOLD
+        self.in_flight = 0
+        self.warmups = 0
+        self._gen_slots = BoundedSemaphore(self.max_concurrency)
+        self._session: Optional[requests.Session] = None
+        # Async client and slots belong to the event loop that created them
+        self._client: Optional[httpx.AsyncClient] = None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Generations holding or waiting for a slot; configure() changes to the
+        # slots, and the closing of replaced clients, wait until there are none.
+        # The blocking API runs in worker threads, so _state_lock guards these
+        # counters, in_flight and the pending swap
+        self._state_lock = Lock()
+        self._slot_users = 0
+        self._resize_pending = False
+        self._retired_clients: List[Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = []
+        self._warmup_task: Optional[asyncio.Task] = None
+        # Monotonic times of the last generation and of the last generation or warm-up
+        self._last_request: Optional[float] = None
+        self._last_used: Optional[float] = None
         self._initialized = True
         
     def load(self, force_cpu: bool = False) -> bool:
@@ -71,7 +184,7 @@ class LocalLLM:
         
         try:
             # Check Ollama is running
-            r = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            r = self._http().get(f"{self.base_url}/api/tags", timeout=5)
             if r.status_code != 200:
                 logger.error(f"Ollama not responding: {r.status_code}")
                 return False
@@ -96,6 +209,154 @@ class LocalLLM:
             logger.error(f"Failed to connect to Ollama: {e}")
             return False
     
+    def configure(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                  max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                  keep_alive: Union[str, int, float, None] = None, warmup_interval: Optional[float] = None,
+                  idle_threshold: Optional[float] = None):
+        """
+        Change the server, model, concurrency limit, timeout or residency settings.
+
+        New requests use a new connection right away. Generations already
+        running finish on the old client, which is closed once they are done.
+        A new concurrency limit takes effect when the generations holding or
+        waiting for the current slots have finished, so they never add up to
+        more than either limit.
+        """
+        self.base_url = base_url or self.base_url
+        self.model = model or self.model
+        if max_concurrency and max(1, max_concurrency) != self.max_concurrency:
+            with self._state_lock:
+                self.max_concurrency = max(1, max_concurrency)
+                self._resize_pending = True
+        self.timeout = timeout or self.timeout
+        if keep_alive is not None:
+            self.keep_alive = parse_keep_alive(keep_alive)
+        if warmup_interval is not None:
+            self.warmup_interval = warmup_interval
+        if idle_threshold is not None:
+            self.idle_threshold = idle_threshold
+        self._retire_client()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        self.is_loaded = False
+
+    def _retire_client(self):
+        """Stop handing out the current async client; it is closed once unused"""
+        with self._state_lock:
+            if self._client is not None:
+                self._retired_clients.append((self._client, self._loop))
+                self._client = None
+        self._apply_pending()
+
+    def _apply_pending(self):
+        """Swap in resized slots and close retired clients once no generation uses them"""
+        with self._state_lock:
+            if self._slot_users:
+                return
+            if self._resize_pending:
+                self._gen_slots = BoundedSemaphore(self.max_concurrency)
+                self._async_slots = None
+                self._resize_pending = False
+            retired, self._retired_clients = self._retired_clients, []
+        for client, loop in retired:
+            _close_on_loop(client, loop)
+
+    def _leave_slot(self):
+        with self._state_lock:
+            self._slot_users -= 1
+        self._apply_pending()
+
+    @contextmanager
+    def _sync_slot(self):
+        """Hold one of the blocking API's generation slots"""
+        with self._state_lock:
+            slots = self._gen_slots
+            self._slot_users += 1
+        try:
+            with slots:
+                yield
+        finally:
+            self._leave_slot()
+
+    @asynccontextmanager
+    async def _async_slot(self, slots: asyncio.Semaphore):
+        """Hold one of the async API's generation slots"""
+        with self._state_lock:
+            self._slot_users += 1
+        try:
+            async with slots:
+                yield
+        finally:
+            self._leave_slot()
+
+    def _http(self) -> requests.Session:
+        """Pooled session for the blocking API (keeps connections to Ollama open)"""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency * 2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def _payload(self, prompt: str, max_tokens: Optional[int], temperature: Optional[float],
+                 stop: Optional[List[str]]) -> Dict[str, Any]:
+        """Build the /api/generate request body"""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": temperature or 0.1,
+                "num_predict": max_tokens or 1024,
+            }
+        }
+        if stop:
+            payload["options"]["stop"] = stop
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    # ==================== RESIDENCY ====================
+
+    def _begin_request(self) -> bool:
+        """Mark a generation as started; True if the backend was idle before it"""
+        now = time.monotonic()
+        with self._state_lock:
+            self.in_flight += 1
+            after_idle = self._last_request is None or now - self._last_request >= self.idle_threshold
+            self._last_request = self._last_used = now
+        return after_idle
+
+    def _end_request(self):
+        with self._state_lock:
+            self.in_flight -= 1
+            self._last_request = self._last_used = time.monotonic()
+
+    def _observe_first_token(self, after_idle: bool, started: float):
+        """Record the time to first token of a request that followed an idle period"""
+        if not after_idle:
+            return
+        seconds = time.perf_counter() - started
+        logger.info(f"First request after idle on {self.model}: first token in {seconds:.2f}s")
+        if LLM_FIRST_REQUEST_AFTER_IDLE is not None:
+            LLM_FIRST_REQUEST_AFTER_IDLE.observe(seconds, model=self.model)
+
+    def _finish(self, result: Dict[str, Any], started: float) -> str:
+        """Log and record a successful generation; returns the text"""
+        response = result.get("response", "").strip()
+        total_duration = result.get("total_duration", 0) / 1e9  # nanoseconds to seconds
+        eval_count = result.get("eval_count", 0)
+        logger.info(f"Generated {len(response)} chars in {total_duration:.2f}s ({eval_count} tokens)")
+        if observe_llm_generation:
+            observe_llm_generation(self.model, "ok", time.perf_counter() - started, result)
+        return response
+
+    def _observe_failure(self, status: str, started: float):
+        if observe_llm_generation:
+            observe_llm_generation(self.model, status, time.perf_counter() - started)
+
     def generate(
         self,
         prompt: str,
@@ -105,7 +366,7 @@ class LocalLLM:
         **kwargs
     ) -> str:
         """
-        Generate text using Ollama API.
+        Generate text using Ollama API (blocking; use agenerate from async code).
         
         Args:
             prompt: Input prompt
@@ -121,95 +382,315 @@ class LocalLLM:
             if not self.load():
                 raise RuntimeError("Failed to connect to Ollama")
         
-        max_tokens = max_tokens or 1024
-        temperature = temperature or 0.1
-        
-        # Build request payload
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-            }
-        }
+        payload = self._payload(prompt, max_tokens, temperature, stop)
         
-        if stop:
-            payload["options"]["stop"] = stop
-        
-        with self._gen_lock:
+        with self._sync_slot():
+            started = time.perf_counter()
+            after_idle = self._begin_request()
             try:
                 logger.info(f"Generating with Ollama ({self.model})...")
                 
-                r = requests.post(
+                r = self._http().post(
                     f"{self.base_url}/api/generate",
                     json=payload,
-                    timeout=300  # 5 minute timeout
+                    timeout=self.timeout
                 )
                 
                 if r.status_code != 200:
                     logger.error(f"Ollama error: {r.status_code} - {r.text}")
                     raise RuntimeError(f"Ollama API error: {r.status_code}")
                 
-                result = r.json()
-                response = result.get("response", "").strip()
-                
-                # Log timing info
-                total_duration = result.get("total_duration", 0) / 1e9  # nanoseconds to seconds
-                eval_count = result.get("eval_count", 0)
-                logger.info(f"Generated {len(response)} chars in {total_duration:.2f}s ({eval_count} tokens)")
-                
-                return response
+                self._observe_first_token(after_idle, started)
+                return self._finish(r.json(), started)
                 
             except requests.exceptions.Timeout:
                 logger.error("Ollama request timed out")
+                self._observe_failure("timeout", started)
                 raise RuntimeError("Ollama request timed out")
             except Exception as e:
                 logger.error(f"Generation failed: {e}")
+                self._observe_failure("error", started)
                 raise
+            finally:
+                self._end_request()
     
-    def generate_json(self, prompt: str, **kwargs) -> Dict[str, Any]:
+    # ==================== ASYNC API ====================
+
+    def _async_state(self):
+        """Pooled client and concurrency slots for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._retire_client()
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * 2,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            if self._loop is not loop:
+                self._async_slots = None  # Semaphores cannot be shared across loops
+            self._loop = loop
+        with self._state_lock:
+            if self._async_slots is None:
+                self._async_slots = asyncio.Semaphore(self.max_concurrency)
+            return self._client, self._async_slots
+
+    async def aload(self) -> bool:
+        """Async variant of load()"""
+        if self.is_loaded:
+            return True
+        client, _ = self._async_state()
+        try:
+            r = await client.get("/api/tags", timeout=5.0)
+            if r.status_code != 200:
+                logger.error(f"Ollama not responding: {r.status_code}")
+                return False
+            model_names = [m.get("name", "") for m in r.json().get("models", [])]
+            if not any(self.model in name for name in model_names):
+                logger.warning(f"Model {self.model} not found. Available: {model_names}")
+                logger.info(f"Run: ollama pull {self.model}")
+                return False
+            self.is_loaded = True
+            logger.info(f"Ollama connected, model: {self.model}")
+            return True
+        except httpx.ConnectError:
+            logger.error("Ollama not running. Start with: ollama serve")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to connect to Ollama: {e}")
+            return False
+
+    async def ahealth_check(self) -> bool:
+        """Probe the server and model now, ignoring the cached connection state"""
+        client, _ = self._async_state()
+        try:
+            r = await client.get("/api/tags", timeout=5.0)
+            model_names = [m.get("name", "") for m in r.json().get("models", [])] if r.status_code == 200 else []
+            self.is_loaded = any(self.model in name for name in model_names)
+        except Exception as e:
+            logger.debug(f"Ollama health check failed for {self.base_url}: {e}")
+            self.is_loaded = False
+        return self.is_loaded
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        **kwargs
+    ) -> str:
         """
-        Generate and parse JSON output from the model.
+        Generate text without blocking the event loop.
+        
+        Waits for one of max_concurrency slots, then posts to Ollama on the
+        pooled client. Cancelling the caller aborts the HTTP request (and
+        with it the generation on the server) and releases the slot.
         
         Args:
-            prompt: Input prompt (should request JSON output)
-            **kwargs: Generation parameters
+            prompt: Input prompt
+            max_tokens: Maximum tokens to generate (default: 1024)
+            temperature: Sampling temperature (default: 0.1)
+            stop: Stop sequences
             
         Returns:
-            Parsed JSON as dictionary
+            Generated text string
         """
-        response = self.generate(prompt, **kwargs)
+        if not self.is_loaded:
+            if not await self.aload():
+                raise RuntimeError("Failed to connect to Ollama")
         
-        # Try to extract JSON from response
-        try:
-            # Direct parse
-            return json.loads(response)
-        except json.JSONDecodeError:
-            pass
+        payload = self._payload(prompt, max_tokens, temperature, stop)
+        client, slots = self._async_state()
         
-        # Try to find JSON block in markdown
+        async with self._async_slot(slots):
+            started = time.perf_counter()
+            after_idle = self._begin_request()
+            try:
+                logger.info(f"Generating with Ollama ({self.model})...")
+                r = await client.post("/api/generate", json=payload)
+                if r.status_code != 200:
+                    logger.error(f"Ollama error: {r.status_code} - {r.text}")
+                    raise RuntimeError(f"Ollama API error: {r.status_code}")
+                self._observe_first_token(after_idle, started)
+                return self._finish(r.json(), started)
+            except asyncio.CancelledError:
+                logger.info("Ollama generation cancelled")
+                self._observe_failure("cancelled", started)
+                raise
+            except httpx.TimeoutException:
+                logger.error("Ollama request timed out")
+                self._observe_failure("timeout", started)
+                raise RuntimeError("Ollama request timed out")
+            except Exception as e:
+                logger.error(f"Generation failed: {e}")
+                self._observe_failure("error", started)
+                raise
+            finally:
+                self._end_request()
+
+    async def astream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text as Ollama produces it.
+
+        Holds a generation slot until the stream ends. Closing the stream
+        early (use contextlib.aclosing and break) closes the connection,
+        which stops the generation on the server, so a caller that has
+        what it needs does not pay for the remaining tokens.
+
+        Yields:
+            Text fragments (roughly one token each)
+        """
+        if not self.is_loaded:
+            if not await self.aload():
+                raise RuntimeError("Failed to connect to Ollama")
+
+        payload = self._payload(prompt, max_tokens, temperature, stop)
+        payload["stream"] = True
+        client, slots = self._async_state()
+
+        async with self._async_slot(slots):
+            started = time.perf_counter()
+            first_token = None
+            tokens = 0
+            status = "stopped"  # Closed by the consumer before the model finished
+            final = None
+            after_idle = self._begin_request()
+            try:
+                logger.info(f"Streaming from Ollama ({self.model})...")
+                async with client.stream("POST", "/api/generate", json=payload) as r:
+                    if r.status_code != 200:
+                        body = (await r.aread()).decode(errors="replace")
+                        logger.error(f"Ollama error: {r.status_code} - {body}")
+                        raise RuntimeError(f"Ollama API error: {r.status_code}")
+                    async for line in r.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(f"Ollama error: {chunk['error']}")
+                        if chunk.get("response"):
+                            tokens += 1
+                            if first_token is None:
+                                first_token = time.perf_counter()
+                                self._observe_first_token(after_idle, started)
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            final = chunk
+                            break
+                status = "ok"
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except httpx.TimeoutException:
+                status = "timeout"
+                logger.error("Ollama request timed out")
+                raise RuntimeError("Ollama request timed out")
+            except GeneratorExit:
+                raise
+            except Exception as e:
+                status = "error"
+                logger.error(f"Generation failed: {e}")
+                raise
+            finally:
+                self._end_request()
+                if observe_llm_generation:
+                    if final is None and first_token:
+                        # Stopped early: count the tokens that were generated
+                        final = {"eval_count": tokens,
+                                 "eval_duration": int((time.perf_counter() - first_token) * 1e9)}
+                    observe_llm_generation(self.model, status, time.perf_counter() - started, final)
+                logger.info(f"Stream {status} after {tokens} tokens in {time.perf_counter() - started:.2f}s")
+
+    async def awarm_up(self) -> bool:
+        """
+        Load the model into Ollama's memory (an empty prompt) and renew its keep-alive.
+
+        Returns:
+            bool: True if the model is loaded
+        """
+        client, _ = self._async_state()
+        payload = {"model": self.model, "prompt": "", "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        started = time.perf_counter()
         try:
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0]
-                return json.loads(json_str.strip())
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0]
-                return json.loads(json_str.strip())
-        except (json.JSONDecodeError, IndexError):
-            pass
-        
-        # Try to find JSON object/array with regex
+            r = await client.post("/api/generate", json=payload)
+        except Exception as e:
+            logger.warning(f"Warm-up of {self.model} failed: {e}")
+            return False
+        if r.status_code != 200:
+            logger.warning(f"Warm-up of {self.model} failed: {r.status_code} - {r.text}")
+            return False
+        self.warmups += 1
+        self._last_used = time.monotonic()
+        logger.info(f"Warm-up of {self.model} took {time.perf_counter() - started:.2f}s")
+        return True
+
+    async def aresidency(self) -> Dict[str, Any]:
+        """Whether the model is loaded in Ollama's memory, and until when (GET /api/ps)"""
+        client, _ = self._async_state()
         try:
-            json_match = re.search(r'[\[{].*[\]}]', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except (json.JSONDecodeError, AttributeError):
-            pass
-        
-        logger.warning(f"Failed to parse JSON from response: {response[:200]}...")
-        return {"raw_response": response, "error": "Failed to parse JSON"}
+            r = await client.get("/api/ps", timeout=5.0)
+            r.raise_for_status()
+        except Exception as e:
+            return {"resident": None, "error": str(e)}
+        for entry in r.json().get("models", []):
+            if self.model in entry.get("name", ""):
+                return {"resident": True, "expires_at": entry.get("expires_at"), "size_vram": entry.get("size_vram")}
+        return {"resident": False}
+
+    def start_warmup(self, interval: Optional[float] = None):
+        """
+        Load the model now and re-ping it after every `interval` seconds
+        without generations (LLM_WARMUP_INTERVAL by default; 0 disables).
+        Must be called from the running event loop; aclose() stops it.
+        """
+        if interval is not None:
+            self.warmup_interval = interval
+        if self.warmup_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._warmup_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._warmup_task = loop.create_task(self._warmup_loop())
+            logger.info(f"Keeping {self.model} warm (ping after {self.warmup_interval:.0f}s idle, "
+                        f"keep_alive={self.keep_alive if self.keep_alive is not None else 'server default'})")
+
+    async def _warmup_loop(self):
+        await self.awarm_up()
+        while True:
+            idle = time.monotonic() - (self._last_used or 0.0)
+            await asyncio.sleep(max(self.warmup_interval - idle, 0.0) or self.warmup_interval)
+            if self.in_flight == 0 and time.monotonic() - (self._last_used or 0.0) >= self.warmup_interval:
+                await self.awarm_up()
+
+    async def aclose(self):
+        """Stop the warm-up pings and close the pooled clients (called on application shutdown)"""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            await asyncio.gather(self._warmup_task, return_exceptions=True)
+            self._warmup_task = None
+        with self._state_lock:
+            clients = [client for client, _ in self._retired_clients] + [self._client]
+            self._retired_clients = []
+        for client in clients:
+            if client is not None and not client.is_closed:
+                await client.aclose()
+        self._client = None
+        self._async_slots = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
     
     def unload(self):
         """Reset the connection state."""
@@ -218,25 +699,17 @@ class LocalLLM:
     
     def get_info(self) -> Dict[str, Any]:
         """Get information about the current model."""
+        idle = time.monotonic() - self._last_request if self._last_request is not None else None
         return {
-            "backend": "ollama",
+            **super().get_info(),
             "base_url": self.base_url,
-            "model": self.model,
-            "is_loaded": self.is_loaded,
+            "keep_alive": self.keep_alive,
+            "warmup_interval": self.warmup_interval,
+            "warmups": self.warmups,
+            "idle_seconds": round(idle, 1) if idle is not None else None,
         }
 
 
-# Singleton instance getter
-_llm_instance: Optional[LocalLLM] = None
-
-def get_llm_instance() -> LocalLLM:
-    """Get the singleton LLM instance."""
-    global _llm_instance
-    if _llm_instance is None:
-        _llm_instance = LocalLLM()
-    return _llm_instance
-
-
 # Convenience functions
 def generate(prompt: str, **kwargs) -> str:
     """Generate text using the LLM."""
@@ -246,3 +719,15 @@ def generate(prompt: str, **kwargs) -> str:
 def generate_json(prompt: str, **kwargs) -> Dict[str, Any]:
     """Generate and parse JSON from the LLM."""
     return get_llm_instance().generate_json(prompt, **kwargs)
+
+
+async def agenerate(prompt: str, **kwargs) -> str:
+    """Generate text using the LLM without blocking the event loop."""
+    return await get_llm_instance().agenerate(prompt, **kwargs)
+
+
+if REGISTRY is not None:
+    REGISTRY.register_callback(
+        "etta_llm_generations_in_flight", "LLM generations currently running on the active backend", "gauge",
+        lambda: current_llm_instance().in_flight if current_llm_instance() else 0
+    )
@@ -0,0 +1,290 @@
+"""
+Mock LLM Backend
+================
+Deterministic, in-process stand-in for LocalLLM, so the pipeline and the
+test generation paths can be exercised and benchmarked without Ollama,
+a downloaded model or a GPU.
+
+Answers come from, in order:
+1. recorded responses, keyed by the whitespace-normalized prompt
+   (load_recordings / record / save_recordings; the file is a JSON list
+   of {"prompt", "response"} entries)
+2. `respond(prompt)` when a function is given
+3. a synthetic {"tests": [...]} answer built from the "File:" lines of
+   the prompt, identical for identical prompts
+
+Generation cost is simulated like a local model: `latency` seconds plus
+prompt evaluation (prompt tokens / prompt_tokens_per_second) before the
+first token, then one token (about four characters) every
+1/tokens_per_second seconds; a rate of 0 means instant. At most
+max_concurrency generations run at once, further callers wait for a
+slot, and max_tokens truncates the answer. Generations are recorded in
+the same LLM metrics as Ollama ones (model label "mock" by default).
+
+Usage:
+    from backend.model.LLM.backends import set_llm_instance
+    from backend.model.LLM.mock_model import MockLLM
+
+    set_llm_instance(MockLLM(latency=0.2, tokens_per_second=40))
+
+Configuration (environment variables, used when LLM_BACKEND=mock):
+- LLM_MOCK_RECORDINGS: JSON file of recorded responses to replay
+- LLM_MOCK_LATENCY: seconds before the first token (default 0)
+- LLM_MOCK_TOKENS_PER_SECOND: generation speed, 0 for instant (default 0)
+- LLM_MOCK_PROMPT_TOKENS_PER_SECOND: prompt evaluation speed, 0 for instant (default 0)
+- LLM_MAX_CONCURRENCY: generations in flight at once (default 2)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from threading import Lock, BoundedSemaphore
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable
+
+from .backends import LLMBackend
+
+try:
+    from backend.api.metrics import observe_llm_generation
+except ImportError:  # Package used standalone, outside the ETTA-X app
+    observe_llm_generation = None
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", 2)))
+CHARS_PER_TOKEN = 4
+
+_FILE_LINE = re.compile(r"^\s*File:\s*(\S+)", re.MULTILINE)
+
+
+def prompt_key(prompt: str) -> str:
+    """Recording key: SHA-256 of the prompt with whitespace collapsed"""
+    return hashlib.sha256(" ".join(prompt.split()).encode("utf-8")).hexdigest()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into token-sized pieces"""
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+def synthetic_response(prompt: str) -> str:
+    """Deterministic {"tests": [...]} answer for a test generation prompt"""
+    files = _FILE_LINE.findall(prompt)[:2] or ["endpoint"]
+    seed = prompt_key(prompt)[:6]
+    tests = []
+    for filename in files:
+        stem = re.sub(r"[^a-z0-9]+", "_", os.path.splitext(os.path.basename(filename))[0].lower()).strip("_")
+        endpoint = f"/api/{stem or 'endpoint'}"
+        tests += [
+            {"name": f"test_{stem}_valid_request_{seed}", "endpoint": endpoint, "method": "POST",
+             "payload": {"value": "valid"}, "expected_status": 200,
+             "description": f"Valid input to {filename} succeeds"},
+            {"name": f"test_{stem}_invalid_payload_{seed}", "endpoint": endpoint, "method": "POST",
+             "payload": {"value": None}, "expected_status": 422,
+             "description": f"Invalid input to {filename} is rejected"},
+            {"name": f"test_{stem}_requires_auth_{seed}", "endpoint": endpoint, "method": "GET",
+             "payload": {}, "expected_status": 401,
+             "description": f"{filename} requires authentication"},
+        ]
+    return json.dumps({"tests": tests})
+
+
+class MockLLM(LLMBackend):
+    """Deterministic LLM backend with simulated latency and throughput"""
+
+    backend_name = "mock"
+
+    def __init__(self, model: str = "mock", latency: float = 0.0, tokens_per_second: float = 0.0,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, recordings: Optional[Dict[str, str]] = None,
+                 respond: Optional[Callable[[str], str]] = None, prompt_tokens_per_second: float = 0.0):
+        self.model = model
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.max_concurrency = max(1, max_concurrency)
+        self.respond = respond
+        self.is_loaded = True
+        self.in_flight = 0
+        self._recordings: Dict[str, Dict[str, str]] = {}
+        self._gen_slots = BoundedSemaphore(self.max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = Lock()
+        # Counters for benchmarks
+        self.requests = 0
+        self.replayed = 0
+        self.tokens_generated = 0
+        self.max_in_flight = 0
+        for prompt, response in (recordings or {}).items():
+            self.record(prompt, response)
+
+    @classmethod
+    def from_env(cls) -> 'MockLLM':
+        """Build the backend selected with LLM_BACKEND=mock"""
+        llm = cls(
+            latency=float(os.getenv("LLM_MOCK_LATENCY", 0)),
+            tokens_per_second=float(os.getenv("LLM_MOCK_TOKENS_PER_SECOND", 0)),
+            prompt_tokens_per_second=float(os.getenv("LLM_MOCK_PROMPT_TOKENS_PER_SECOND", 0)),
+        )
+        path = os.getenv("LLM_MOCK_RECORDINGS")
+        if path:
+            llm.load_recordings(path)
+        return llm
+
+    # ==================== RECORDINGS ====================
+
+    def record(self, prompt: str, response: str):
+        """Replay `response` whenever `prompt` is generated"""
+        self._recordings[prompt_key(prompt)] = {"prompt": prompt, "response": response}
+
+    def load_recordings(self, path: str) -> int:
+        """Load [{"prompt", "response"}, ...]; returns the number of entries"""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        for entry in entries:
+            self.record(entry["prompt"], entry["response"])
+        logger.info(f"Loaded {len(entries)} recorded LLM responses from {path}")
+        return len(entries)
+
+    def save_recordings(self, path: str):
+        """Write the recorded responses in the load_recordings format"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(self._recordings.values()), f, indent=2)
+
+    def _answer(self, prompt: str) -> str:
+        recorded = self._recordings.get(prompt_key(prompt))
+        if recorded is not None:
+            with self._lock:
+                self.replayed += 1
+            return recorded["response"]
+        if self.respond:
+            return self.respond(prompt)
+        return synthetic_response(prompt)
+
+    # ==================== GENERATION ====================
+
+    def load(self, force_cpu: bool = False) -> bool:
+        self.is_loaded = True
+        return True
+
+    async def aload(self) -> bool:
+        return self.load()
+
+    def configure(self, model: Optional[str] = None, max_concurrency: Optional[int] = None,
+                  latency: Optional[float] = None, tokens_per_second: Optional[float] = None, **settings):
+        """Change the model name, concurrency limit or simulated speed"""
+        self.model = model or self.model
+        if max_concurrency:
+            self.max_concurrency = max(1, max_concurrency)
+            self._gen_slots = BoundedSemaphore(self.max_concurrency)
+            self._async_slots = None
+        if latency is not None:
+            self.latency = latency
+        if tokens_per_second is not None:
+            self.tokens_per_second = tokens_per_second
+
+    def _slots(self) -> asyncio.Semaphore:
+        """Concurrency slots for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_slots is None or self._loop is not loop:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._async_slots
+
+    def _start(self, prompt: str, max_tokens: Optional[int]) -> List[str]:
+        """Count the request and return the tokens to emit"""
+        tokens = tokenize(self._answer(prompt))[:max_tokens or 1024]
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return tokens
+
+    def _finish(self, status: str, started: float, prompt: str, generated: int, first_token: Optional[float]):
+        with self._lock:
+            self.in_flight -= 1
+            self.tokens_generated += generated
+        if observe_llm_generation:
+            observe_llm_generation(self.model, status, time.perf_counter() - started, {
+                "prompt_eval_count": len(prompt) // CHARS_PER_TOKEN,
+                "eval_count": generated,
+                "eval_duration": int((time.perf_counter() - (first_token or started)) * 1e9),
+            })
+
+    @property
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _first_token_delay(self, prompt: str) -> float:
+        """Fixed latency plus prompt evaluation"""
+        if self.prompt_tokens_per_second <= 0:
+            return self.latency
+        return self.latency + len(prompt) / CHARS_PER_TOKEN / self.prompt_tokens_per_second
+
+    def generate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                 stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Blocking generation (sleeps for the simulated duration)"""
+        with self._gen_slots:
+            started = time.perf_counter()
+            tokens = self._start(prompt, max_tokens)
+            status = "error"
+            try:
+                time.sleep(self._first_token_delay(prompt) + self._token_delay * len(tokens))
+                status = "ok"
+                return "".join(tokens).strip()
+            finally:
+                self._finish(status, started, prompt, len(tokens), started + self._first_token_delay(prompt))
+
+    async def agenerate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                        stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Generation that waits on the event loop instead of blocking it"""
+        async with self._slots():
+            started = time.perf_counter()
+            tokens = self._start(prompt, max_tokens)
+            status = "error"
+            try:
+                await asyncio.sleep(self._first_token_delay(prompt) + self._token_delay * len(tokens))
+                status = "ok"
+                return "".join(tokens).strip()
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                self._finish(status, started, prompt, len(tokens), started + self._first_token_delay(prompt))
+
+    async def astream(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                      stop: Optional[List[str]] = None, **kwargs) -> AsyncIterator[str]:
+        """Yield the answer token by token at tokens_per_second"""
+        async with self._slots():
+            started = time.perf_counter()
+            tokens = self._start(prompt, max_tokens)
+            generated = 0
+            first_token = None
+            status = "stopped"  # Closed by the consumer before the answer ended
+            delay = self._token_delay
+            try:
+                await asyncio.sleep(self._first_token_delay(prompt))
+                first_token = time.perf_counter()
+                for token in tokens:
+                    if delay:
+                        await asyncio.sleep(delay)
+                    generated += 1
+                    yield token
+                status = "ok"
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                self._finish(status, started, prompt, generated, first_token)
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            **super().get_info(),
+            "latency": self.latency,
+            "tokens_per_second": self.tokens_per_second,
+            "prompt_tokens_per_second": self.prompt_tokens_per_second,
+            "recordings": len(self._recordings),
+        }
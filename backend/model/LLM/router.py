@@ -0,0 +1,416 @@
+"""
+LLM Router
+==========
+Spreads generations over a pool of LLM backends (e.g. several Ollama
+servers, or a large primary model plus a smaller, faster one) and fails
+over between them.
+
+Routing:
+- least_outstanding (default): the backend with the lowest share of its
+  own concurrency in use (outstanding / max_concurrency); ties go to
+  the backend listed first, so the first entry is the primary
+- ewma: the lowest latency EWMA x (outstanding + 1) / max_concurrency,
+  so a slow or busy server loses traffic to a faster one. Latency is
+  the request's wall time per generated token (about four characters),
+  so prompt evaluation, queueing on the server and generation speed
+  all count, however early a stream is closed. Backends without
+  samples are assumed to be as fast as the pool's average
+
+Every backend keeps its own concurrency cap (LocalLLM max_concurrency),
+so the pool runs up to the sum of the caps at once.
+
+Health:
+- a failed request marks its backend unhealthy and is retried on the
+  next backend (streams only until their first token)
+- unhealthy backends are only used when no healthy one is left
+- every LLM_ROUTER_HEALTH_INTERVAL seconds all backends are probed
+  (GET /api/tags and the model); a backend that answers is healthy
+  again, as is one that serves a request successfully
+
+Usage:
+    from backend.model.LLM.router import LLMRouter
+    from backend.model.LLM.local_model import LocalLLM
+
+    router = LLMRouter([
+        LocalLLM(base_url="http://gpu-1:11434", model="codellama:7b-instruct", max_concurrency=2),
+        LocalLLM(base_url="http://cpu-1:11434", model="qwen2.5-coder:1.5b", max_concurrency=1),
+    ], strategy="ewma")
+    set_llm_instance(router)
+
+Configuration (environment variables, used when LLM_BACKEND=router):
+- LLM_ROUTER_BACKENDS: comma-separated base_url|model|max_concurrency
+  entries, model and concurrency optional (default: the single
+  OLLAMA_BASE_URL/OLLAMA_MODEL server)
+- LLM_ROUTER_STRATEGY: least_outstanding (default) or ewma
+- LLM_ROUTER_HEALTH_INTERVAL: seconds between health probes, 0 disables (default 15)
+- LLM_ROUTER_EWMA_ALPHA: weight of the newest latency sample (default 0.3)
+
+Set PIPELINE_CONCURRENCY_LLM to the pool's total concurrency so the
+pipeline admits enough generations to use every backend.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
+
+from .backends import LLMBackend, current_llm_instance
+
+try:
+    from backend.api.metrics import REGISTRY
+except ImportError:  # Package used standalone, outside the ETTA-X app
+    REGISTRY = None
+
+logger = logging.getLogger(__name__)
+
+LLM_ROUTER_BACKENDS = os.getenv("LLM_ROUTER_BACKENDS", "")
+LLM_ROUTER_STRATEGY = os.getenv("LLM_ROUTER_STRATEGY", "least_outstanding").lower()
+LLM_ROUTER_HEALTH_INTERVAL = float(os.getenv("LLM_ROUTER_HEALTH_INTERVAL", 15))
+LLM_ROUTER_EWMA_ALPHA = float(os.getenv("LLM_ROUTER_EWMA_ALPHA", 0.3))
+
+STRATEGIES = ("least_outstanding", "ewma")
+
+CHARS_PER_TOKEN = 4
+
+
+def parse_backends(spec: str) -> List[Tuple[str, Optional[str], Optional[int]]]:
+    """(base_url, model, max_concurrency) entries of LLM_ROUTER_BACKENDS"""
+    entries = []
+    for entry in spec.split(","):
+        parts = [part.strip() for part in entry.split("|")]
+        if not parts[0]:
+            continue
+        model = parts[1] if len(parts) > 1 and parts[1] else None
+        concurrency = int(parts[2]) if len(parts) > 2 and parts[2] else None
+        entries.append((parts[0], model, concurrency))
+    return entries
+
+
+@dataclass
+class RouteTarget:
+    """One backend of the pool and its routing state"""
+    backend: LLMBackend
+    name: str
+    healthy: bool = True
+    outstanding: int = 0
+    ewma: Optional[float] = None  # Seconds per generated token
+    requests: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_checked: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.backend.max_concurrency)
+
+    def cost(self, strategy: str, default_ewma: float = 1.0) -> float:
+        if strategy == "ewma":
+            ewma = self.ewma if self.ewma is not None else default_ewma
+            return ewma * (self.outstanding + 1) / self.capacity
+        return self.outstanding / self.capacity
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "backend": self.backend.backend_name,
+            "model": self.backend.model,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.capacity,
+            "ewma_ms_per_token": round(self.ewma * 1000, 2) if self.ewma is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class LLMRouter(LLMBackend):
+    """LLM backend that routes each generation to one backend of a pool"""
+
+    backend_name = "router"
+
+    def __init__(self, backends: List[LLMBackend], strategy: str = LLM_ROUTER_STRATEGY,
+                 health_interval: float = LLM_ROUTER_HEALTH_INTERVAL, ewma_alpha: float = LLM_ROUTER_EWMA_ALPHA):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy} (use one of {', '.join(STRATEGIES)})")
+        self.targets = [
+            RouteTarget(backend, f"{getattr(backend, 'base_url', backend.backend_name)}/{backend.model}")
+            for backend in backends
+        ]
+        # Cache keys and metrics see the pool's models
+        self.model = "+".join(dict.fromkeys(backend.model for backend in backends))
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self.ewma_alpha = ewma_alpha
+        self.is_loaded = False
+        self.failovers = 0
+        self._lock = Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> 'LLMRouter':
+        """Build the pool selected with LLM_BACKEND=router"""
+        from .local_model import LocalLLM
+        entries = parse_backends(LLM_ROUTER_BACKENDS)
+        if not entries:
+            return cls([LocalLLM()])
+        return cls([LocalLLM(base_url=url, model=model, max_concurrency=concurrency)
+                    for url, model, concurrency in entries])
+
+    @property
+    def max_concurrency(self) -> int:
+        healthy = [target.capacity for target in self.targets if target.healthy]
+        return sum(healthy) or sum(target.capacity for target in self.targets)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(target.outstanding for target in self.targets)
+
+    # ==================== ROUTING ====================
+
+    def _acquire(self, tried: List[RouteTarget]) -> Optional[RouteTarget]:
+        """Pick the best untried backend and count the request on it"""
+        with self._lock:
+            sampled = [target.ewma for target in self.targets if target.ewma is not None]
+            default_ewma = sum(sampled) / len(sampled) if sampled else 1.0
+            candidates = [
+                (not target.healthy, target.cost(self.strategy, default_ewma), index, target)
+                for index, target in enumerate(self.targets) if target not in tried
+            ]
+            if not candidates:
+                return None
+            target = min(candidates, key=lambda candidate: candidate[:3])[3]
+            target.outstanding += 1
+            target.requests += 1
+            if tried:
+                self.failovers += 1
+            return target
+
+    def _release(self, target: RouteTarget):
+        with self._lock:
+            target.outstanding -= 1
+
+    def _succeeded(self, target: RouteTarget, seconds: float, chars: int):
+        sample = seconds / max(1, chars // CHARS_PER_TOKEN)
+        with self._lock:
+            target.ewma = sample if target.ewma is None else (
+                self.ewma_alpha * sample + (1 - self.ewma_alpha) * target.ewma
+            )
+        self._set_health(target, True)
+
+    def _failed(self, target: RouteTarget, error: Exception):
+        target.failures += 1
+        target.last_error = str(error) or type(error).__name__
+        self._set_health(target, False)
+
+    def _set_health(self, target: RouteTarget, healthy: bool):
+        if target.healthy != healthy:
+            if healthy:
+                logger.info(f"LLM backend {target.name} is healthy again")
+            else:
+                logger.warning(f"LLM backend {target.name} marked unhealthy: {target.last_error}")
+        target.healthy = healthy
+        self.is_loaded = any(t.healthy for t in self.targets)
+
+    @staticmethod
+    def _all_failed(error: Optional[Exception]) -> RuntimeError:
+        return RuntimeError(f"All LLM backends failed (last error: {error})")
+
+    # ==================== HEALTH ====================
+
+    def load(self, force_cpu: bool = False) -> bool:
+        """Check every backend (blocking)"""
+        for target in self.targets:
+            target.healthy = target.backend.load()
+            target.last_checked = time.time()
+        self.is_loaded = any(target.healthy for target in self.targets)
+        return self.is_loaded
+
+    async def aload(self) -> bool:
+        self._ensure_health_checks()
+        if not self.is_loaded:
+            await self.acheck_health()
+        return self.is_loaded
+
+    async def acheck_health(self) -> Dict[str, bool]:
+        """Probe every backend now; returns health by backend name"""
+        results = await asyncio.gather(
+            *(target.backend.ahealth_check() for target in self.targets), return_exceptions=True
+        )
+        for target, result in zip(self.targets, results):
+            target.last_checked = time.time()
+            if result is True:
+                self._set_health(target, True)
+            else:
+                target.last_error = str(result) if isinstance(result, Exception) else "health check failed"
+                self._set_health(target, False)
+        return {target.name: target.healthy for target in self.targets}
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.acheck_health()
+            except Exception as e:
+                logger.error(f"LLM health check failed: {e}")
+
+    def _ensure_health_checks(self):
+        """Run the periodic health probes on the running event loop"""
+        if self.health_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._health_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_loop())
+
+    async def awarm_up(self) -> bool:
+        """Warm up every backend; True if at least one model is loaded"""
+        results = await asyncio.gather(
+            *(target.backend.awarm_up() for target in self.targets), return_exceptions=True
+        )
+        return any(result is True for result in results)
+
+    async def aresidency(self) -> Dict[str, Any]:
+        results = await asyncio.gather(
+            *(target.backend.aresidency() for target in self.targets), return_exceptions=True
+        )
+        return {
+            target.name: result if isinstance(result, dict) else {"resident": None, "error": str(result)}
+            for target, result in zip(self.targets, results)
+        }
+
+    def start_warmup(self, interval: Optional[float] = None):
+        """Keep every backend's model warm"""
+        for target in self.targets:
+            target.backend.start_warmup(interval)
+
+    # ==================== GENERATION ====================
+
+    def generate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                 stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Blocking generation on the best backend, failing over on errors"""
+        tried, error = [], None
+        while (target := self._acquire(tried)) is not None:
+            tried.append(target)
+            started = time.perf_counter()
+            try:
+                response = target.backend.generate(prompt, max_tokens=max_tokens, temperature=temperature,
+                                                   stop=stop, **kwargs)
+                self._succeeded(target, time.perf_counter() - started, len(response))
+                return response
+            except Exception as e:
+                self._failed(target, e)
+                error = e
+            finally:
+                self._release(target)
+        raise self._all_failed(error) from error
+
+    async def agenerate(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                        stop: Optional[List[str]] = None, **kwargs) -> str:
+        """Generation on the best backend, failing over on errors"""
+        self._ensure_health_checks()
+        tried, error = [], None
+        while (target := self._acquire(tried)) is not None:
+            tried.append(target)
+            started = time.perf_counter()
+            try:
+                response = await target.backend.agenerate(prompt, max_tokens=max_tokens, temperature=temperature,
+                                                          stop=stop, **kwargs)
+                self._succeeded(target, time.perf_counter() - started, len(response))
+                return response
+            except Exception as e:
+                self._failed(target, e)
+                error = e
+            finally:
+                self._release(target)
+        raise self._all_failed(error) from error
+
+    async def astream(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                      stop: Optional[List[str]] = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream from the best backend.
+
+        A backend that fails before its first token is replaced by the next
+        one; after that the error reaches the caller, since the tokens
+        already yielded cannot be taken back.
+        """
+        self._ensure_health_checks()
+        tried, error = [], None
+        while (target := self._acquire(tried)) is not None:
+            tried.append(target)
+            started = time.perf_counter()
+            chars = 0
+            try:
+                async with aclosing(target.backend.astream(prompt, max_tokens=max_tokens, temperature=temperature,
+                                                           stop=stop, **kwargs)) as tokens:
+                    async for token in tokens:
+                        chars += len(token)
+                        yield token
+                self._succeeded(target, time.perf_counter() - started, chars)
+                return
+            except GeneratorExit:
+                # Closed by the consumer once it had enough; the backend served fine
+                self._succeeded(target, time.perf_counter() - started, chars)
+                raise
+            except Exception as e:
+                self._failed(target, e)
+                if chars:
+                    raise
+                error = e
+            finally:
+                self._release(target)
+        raise self._all_failed(error) from error
+
+    def configure(self, strategy: Optional[str] = None, health_interval: Optional[float] = None, **settings):
+        """Change the routing strategy or health interval; other settings go to every backend"""
+        if strategy is not None:
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown routing strategy: {strategy}")
+            self.strategy = strategy
+        if health_interval is not None:
+            self.health_interval = health_interval
+        if settings:
+            for target in self.targets:
+                target.backend.configure(**settings)
+
+    async def aclose(self):
+        """Stop the health probes and close every backend"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for target in self.targets:
+            await target.backend.aclose()
+
+    def unload(self):
+        for target in self.targets:
+            target.backend.unload()
+        self.is_loaded = False
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            **super().get_info(),
+            "strategy": self.strategy,
+            "failovers": self.failovers,
+            "backends": [target.to_dict() for target in self.targets],
+        }
+
+
+def _router_health() -> Dict[Tuple[str], int]:
+    llm = current_llm_instance()
+    if not isinstance(llm, LLMRouter):
+        return {}
+    return {(target.name,): int(target.healthy) for target in llm.targets}
+
+
+if REGISTRY is not None:
+    REGISTRY.register_callback(
+        "etta_llm_backend_healthy", "Health of the LLM router's backends (1 healthy, 0 unhealthy)", "gauge",
+        _router_health, ("backend",)
+    )
@@ -0,0 +1,221 @@
+"""
+Incremental Test Parser
+=======================
+Single-pass, tolerant extraction of JSON test cases from LLM output,
+usable on a streamed response while it is generated.
+
+The prompt asks for {"tests":[{...},{...}]}, but models also answer with
+a bare [{...}] array, one {...} object per test, markdown fences, prose
+before and after the JSON, trailing commas, or output cut off at
+max_tokens. The parser scans the text once, left to right, only stopping
+at quotes, backslashes, brackets and backticks, and tracks strings and
+bracket nesting. Every object is handed out as soon as its closing brace
+arrives if it is
+- an element of a top-level array, or of an array directly inside the
+  top-level object (the "tests" list), or
+- a top-level object that looks like a test (has "name" or "endpoint").
+Each such object is decoded once; a fragment that is not valid JSON is
+retried with trailing commas removed and otherwise skipped, so one bad
+test does not lose the others.
+
+Noise is tolerated: text outside brackets is ignored, a ``` fence resets
+any unbalanced brackets opened by prose, and a closing bracket that does
+not match unwinds to its opener. Once a top-level object/array that held
+tests closes, `complete` is set so a streaming caller can stop the
+generation instead of waiting for trailing chatter.
+
+Usage:
+    parser = StreamingTestParser()
+    async for chunk in llm.astream(prompt):
+        for test in parser.feed(chunk):
+            ...
+        if parser.complete:
+            break
+
+    tests = StreamingTestParser.parse(response)
+    data = StreamingTestParser.first_json(response)
+"""
+
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+# Characters the scanner has to look at; everything else is skipped in bulk
+_SPECIAL = re.compile(r'["\\{}\[\]`]')
+# Rest of a JSON string up to and including its closing quote
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_CLOSERS = {"}": "{", "]": "["}
+
+
+def decode_fragment(fragment: str) -> Any:
+    """json.loads, retried without trailing commas; None if still invalid"""
+    try:
+        return json.loads(fragment)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", fragment))
+    except json.JSONDecodeError:
+        return None
+
+
+class StreamingTestParser:
+    """Extracts complete test objects from a growing LLM response"""
+
+    def __init__(self):
+        self.items: List[Dict[str, Any]] = []
+        self.values: List[Any] = []  # Decoded top-level JSON values
+        self.complete = False
+        # Chunks are kept as received and only joined for the object being
+        # decoded, so feeding n characters costs O(n) however small the chunks
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._size = 0
+        self._text: Optional[str] = None
+        self._pending = ""  # Unscanned tail: a trailing backslash or backticks
+        self._stack: List[Tuple[str, int]] = []
+        self._root_items = 0
+        self._in_string = False
+
+    @classmethod
+    def parse(cls, text: str) -> List[Dict[str, Any]]:
+        """Extract all test objects from a complete response"""
+        parser = cls()
+        parser.feed(text)
+        return parser.items
+
+    @classmethod
+    def first_json(cls, text: str) -> Optional[Any]:
+        """First well-formed JSON object/array in a response, or None"""
+        parser = cls()
+        parser.feed(text)
+        return parser.first_value()
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    def first_value(self) -> Optional[Any]:
+        """First top-level object/array that decoded successfully"""
+        return self.values[0] if self.values else None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add generated text; returns the test objects completed by it"""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        self._offsets.append(self._size)
+        self._size += len(chunk)
+        self._text = None
+
+        data = self._pending + chunk
+        base = self._size - len(data)  # Offset of data[0] in the full text
+        self._pending = ""
+        found = []
+        stack = self._stack
+        pos = 0
+        end = len(data)
+
+        while True:
+            match = _SPECIAL.search(data, pos)
+            if match is None:
+                break
+            i = match.start()
+            char = data[i]
+
+            if self._in_string:
+                if char == "\\":
+                    if i + 1 >= end:
+                        self._pending = data[i:]  # Escaped character not generated yet
+                        break
+                    pos = i + 2
+                    continue
+                if char == '"':
+                    self._in_string = False
+                pos = i + 1
+                continue
+
+            if char == "`":
+                if end - i < 3:
+                    self._pending = data[i:]  # Could be the start of a fence
+                    break
+                if data.startswith("```", i):
+                    stack.clear()  # Unbalanced brackets from prose end at a fence
+                    self._root_items = 0
+                    pos = i + 3
+                    continue
+                pos = i + 1
+                continue
+
+            pos = i + 1
+            if char in "{[":
+                stack.append((char, base + i))
+            elif not stack:
+                continue  # Quotes and closers outside JSON are prose
+            elif char == '"':
+                string = _STRING_REST.match(data, pos)
+                if string:
+                    pos = string.end()  # Skip the whole string in one step
+                else:
+                    self._in_string = True  # Ends in a later chunk
+            else:
+                opener = _CLOSERS[char]
+                while stack and stack[-1][0] != opener:
+                    stack.pop()  # Mismatched closer: unwind to its opener
+                if not stack:
+                    continue
+                start = stack.pop()[1]
+                if not stack:
+                    item = self._close_root(start, base + i + 1)
+                elif char == "}":
+                    item = self._accept_item(start, base + i + 1)
+                else:
+                    continue
+                if item is not None:
+                    self.items.append(item)
+                    found.append(item)
+
+        return found
+
+    def _slice(self, start: int, end: int) -> str:
+        """text[start:end] without joining the whole response"""
+        first = bisect_right(self._offsets, start) - 1
+        last = bisect_right(self._offsets, end - 1) - 1
+        if first == last:
+            offset = self._offsets[first]
+            return self._chunks[first][start - offset:end - offset]
+        return "".join(
+            [self._chunks[first][start - self._offsets[first]:]]
+            + self._chunks[first + 1:last]
+            + [self._chunks[last][:end - self._offsets[last]]]
+        )
+
+    def _accept_item(self, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """Decode a just-closed object if it is an element of the test array"""
+        stack = self._stack
+        if stack[-1][0] != "[" or len(stack) > 2:
+            return None
+        item = decode_fragment(self._slice(start, end))
+        if not isinstance(item, dict):
+            return None
+        self._root_items += 1
+        return item
+
+    def _close_root(self, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """A top-level object/array closed; returns it if it is a test itself"""
+        value = decode_fragment(self._slice(start, end))
+        if value is not None:
+            self.values.append(value)
+        if self._root_items:
+            # A wrapper/array that held tests: the answer is complete
+            self.complete = True
+            self._root_items = 0
+            return None
+        if isinstance(value, dict) and ("name" in value or "endpoint" in value):
+            return value
+        return None
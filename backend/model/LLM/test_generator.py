@@ -12,15 +12,27 @@ Usage:
     )
 """
 
+import asyncio
 import json
 import logging
 import re
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, Callable, AsyncContextManager
+from contextlib import aclosing, nullcontext
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
-from .local_model import get_llm_instance
-from .config import SYSTEM_PROMPT, TEST_GENERATION_PROMPT_TEMPLATE
+from .backends import get_llm_instance
+from .config import (
+    SYSTEM_PROMPT, TEST_GENERATION_PROMPT_TEMPLATE, PROMPT_TEMPLATE_VERSION, MAX_GENERATED_TESTS,
+    BATCH_CHANGES_PER_PROMPT, BATCH_MAX_PROMPTS
+)
+from .stream_parser import StreamingTestParser
+
+try:
+    from backend.api.llm_cache import llm_cache
+except ImportError:  # Package used standalone, outside the ETTA-X app
+    llm_cache = None
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +62,9 @@ class TestGenerationResult:
     error: Optional[str] = None
     generation_time_ms: float = 0.0
     model_used: str = "CodeLlama-7B-Instruct"
+    cached: bool = False
+    prompt_count: int = 1
+    duplicates_removed: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -59,10 +74,47 @@ class TestGenerationResult:
             "error": self.error,
             "generation_time_ms": self.generation_time_ms,
             "model_used": self.model_used,
+            "cached": self.cached,
+            "prompt_count": self.prompt_count,
+            "duplicates_removed": self.duplicates_removed,
             "generated_at": datetime.now().isoformat()
         }
 
 
+class TestMerger:
+    """
+    Merges tests from several generations: drops tests that exercise the
+    same request (method, endpoint, payload, expected status) and renames
+    clashing test names so the merged set can go into one pytest file.
+    """
+    
+    def __init__(self):
+        self.tests: List[TestCase] = []
+        self.duplicates = 0
+        self._seen = set()
+        self._names = set()
+    
+    def add(self, test: TestCase) -> Optional[TestCase]:
+        """Add a test; returns it (possibly renamed), or None for a duplicate"""
+        key = (
+            test.method.upper(), test.endpoint.rstrip("/"),
+            json.dumps(test.payload, sort_keys=True, default=str), test.expected_status
+        )
+        if key in self._seen:
+            self.duplicates += 1
+            return None
+        self._seen.add(key)
+        
+        name, suffix = test.name, 2
+        while name in self._names:
+            name = f"{test.name}_{suffix}"
+            suffix += 1
+        test.name = name
+        self._names.add(name)
+        self.tests.append(test)
+        return test
+
+
 class TestGenerator:
     """
     Generates test cases using the local LLM.
@@ -87,124 +139,15 @@ class TestGenerator:
     def _parse_response(self, response: str) -> List[Dict[str, Any]]:
         """
         Parse LLM response to extract test cases.
-        Tries multiple strategies for robustness.
+        Single pass over the text; tolerates fences, prose, trailing commas
+        and truncated output (see stream_parser).
         """
         logger.debug(f"Parsing LLM response ({len(response)} chars): {response[:200]}...")
         
-        # Clean up response first
-        cleaned = response.strip()
-        
-        # Remove markdown code blocks
-        cleaned = re.sub(r'```json\s*', '', cleaned)
-        cleaned = re.sub(r'```python\s*', '', cleaned)
-        cleaned = re.sub(r'```\s*', '', cleaned)
-        cleaned = cleaned.strip()
-        
-        # Strategy 1: Direct JSON parse
-        try:
-            data = json.loads(cleaned)
-            tests = self._extract_tests_from_data(data)
-            if tests:
-                return tests
-        except json.JSONDecodeError as e:
-            logger.debug(f"Direct parse failed: {e}")
-        
-        # Strategy 2: Find JSON object with tests key
-        match = re.search(r'\{\s*"tests"\s*:\s*\[', cleaned)
-        if match:
-            # Try to find matching closing bracket
-            start = match.start()
-            try:
-                # Parse from the start of the JSON object
-                data = json.loads(cleaned[start:])
-                tests = self._extract_tests_from_data(data)
-                if tests:
-                    return tests
-            except json.JSONDecodeError:
-                # Try to find the end manually
-                bracket_count = 0
-                in_string = False
-                escape_next = False
-                for i, char in enumerate(cleaned[start:]):
-                    if escape_next:
-                        escape_next = False
-                        continue
-                    if char == '\\':
-                        escape_next = True
-                        continue
-                    if char == '"' and not escape_next:
-                        in_string = not in_string
-                        continue
-                    if not in_string:
-                        if char == '{':
-                            bracket_count += 1
-                        elif char == '}':
-                            bracket_count -= 1
-                            if bracket_count == 0:
-                                try:
-                                    data = json.loads(cleaned[start:start+i+1])
-                                    tests = self._extract_tests_from_data(data)
-                                    if tests:
-                                        return tests
-                                except json.JSONDecodeError:
-                                    pass
-                                break
-        
-        # Strategy 3: Find just a JSON array
-        array_match = re.search(r'\[\s*\{', cleaned)
-        if array_match:
-            start = array_match.start()
-            try:
-                data = json.loads(cleaned[start:])
-                tests = self._extract_tests_from_data(data)
-                if tests:
-                    return tests
-            except json.JSONDecodeError:
-                pass
-        
-        # Strategy 4: Extract individual test objects
-        test_objects = []
-        for match in re.finditer(r'\{[^{}]*"name"[^{}]*"endpoint"[^{}]*\}', cleaned):
-            try:
-                obj = json.loads(match.group())
-                if isinstance(obj, dict) and 'name' in obj:
-                    test_objects.append(obj)
-            except json.JSONDecodeError:
-                continue
-        
-        if test_objects:
-            return test_objects
-        
-        logger.error(f"Failed to parse test cases from response: {response[:500]}")
-        return []
-    
-    def _extract_tests_from_data(self, data: Any) -> List[Dict[str, Any]]:
-        """Extract test cases from parsed JSON data."""
-        if isinstance(data, dict):
-            if "tests" in data:
-                tests = data["tests"]
-                if isinstance(tests, list):
-                    # Filter to only include dict items
-                    return [t for t in tests if isinstance(t, dict)]
-            # Maybe the dict itself is a test
-            if "name" in data or "endpoint" in data:
-                return [data]
-        elif isinstance(data, list):
-            # Filter to only include dict items
-            result = []
-            for item in data:
-                if isinstance(item, dict):
-                    result.append(item)
-                elif isinstance(item, str):
-                    # Try to parse string as JSON
-                    try:
-                        parsed = json.loads(item)
-                        if isinstance(parsed, dict):
-                            result.append(parsed)
-                    except json.JSONDecodeError:
-                        pass
-            return result
-        return []
+        tests = StreamingTestParser.parse(response)
+        if not tests:
+            logger.error(f"Failed to parse test cases from response: {response[:500]}")
+        return tests
     
     def _normalize_test(self, test_data: Any, index: int) -> TestCase:
         """Normalize and validate a test case."""
@@ -271,11 +214,23 @@ class TestGenerator:
         
         return "functional"
     
+    def _cache_key(self, prompt: str, **options) -> Optional[str]:
+        """Key of a generation in the LLM result cache (None without the cache)"""
+        if llm_cache is None:
+            return None
+        return llm_cache.key(self.llm.model, PROMPT_TEMPLATE_VERSION, prompt, options)
+    
+    def _cache_store(self, key: Optional[str], result: TestGenerationResult):
+        """Remember the raw response of a successful generation"""
+        if key and result.success and result.tests:
+            llm_cache.store(key, self.llm.model, PROMPT_TEMPLATE_VERSION, result.raw_response)
+    
     def generate(
         self,
         code_description: str,
         language: str = "python",
-        max_tokens: int = 2048
+        max_tokens: int = 2048,
+        use_cache: bool = True
     ) -> TestGenerationResult:
         """
         Generate test cases from a code description.
@@ -284,17 +239,25 @@ class TestGenerator:
             code_description: Description of the code/API to test
             language: Target language (python, javascript, etc.)
             max_tokens: Maximum tokens for generation
+            use_cache: Serve an identical earlier generation from the LLM
+                       result cache (False forces a new generation)
             
         Returns:
             TestGenerationResult with generated tests
         """
-        import time
         start_time = time.time()
         
         try:
             # Build prompt
             prompt = self._build_prompt(code_description, language)
             
+            cache_key = self._cache_key(prompt, max_tokens=max_tokens, temperature=0.1)
+            cached = llm_cache.lookup(cache_key, use_cache) if cache_key else None
+            if cached is not None:
+                result = self._build_result(cached, start_time)
+                result.cached = True
+                return result
+            
             # Generate response
             logger.info("Generating tests with local LLM...")
             response = self.llm.generate(
@@ -302,62 +265,255 @@ class TestGenerator:
                 max_tokens=max_tokens,
                 temperature=0.1
             )
+            result = self._build_result(response, start_time)
+            self._cache_store(cache_key, result)
+            return result
             
-            # Log raw response for debugging
-            logger.info(f"LLM raw response length: {len(response)} chars")
-            logger.debug(f"LLM raw response: {response[:1000]}...")
-            
-            # Parse response
-            test_data_list = self._parse_response(response)
-            
-            logger.info(f"Parsed {len(test_data_list)} test items from response")
-            for i, item in enumerate(test_data_list[:3]):
-                logger.debug(f"Parsed item {i}: type={type(item).__name__}, value={str(item)[:200]}")
+        except Exception as e:
+            return self._failed(e, start_time)
+    
+    async def agenerate(
+        self,
+        code_description: str,
+        language: str = "python",
+        max_tokens: int = 2048,
+        max_tests: Optional[int] = MAX_GENERATED_TESTS,
+        on_test: Optional[Callable[[TestCase], None]] = None,
+        use_cache: bool = True,
+        slot: Optional[Callable[[], AsyncContextManager]] = None
+    ) -> TestGenerationResult:
+        """
+        Stream test cases from the LLM without blocking the event loop.
+        
+        Tokens are fed to a StreamingTestParser; every test object is
+        normalized and passed to on_test as soon as it closes. Generation
+        stops once the {"tests": [...]} object is complete or max_tests
+        tests were produced, instead of running on to max_tokens. If
+        nothing could be parsed incrementally, the full text goes through
+        the regular fallback parser. A cached response is replayed through
+        the same parser (and on_test) without calling the LLM; cache reads
+        and writes run in a worker thread. Entries are shared with
+        generate() (max_tests is not part of the key), so a stream stopped
+        early by max_tests is not stored. If the stream fails after some
+        tests were parsed, those tests are returned with the error set.
+        
+        Args:
+            code_description: Description of the code/API to test
+            language: Target language (python, javascript, etc.)
+            max_tokens: Maximum tokens for generation
+            max_tests: Stop after this many valid tests (None: no limit)
+            on_test: Called with each test as it is parsed
+            use_cache: Serve an identical earlier generation from the LLM
+                       result cache (False forces a new generation)
+            slot: Context manager factory held around the LLM call (not
+                  for cache hits), e.g. a pipeline admission slot; an
+                  exception it raises fails this generation
             
-            if not test_data_list:
-                return TestGenerationResult(
-                    success=False,
-                    tests=[],
-                    raw_response=response,
-                    error="Failed to parse test cases from LLM response",
-                    generation_time_ms=(time.time() - start_time) * 1000
-                )
+        Returns:
+            TestGenerationResult with generated tests
+        """
+        start_time = time.time()
+        parser = StreamingTestParser()
+        tests: List[TestCase] = []
+        
+        try:
+            prompt = self._build_prompt(code_description, language)
             
-            # Normalize tests
-            tests = []
-            for i, test_data in enumerate(test_data_list):
-                try:
-                    test = self._normalize_test(test_data, i)
-                    tests.append(test)
-                except Exception as e:
-                    logger.warning(f"Failed to normalize test {i}: {e}")
-                    continue
+            cache_key = self._cache_key(prompt, max_tokens=max_tokens, temperature=0.1)
+            cached = await asyncio.to_thread(llm_cache.lookup, cache_key, use_cache) if cache_key else None
+            if cached is not None:
+                self._collect(parser, cached, tests, max_tests, on_test)
+                result = self._streamed_result(parser, tests, start_time)
+                result.cached = True
+                return result
             
-            generation_time = (time.time() - start_time) * 1000
-            logger.info(f"Generated {len(tests)} tests in {generation_time:.0f}ms")
+            async with slot() if slot else nullcontext():
+                logger.info("Streaming tests from local LLM...")
+                stream = self.llm.astream(prompt, max_tokens=max_tokens, temperature=0.1)
+                async with aclosing(stream):
+                    async for chunk in stream:
+                        if self._collect(parser, chunk, tests, max_tests, on_test):
+                            break
             
-            return TestGenerationResult(
-                success=True,
-                tests=tests,
-                raw_response=response,
-                generation_time_ms=generation_time
-            )
+            result = self._streamed_result(parser, tests, start_time)
+            stopped_early = not parser.complete and max_tests and len(tests) >= max_tests
+            if not stopped_early:
+                await asyncio.to_thread(self._cache_store, cache_key, result)
+            return result
             
         except Exception as e:
-            logger.error(f"Test generation failed: {e}")
+            if not tests:
+                return self._failed(e, start_time)
+            # Tests already went to on_test: keep them (not cached)
+            logger.warning(f"Test generation stream failed after {len(tests)} tests: {e}")
+            result = self._streamed_result(parser, tests, start_time)
+            result.error = str(e)
+            return result
+    
+    def _collect(self, parser: StreamingTestParser, chunk: str, tests: List[TestCase],
+                 max_tests: Optional[int], on_test: Optional[Callable[[TestCase], None]]) -> bool:
+        """Feed generated text to the parser; returns True once generation can stop"""
+        for item in parser.feed(chunk):
+            try:
+                test = self._normalize_test(item, len(tests))
+            except Exception as e:
+                logger.warning(f"Failed to normalize test {len(tests)}: {e}")
+                continue
+            tests.append(test)
+            if on_test:
+                on_test(test)
+            if max_tests and len(tests) >= max_tests:
+                return True
+        return parser.complete
+    
+    def _streamed_result(self, parser: StreamingTestParser, tests: List[TestCase],
+                         start_time: float) -> TestGenerationResult:
+        if not tests:
+            return self._build_result(parser.text, start_time)
+        
+        generation_time = (time.time() - start_time) * 1000
+        logger.info(
+            f"Streamed {len(tests)} tests in {generation_time:.0f}ms "
+            f"({len(parser.text)} chars, json {'complete' if parser.complete else 'cut off'})"
+        )
+        return TestGenerationResult(
+            success=True,
+            tests=tests,
+            raw_response=parser.text,
+            generation_time_ms=generation_time
+        )
+    
+    def _build_result(self, response: str, start_time: float) -> TestGenerationResult:
+        """Parse and normalize the raw LLM response into a result"""
+        # Log raw response for debugging
+        logger.info(f"LLM raw response length: {len(response)} chars")
+        logger.debug(f"LLM raw response: {response[:1000]}...")
+        
+        # Parse response
+        test_data_list = self._parse_response(response)
+        
+        logger.info(f"Parsed {len(test_data_list)} test items from response")
+        for i, item in enumerate(test_data_list[:3]):
+            logger.debug(f"Parsed item {i}: type={type(item).__name__}, value={str(item)[:200]}")
+        
+        if not test_data_list:
             return TestGenerationResult(
                 success=False,
                 tests=[],
-                raw_response="",
-                error=str(e),
+                raw_response=response,
+                error="Failed to parse test cases from LLM response",
                 generation_time_ms=(time.time() - start_time) * 1000
             )
+        
+        # Normalize tests
+        tests = []
+        for i, test_data in enumerate(test_data_list):
+            try:
+                test = self._normalize_test(test_data, i)
+                tests.append(test)
+            except Exception as e:
+                logger.warning(f"Failed to normalize test {i}: {e}")
+                continue
+        
+        generation_time = (time.time() - start_time) * 1000
+        logger.info(f"Generated {len(tests)} tests in {generation_time:.0f}ms")
+        
+        return TestGenerationResult(
+            success=True,
+            tests=tests,
+            raw_response=response,
+            generation_time_ms=generation_time
+        )
+
+    async def agenerate_batch(
+        self,
+        code_descriptions: List[str],
+        language: str = "python",
+        max_tokens: int = 2048,
+        max_tests: Optional[int] = MAX_GENERATED_TESTS,
+        on_test: Optional[Callable[[TestCase], None]] = None,
+        use_cache: bool = True,
+        slot: Optional[Callable[[], AsyncContextManager]] = None
+    ) -> TestGenerationResult:
+        """
+        Generate tests for several descriptions (e.g. one per changed file)
+        concurrently and merge them into one result.
+        
+        All prompts are started at once; the LLM client runs as many as
+        its concurrency limit allows and queues the rest. With slot, each
+        prompt's LLM call is admitted separately (see agenerate). Tests are
+        deduplicated across prompts as they arrive (see TestMerger), so
+        on_test only sees each distinct test once. A failed prompt does
+        not fail the batch.
+        
+        Args:
+            code_descriptions: One description per prompt
+            language: Target language (python, javascript, etc.)
+            max_tokens: Maximum tokens per generation
+            max_tests: Test limit per prompt
+            on_test: Called with each distinct test as it is parsed
+            use_cache: Use the LLM result cache for each prompt
+            slot: Context manager factory held around each LLM call
+            
+        Returns:
+            TestGenerationResult with the merged tests
+        """
+        start_time = time.time()
+        merger = TestMerger()
+        offered = set()
+        
+        def accept(test: TestCase):
+            offered.add(id(test))
+            merged = merger.add(test)
+            if merged is not None and on_test:
+                on_test(merged)
+        
+        results = await asyncio.gather(*(
+            self.agenerate(description, language, max_tokens=max_tokens, max_tests=max_tests,
+                           on_test=accept, use_cache=use_cache, slot=slot)
+            for description in code_descriptions
+        ))
+        
+        # Tests recovered by the fallback parser never went through on_test
+        for result in results:
+            for test in result.tests:
+                if id(test) not in offered:
+                    accept(test)
+        
+        errors = [result.error for result in results if result.error]
+        generation_time = (time.time() - start_time) * 1000
+        logger.info(
+            f"Batch of {len(code_descriptions)} prompts produced {len(merger.tests)} tests "
+            f"({merger.duplicates} duplicates removed, {len(errors)} prompts failed) in {generation_time:.0f}ms"
+        )
+        return TestGenerationResult(
+            success=bool(merger.tests),
+            tests=merger.tests,
+            raw_response="\n\n".join(result.raw_response for result in results),
+            error="; ".join(errors) if errors and not merger.tests else None,
+            generation_time_ms=generation_time,
+            cached=bool(results) and all(result.cached for result in results),
+            prompt_count=len(code_descriptions),
+            duplicates_removed=merger.duplicates
+        )
+    
+    @staticmethod
+    def _failed(error: Exception, start_time: float) -> TestGenerationResult:
+        logger.error(f"Test generation failed: {error}")
+        return TestGenerationResult(
+            success=False,
+            tests=[],
+            raw_response="",
+            error=str(error),
+            generation_time_ms=(time.time() - start_time) * 1000
+        )
 
 
 # Convenience function
 def generate_tests(
     code_description: str,
-    language: str = "python"
+    language: str = "python",
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
     Generate test cases from a code description.
@@ -365,6 +521,7 @@ def generate_tests(
     Args:
         code_description: Description of the code/API to test
         language: Target language
+        use_cache: Reuse an identical earlier generation (LLM result cache)
         
     Returns:
         Dictionary with tests and metadata
@@ -377,10 +534,123 @@ def generate_tests(
         >>> print(tests["tests"])
     """
     generator = TestGenerator()
-    result = generator.generate(code_description, language)
+    result = generator.generate(code_description, language, use_cache=use_cache)
+    return result.to_dict()
+
+
+async def agenerate_tests(
+    code_description: str,
+    language: str = "python",
+    max_tests: Optional[int] = MAX_GENERATED_TESTS,
+    on_test: Optional[Callable[[Dict[str, Any]], None]] = None,
+    use_cache: bool = True,
+    slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> Dict[str, Any]:
+    """
+    Async, streaming variant of generate_tests() for use from the event loop.
+    
+    on_test receives each test (as a dict) as soon as it is parsed;
+    use_cache=False skips the LLM result cache lookup; slot is held
+    around the LLM call (e.g. pipeline_scheduler admission).
+    
+    Example:
+        >>> tests = await agenerate_tests("POST /login ...", on_test=print)
+    """
+    generator = TestGenerator()
+    result = await generator.agenerate(
+        code_description, language, max_tests=max_tests,
+        on_test=(lambda test: on_test(test.to_dict())) if on_test else None,
+        use_cache=use_cache, slot=slot
+    )
+    return result.to_dict()
+
+
+async def agenerate_tests_batch(
+    code_descriptions: List[str],
+    language: str = "python",
+    max_tests: Optional[int] = MAX_GENERATED_TESTS,
+    on_test: Optional[Callable[[Dict[str, Any]], None]] = None,
+    use_cache: bool = True,
+    slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> Dict[str, Any]:
+    """
+    Generate and merge tests for several descriptions concurrently.
+    
+    Example:
+        >>> prompts = build_change_descriptions(analysis["files"], "high", 0.8, ["security"])
+        >>> tests = await agenerate_tests_batch(prompts)
+    """
+    generator = TestGenerator()
+    result = await generator.agenerate_batch(
+        code_descriptions, language, max_tests=max_tests,
+        on_test=(lambda test: on_test(test.to_dict())) if on_test else None,
+        use_cache=use_cache, slot=slot
+    )
     return result.to_dict()
 
 
+def build_change_descriptions(
+    files: List[Dict[str, Any]],
+    risk_level: str,
+    risk_score: float,
+    risk_domains: List[str],
+    changes_per_prompt: int = BATCH_CHANGES_PER_PROMPT,
+    max_prompts: int = BATCH_MAX_PROMPTS
+) -> List[str]:
+    """
+    Split a diff analysis into code descriptions for batch generation.
+    
+    Each changed file becomes its own prompt; a file with more than
+    changes_per_prompt logical changes is split into several prompts of
+    that many functions each. If that yields more than max_prompts
+    prompts, neighbouring ones are packed together so that every file is
+    still described.
+    
+    Args:
+        files: Diff analysis files (path or filename, status, and
+            changed_nodes or logical_changes)
+        risk_level: Risk level from impact analysis
+        risk_score: Risk score from impact analysis
+        risk_domains: Detected risk domains
+        changes_per_prompt: Logical changes described per prompt
+        max_prompts: Maximum number of prompts
+        
+    Returns:
+        List of code descriptions (empty if no files changed)
+    """
+    header = (
+        "Security-sensitive code changes detected.\n"
+        f"Risk Level: {risk_level} ({risk_score:.2f})\n"
+        f"Risk Domains: {', '.join(risk_domains)}\n\n"
+        "Files changed:\n"
+    )
+    
+    sections = []
+    for f in files:
+        filename = f.get('filename') or f.get('path', 'unknown')
+        file_header = f"\nFile: {filename}\nStatus: {f.get('status', 'modified')}\n"
+        changes = [
+            f"  - {change.get('type', 'change')}: {change.get('description', change.get('name', ''))}\n"
+            for change in f.get('logical_changes') or f.get('changed_nodes') or []
+        ]
+        if not changes:
+            sections.append(file_header)
+            continue
+        for start in range(0, len(changes), max(1, changes_per_prompt)):
+            chunk = changes[start:start + changes_per_prompt]
+            sections.append(file_header + "Functions/Methods:\n" + "".join(chunk))
+    
+    if not sections:
+        return []
+    
+    # Pack consecutive sections into at most max_prompts prompts
+    per_prompt = -(-len(sections) // max(1, max_prompts))
+    return [
+        header + "".join(sections[start:start + per_prompt])
+        for start in range(0, len(sections), per_prompt)
+    ]
+
+
 # CLI for testing
 if __name__ == "__main__":
     import sys
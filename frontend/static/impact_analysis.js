@@ -5,7 +5,7 @@
 let isLoggedIn = false;
 let lastUserData = null;
 let selectedEventId = null;
-let autoRefreshInterval = null;
+let pipelineEventSource = null;
 let allResults = [];
 
 // Initialize on DOM load
@@ -453,13 +453,20 @@ function initRefreshButton() {
     }
 }
 
-// Auto-refresh pipeline results
+// Auto-refresh pipeline results when the server pushes a pipeline event
 function startAutoRefresh() {
-    // Refresh every 30 seconds
-    autoRefreshInterval = setInterval(async () => {
+    // Bursts (e.g. a commit sync) collapse into one reload
+    const refresh = debounce(async () => {
         await loadPipelineResults();
         await loadPipelineStats();
-    }, 30000);
+    }, 1000);
+    
+    pipelineEventSource = new EventSource('/api/pipeline/events/stream', { withCredentials: true });
+    pipelineEventSource.addEventListener('event_created', refresh);
+    pipelineEventSource.addEventListener('event_completed', refresh);
+    pipelineEventSource.onerror = () => {
+        console.warn('Pipeline event stream interrupted, reconnecting...');
+    };
 }
 
 // Debounce helper
@@ -628,7 +635,7 @@ function resetSyncButton() {
 
 // Clean up on page unload
 window.addEventListener('beforeunload', () => {
-    if (autoRefreshInterval) {
-        clearInterval(autoRefreshInterval);
+    if (pipelineEventSource) {
+        pipelineEventSource.close();
     }
 });
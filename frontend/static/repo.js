@@ -10,8 +10,8 @@ document.addEventListener('DOMContentLoaded', function () {
     let selectedFile = null;
     let repositoriesData = [];
     let currentAnalysis = null;
-    let lastEventId = null;  // Track last event for polling
-    let pollInterval = null; // Polling interval reference
+    let lastEventId = null;  // Last processed event we refreshed for
+    let eventSource = null;  // Live pipeline event stream
 
     // ==================== DOM ELEMENTS ====================
     const rawViewBtn = document.getElementById('raw-view-btn');
@@ -240,8 +240,8 @@ document.addEventListener('DOMContentLoaded', function () {
             loadCommitHistory(fullName)
         ]);
         
-        // Start polling for updates
-        startPolling(fullName);
+        // Listen for pipeline updates
+        startLiveUpdates(fullName);
     }
 
     async function loadCommitHistory(fullName) {
@@ -369,70 +369,58 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    // ==================== POLLING FOR UPDATES ====================
-    async function startPolling(fullName) {
-        // Clear any existing polling
-        stopPolling();
+    // ==================== LIVE UPDATES ====================
+    function startLiveUpdates(fullName) {
+        // Close the stream of a previously selected repository
+        stopLiveUpdates();
         
-        // First, get the current latest event ID so we only notify on NEW events
-        try {
-            const initResponse = await fetch(`/api/repositories/${encodeURIComponent(fullName)}/latest-event`, {
-                credentials: 'include'
-            });
-            if (initResponse.ok) {
-                const initData = await initResponse.json();
-                if (initData.has_update && initData.event_id) {
-                    lastEventId = initData.event_id;
-                    console.log('Initialized lastEventId:', lastEventId);
-                }
-            }
-        } catch (e) {
-            console.error('Failed to initialize polling:', e);
-        }
+        // The server pushes pipeline notifications for this repository;
+        // EventSource reconnects on its own and resumes from the last event
+        eventSource = new EventSource(
+            `/api/pipeline/events/stream?repository=${encodeURIComponent(fullName)}`,
+            { withCredentials: true }
+        );
         
-        // Poll every 5 seconds for updates
-        pollInterval = setInterval(async () => {
-            if (!selectedRepo) {
-                stopPolling();
+        eventSource.addEventListener('event_completed', async (e) => {
+            if (!selectedRepo || selectedRepo.full_name !== fullName) {
+                stopLiveUpdates();
                 return;
             }
             
+            const data = JSON.parse(e.data);
+            if (data.status !== 'completed' || data.event_id === lastEventId) return;
+            
+            console.log('New update pushed! Old ID:', lastEventId, 'New ID:', data.event_id);
+            lastEventId = data.event_id;
+            
+            // Show notification
+            showUpdateNotification(data.commit_sha ? data.commit_sha.substring(0, 7) : null);
+            
             try {
-                const response = await fetch(`/api/repositories/${encodeURIComponent(fullName)}/latest-event`, {
-                    credentials: 'include'
-                });
-                
-                if (!response.ok) return;
-                
-                const data = await response.json();
+                // Reload the analysis data
+                await loadRepositoryAnalysis(fullName);
                 
-                // Check if there's a NEW processed event (different ID than what we have)
-                if (data.has_update && data.processed && data.event_id && data.event_id !== lastEventId) {
-                    console.log('New update detected! Old ID:', lastEventId, 'New ID:', data.event_id);
-                    lastEventId = data.event_id;
-                    
-                    // Show notification
-                    showUpdateNotification(data.commit_sha);
-                    
-                    // Reload the analysis data
-                    await loadRepositoryAnalysis(fullName);
-                    
-                    // Also reload repositories list to update commit hash display
-                    await loadRepositories();
-                }
+                // Also reload repositories list to update commit hash display
+                await loadRepositories();
             } catch (error) {
-                console.error('Polling error:', error);
+                console.error('Live update error:', error);
             }
-        }, 5000); // Check every 5 seconds
+        });
+        
+        eventSource.onerror = () => {
+            console.warn('Pipeline event stream interrupted, reconnecting...');
+        };
     }
     
-    function stopPolling() {
-        if (pollInterval) {
-            clearInterval(pollInterval);
-            pollInterval = null;
+    function stopLiveUpdates() {
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
         }
     }
     
+    window.addEventListener('beforeunload', stopLiveUpdates);
+    
     function showUpdateNotification(commitSha) {
         // Create a subtle notification
         const notification = document.createElement('div');
@@ -521,7 +509,26 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    function renderDiff(file) {
+    async function renderDiff(file) {
+        // Diffs are not embedded in the analysis payload: fetch on first view
+        if (file.diff === undefined && file.has_diff && selectedRepo) {
+            diffContent.innerHTML = '<div class="loading-state"><div class="spinner"></div><span>Loading diff...</span></div>';
+            try {
+                const params = new URLSearchParams({ path: file.path });
+                if (currentAnalysis?.event_id) params.set('event_id', currentAnalysis.event_id);
+                const response = await fetch(
+                    `/api/repositories/${encodeURIComponent(selectedRepo.full_name)}/diff?${params}`,
+                    { credentials: 'include' }
+                );
+                file.diff = response.ok ? (await response.json()).diff : '';
+            } catch (error) {
+                console.error('Error loading diff:', error);
+                file.diff = '';
+            }
+            // Another file may have been selected while loading
+            if (selectedFile !== file) return;
+        }
+
         if (!file.diff) {
             diffContent.innerHTML = `
                 <div class="empty-state">
@@ -8,6 +8,7 @@ let generatedTests = [];
 let selectedTest = null;
 let testRuns = [];
 let llmStatus = { loaded: false, using_gpu: false };
+let testEventSource = null;
 
 // DOM Elements
 const testsList = document.getElementById('tests-list');
@@ -31,6 +32,7 @@ document.addEventListener('DOMContentLoaded', () => {
     setupEventListeners();
     loadTestRuns();
     checkLLMStatus();
+    startLiveTests();
 });
 
 function initializePage() {
@@ -296,6 +298,44 @@ function showLoading(show) {
     if (emptyState) emptyState.style.display = 'none';
 }
 
+// ==================== LIVE GENERATION ====================
+
+function startLiveTests() {
+    // The pipeline pushes each test while the LLM is still generating
+    testEventSource = new EventSource('/api/pipeline/events/stream', { withCredentials: true });
+    
+    testEventSource.addEventListener('test_generated', (e) => {
+        const data = JSON.parse(e.data);
+        generatedTests.unshift({
+            ...data.test,
+            event_id: data.event_id,
+            repository: data.repository,
+            commit: data.commit_sha ? data.commit_sha.substring(0, 7) : null,
+            generated_at: new Date().toISOString()
+        });
+        updateStats();
+        renderTestsList();
+    });
+    
+    // The stored result has the prioritized tests; replace the streamed ones
+    testEventSource.addEventListener('event_completed', async () => {
+        await loadGeneratedTests();
+        updateStats();
+        renderTestsList();
+    });
+    
+    testEventSource.onerror = () => {
+        console.warn('Pipeline event stream interrupted, reconnecting...');
+    };
+}
+
+window.addEventListener('beforeunload', () => {
+    if (testEventSource) {
+        testEventSource.close();
+        testEventSource = null;
+    }
+});
+
 // ==================== TEST LIST RENDERING ====================
 
 function renderTestsList() {